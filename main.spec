@@ -5,7 +5,7 @@ a = Analysis(
     ['src\\main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('assets\\bands.json', 'assets')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
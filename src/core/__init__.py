@@ -1,3 +1,4 @@
 # src/core/__init__.py
 from .calculations import calculate_metrics
-from .formulas import FORMULAS
\ No newline at end of file
+from .engine import MetricResult, evaluate
+from .formulas import FORMULAS
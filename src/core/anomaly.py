@@ -0,0 +1,176 @@
+# src/core/anomaly.py
+import logging
+import math
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional
+import numpy as np
+from src.core.bands import band_table
+from src.core.engine import MetricResult
+from src.core.money import from_micros
+
+DEFAULT_ALPHA = 0.1  # Вес нового наблюдения в EWMA: эффективное окно ~ 2 / alpha − 1 наблюдений
+DEFAULT_THRESHOLD = 3.0  # |z|, начиная с которого наблюдение считается аномалией
+DEFAULT_WARMUP = 10  # Наблюдений до первых оповещений: базовая линия должна устояться
+MIN_VARIANCE = 1e-12
+
+
+class Anomaly(NamedTuple):
+    """
+    Запись об аномалии метрики.
+
+    severity использует теги диапазонов: 'danger' и 'warning' — отклонение в плохую сторону
+    (падение CTR, рост CPC), 'very_good' и 'success' — такое же сильное отклонение в хорошую сторону.
+    """
+    series_id: Hashable
+    metric_id: str
+    timestamp: object
+    value: float
+    expected: float
+    z: float
+    direction: str  # 'spike' или 'drop'
+    severity: str
+
+
+class _Baseline:
+    """Экспоненциально взвешенные среднее и дисперсия: O(1) памяти и времени на наблюдение."""
+    __slots__ = ("mean", "variance", "count")
+
+    def __init__(self):
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+
+    def update(self, value: float, alpha: float):
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.count += 1
+
+
+class _Seasonal:
+    """Базовые линии ряда по фазам сезона и счётчик наблюдений для фазы по умолчанию."""
+    __slots__ = ("phases", "count")
+
+    def __init__(self, season_length: int):
+        self.phases: List[Optional[_Baseline]] = [None] * season_length
+        self.count = 0
+
+
+class AnomalyDetector:
+    """
+    Потоковый детектор аномалий одной метрики по множеству рядов (кампаний).
+
+    Для каждого ряда хранится базовая линия EWMA/EWMV, а при сезонности — по одной на фазу сезона
+    (например, день недели). Обновление и проверка занимают O(1), поэтому в памяти помещаются
+    сотни тысяч рядов.
+    """
+
+    def __init__(self, metric_id: str, alpha: float = DEFAULT_ALPHA, threshold: float = DEFAULT_THRESHOLD,
+                 warmup: int = DEFAULT_WARMUP, season_length: Optional[int] = None, vertical: Optional[str] = None):
+        if not 0 < alpha <= 1:
+            raise ValueError(f"Alpha must be in (0, 1], got {alpha}")
+        self.metric_id = metric_id
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.season_length = season_length
+        self.higher_is_better = band_table(metric_id, vertical).direction == "higher"
+        self._series: Dict[Hashable, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def _baseline(self, series_id: Hashable, season: Optional[int]) -> _Baseline:
+        state = self._series.get(series_id)
+        if self.season_length is None:
+            if state is None:
+                state = self._series[series_id] = _Baseline()
+            return state
+        if state is None:
+            state = self._series[series_id] = _Seasonal(self.season_length)
+        phase = (season if season is not None else state.count) % self.season_length
+        state.count += 1
+        if state.phases[phase] is None:
+            state.phases[phase] = _Baseline()
+        return state.phases[phase]
+
+    def _severity(self, z: float) -> str:
+        good = (z > 0) == self.higher_is_better
+        strong = abs(z) >= 2 * self.threshold
+        if good:
+            return "very_good" if strong else "success"
+        return "danger" if strong else "warning"
+
+    def update(self, series_id: Hashable, value: Optional[float], timestamp: object = None,
+               season: Optional[int] = None) -> Optional[Anomaly]:
+        """
+        Добавляет наблюдение ряда и возвращает аномалию, если оно выбивается из базовой линии.
+
+        Args:
+            series_id (Hashable): Идентификатор ряда.
+            value (Optional[float]): Значение метрики; None и NaN пропускаются без изменения состояния.
+            timestamp (object): Метка времени для записи об аномалии.
+            season (Optional[int]): Фаза сезона (например, день недели); по умолчанию — номер наблюдения.
+
+        Returns:
+            Optional[Anomaly]: Аномалия или None.
+        """
+        if value is None or not math.isfinite(value):
+            return None
+        baseline = self._baseline(series_id, season)
+        anomaly = None
+        if baseline.count >= self.warmup:
+            expected = baseline.mean
+            z = (value - expected) / math.sqrt(max(baseline.variance, MIN_VARIANCE * max(1.0, expected * expected)))
+            if abs(z) >= self.threshold:
+                anomaly = Anomaly(series_id, self.metric_id, timestamp, value, expected, z,
+                                  "spike" if z > 0 else "drop", self._severity(z))
+                logging.debug(f"Anomaly in {self.metric_id} for {series_id}: z={z:.2f}")
+        baseline.update(value, self.alpha)
+        return anomaly
+
+    def reset(self, series_id: Hashable):
+        """Забывает состояние ряда (например, после перезапуска кампании)."""
+        self._series.pop(series_id, None)
+
+
+def _currency_units(result: MetricResult) -> float:
+    # В режиме currency="micros" денежные метрики приходят целыми микроединицами; базовая линия ведётся
+    # в единицах валюты, чтобы пороги и история не зависели от режима расчёта
+    if result.unit == "currency" and isinstance(result.value, (int, np.integer)):
+        return from_micros(result.value)
+    return float(result.value)
+
+
+class AnomalyMonitor:
+    """Набор детекторов по метрикам, принимающий результаты src.core.engine.evaluate."""
+
+    def __init__(self, metrics: Iterable[str], **options):
+        self.detectors = {metric_id: AnomalyDetector(metric_id, **options) for metric_id in metrics}
+
+    def observe(self, series_id: Hashable, results: Iterable[MetricResult], timestamp: object = None,
+                season: Optional[int] = None) -> List[Anomaly]:
+        """
+        Обрабатывает результаты расчёта метрик одного ряда за один период.
+
+        Args:
+            series_id (Hashable): Идентификатор ряда (кампании).
+            results (Iterable[MetricResult]): Результаты engine.evaluate; метрики без детектора пропускаются.
+            timestamp (object): Метка времени периода.
+            season (Optional[int]): Фаза сезона.
+
+        Returns:
+            List[Anomaly]: Найденные аномалии.
+        """
+        anomalies = []
+        for result in results:
+            detector = self.detectors.get(result.metric_id)
+            if detector is None:
+                continue
+            anomaly = detector.update(series_id, _currency_units(result), timestamp, season)
+            if anomaly is not None:
+                anomalies.append(anomaly)
+        return anomalies
@@ -0,0 +1,132 @@
+# src/core/bands.py
+import json
+import os
+import sys
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+BANDS = ("very_good", "success", "warning", "danger")
+DIRECTIONS = ("higher", "lower")
+
+
+class BandTable(NamedTuple):
+    """Таблица классификации метрики: направление, возрастающие границы и диапазоны между ними."""
+    direction: str
+    edges: Tuple[float, float, float]
+    codes: Tuple[int, int, int, int]  # Индексы в BANDS для интервалов (-inf, e0), [e0, e1), [e1, e2), [e2, inf)
+
+
+def default_config_path() -> str:
+    """Путь к assets/bands.json рядом с проектом или внутри собранного .exe."""
+    base = sys._MEIPASS if getattr(sys, 'frozen', False) else os.path.abspath(
+        os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(base, "assets", "bands.json")
+
+
+def load_band_config(path: Optional[str] = None) -> Dict:
+    """
+    Загружает пороги диапазонов из JSON.
+
+    Формат: {"default": {metric_id: {"direction": "higher"|"lower", "thresholds": {...}}},
+    "verticals": {vertical: {metric_id: {...}}}}. Записи вертикали переопределяют значения по умолчанию
+    для отдельных метрик; направление можно не указывать.
+
+    Args:
+        path (Optional[str]): Путь к файлу; по умолчанию assets/bands.json.
+
+    Returns:
+        Dict: Конфигурация порогов.
+    """
+    with open(path or default_config_path(), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    for vertical, tables in [(None, config["default"])] + list(config.get("verticals", {}).items()):
+        for metric_id in tables:
+            _build_table(config, metric_id, vertical)  # Проверяем конфигурацию сразу при загрузке
+    return config
+
+
+def _build_table(config: Dict, metric_id: str, vertical: Optional[str]) -> BandTable:
+    entry = dict(config["default"].get(metric_id, {}))
+    if vertical is not None:
+        if vertical not in config.get("verticals", {}):
+            raise ValueError(f"Unknown vertical: {vertical}")
+        entry.update(config["verticals"][vertical].get(metric_id, {}))
+    direction = entry.get("direction")
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Band direction for {metric_id} must be one of {DIRECTIONS}, got {direction!r}")
+    thresholds = entry["thresholds"]
+    if direction == "higher":
+        edges = (thresholds["warning"], thresholds["success"], thresholds["very_good"])
+        codes = (3, 2, 1, 0)
+    else:
+        edges = (thresholds["very_good"], thresholds["success"], thresholds["warning"])
+        codes = (0, 1, 2, 3)
+    if not edges[0] <= edges[1] <= edges[2]:
+        raise ValueError(f"Thresholds for {metric_id} ({vertical or 'default'}) are not monotonic: {thresholds}")
+    return BandTable(direction, edges, codes)
+
+
+@lru_cache(maxsize=None)
+def _default_config() -> Dict:
+    return load_band_config()
+
+
+@lru_cache(maxsize=None)
+def _default_table(metric_id: str, vertical: Optional[str]) -> BandTable:
+    return _build_table(_default_config(), metric_id, vertical)
+
+
+def band_table(metric_id: str, vertical: Optional[str] = None, config: Optional[Dict] = None) -> BandTable:
+    """Возвращает таблицу классификации метрики с учётом вертикали (e-commerce, B2B, приложения)."""
+    if config is None:
+        return _default_table(metric_id, vertical)
+    return _build_table(config, metric_id, vertical)
+
+
+def verticals(config: Optional[Dict] = None) -> List[str]:
+    """Возвращает список вертикалей, для которых заданы собственные пороги."""
+    return list((config or _default_config()).get("verticals", {}))
+
+
+def classify_value(metric_id: str, value: float, vertical: Optional[str] = None, config: Optional[Dict] = None) -> str:
+    """
+    Определяет диапазон качества одного значения.
+
+    Для направления "higher" значение, равное порогу, попадает в этот диапазон;
+    для "lower" диапазон требует значения строго меньше порога.
+
+    Returns:
+        str: Один из тегов 'very_good', 'success', 'warning', 'danger'.
+    """
+    table = band_table(metric_id, vertical, config)
+    return BANDS[table.codes[bisect_right(table.edges, value)]]
+
+
+def classify_codes(metric_id: str, values, vertical: Optional[str] = None, config: Optional[Dict] = None):
+    """
+    Векторная классификация: индексы диапазонов в BANDS для массива значений.
+
+    Args:
+        metric_id (str): Идентификатор метрики.
+        values: Массив значений (в том числе MaskedArray).
+        vertical (Optional[str]): Вертикаль с собственными порогами.
+        config (Optional[Dict]): Конфигурация вместо assets/bands.json.
+
+    Returns:
+        np.ndarray: int8-коды 0..3 по BANDS; -1 для NaN и замаскированных значений.
+    """
+    import numpy as np
+    table = band_table(metric_id, vertical, config)
+    mask = np.ma.getmaskarray(values)
+    data = np.ma.getdata(values).astype(np.float64, copy=False)
+    codes = np.array(table.codes, dtype=np.int8)[np.searchsorted(table.edges, data, side="right")]
+    codes[mask | np.isnan(data)] = -1
+    return codes
+
+
+def classify(metric_id: str, values, vertical: Optional[str] = None, config: Optional[Dict] = None):
+    """Векторная классификация: массив тегов диапазонов; пустая строка для отсутствующих значений."""
+    import numpy as np
+    labels = np.array(BANDS + ("",))
+    return labels[classify_codes(metric_id, values, vertical, config)]
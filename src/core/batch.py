@@ -0,0 +1,106 @@
+# src/core/batch.py
+import logging
+from typing import Dict, Iterable, Mapping, Optional
+import numpy as np
+from src.core.bands import classify_codes
+from src.core.formulas import METRICS, MONEY_INPUTS
+from src.core.money import DEFAULT_ROUNDING, MICROS_PER_UNIT, check_currency, round_micros
+
+
+def _column(columns: Mapping[str, object], name: str, size: int) -> np.ndarray:
+    """Возвращает столбец как float64; отсутствующий столбец или маска превращаются в NaN."""
+    if name not in columns or columns[name] is None:
+        return np.full(size, np.nan)
+    column = columns[name]
+    if isinstance(column, np.ma.MaskedArray):
+        return column.astype(np.float64).filled(np.nan)
+    return np.asarray(column, dtype=np.float64)
+
+
+def _money_column(columns: Mapping[str, object], name: str, size: int, rounding: str) -> np.ndarray:
+    """Денежный столбец в микроединицах (float64 с NaN для пропусков): целые — уже микроединицы."""
+    column = columns.get(name)
+    if column is not None and np.asarray(column).dtype.kind in "iu":
+        return np.asarray(column, dtype=np.float64)
+    values = _column(columns, name, size)
+    return np.where(np.isnan(values), np.nan, round_micros(values * MICROS_PER_UNIT, rounding))
+
+
+def calculate_batch(columns: Optional[Mapping[str, object]] = None,
+                    metrics: Optional[Iterable[str]] = None,
+                    currency: str = "float",
+                    rounding: str = DEFAULT_ROUNDING,
+                    **arrays: object) -> Dict[str, np.ma.MaskedArray]:
+    """
+    Рассчитывает метрики для всех строк за один векторизованный проход.
+
+    Строка маскируется, если хотя бы одно входное значение метрики отсутствует (NaN, маска,
+    нет столбца) или равно нулю — так же, как поштучный расчёт в src.core.engine пропускает метрику.
+
+    Args:
+        columns (Optional[Mapping[str, object]]): Столбцы входных данных по именам полей из FORMULAS
+            ('ctr_impressions', 'cpc_total_cost', ...).
+        metrics (Optional[Iterable[str]]): Идентификаторы метрик для расчёта; по умолчанию все.
+        currency (str): 'float' — деньги в единицах валюты; 'micros' — денежные поля (MONEY_INPUTS) задаются
+            целыми микроединицами (float-столбцы переводятся с округлением), а денежные метрики возвращаются
+            в int64-микроединицах.
+        rounding (str): Правило округления для режима 'micros' (см. src.core.money.round_micros).
+        **arrays: Дополнительные столбцы, переданные именованными аргументами.
+
+    Returns:
+        Dict[str, np.ma.MaskedArray]: Значения метрик по идентификаторам; маска отмечает строки без результата.
+    """
+    check_currency(currency, rounding)
+    data = dict(columns or {})
+    data.update(arrays)
+    sizes = {np.shape(column)[0] for column in data.values() if column is not None}
+    if len(sizes) > 1:
+        raise ValueError(f"Columns have different lengths: {sorted(sizes)}")
+    size = sizes.pop() if sizes else 0
+
+    results = {}
+    for metric_id in (metrics if metrics is not None else METRICS):
+        spec = METRICS[metric_id]
+        args = [_money_column(data, name, size, rounding) if currency == "micros" and name in MONEY_INPUTS
+                else _column(data, name, size) for name in spec.inputs]
+        valid = np.ones(size, dtype=bool)
+        for arg in args:
+            valid &= np.isfinite(arg) & (arg != 0)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            values = spec.compute(*args)
+        if currency == "micros" and spec.unit == "currency":
+            values = round_micros(np.where(valid, values, 0.0), rounding)
+        results[metric_id] = np.ma.MaskedArray(values, mask=~valid)
+    logging.debug(f"Batch calculated {len(results)} metrics for {size} rows")
+    return results
+
+
+def result_dtype(metrics: Iterable[str]) -> np.dtype:
+    """Тип структурированного массива результатов: значение и код диапазона для каждой метрики."""
+    fields = []
+    for metric_id in metrics:
+        fields += [(metric_id, np.float64), (f"{metric_id}_band", np.int8)]
+    return np.dtype(fields)
+
+
+def to_records(results: Mapping[str, np.ma.MaskedArray], vertical: Optional[str] = None) -> np.ndarray:
+    """
+    Упаковывает результаты calculate_batch в один структурированный массив.
+
+    Args:
+        results (Mapping[str, np.ma.MaskedArray]): Результаты calculate_batch.
+        vertical (Optional[str]): Вертикаль с собственными порогами диапазонов.
+
+    Returns:
+        np.ndarray: Строка на запись; поле метрики — значение (NaN без результата), поле '<id>_band' —
+            индекс в src.core.bands.BANDS или -1. Единица измерения — METRICS[id].unit, денежные значения
+            режима "micros" остаются в микроединицах.
+    """
+    size = len(next(iter(results.values()))) if results else 0
+    records = np.empty(size, dtype=result_dtype(results))
+    for metric_id, values in results.items():
+        records[metric_id] = np.ma.filled(values.astype(np.float64), np.nan)
+        # Денежные метрики в режиме "micros" классифицируются по значению в единицах валюты
+        scaled = values / MICROS_PER_UNIT if values.dtype.kind == "i" else values
+        records[f"{metric_id}_band"] = classify_codes(metric_id, scaled, vertical)
+    return records
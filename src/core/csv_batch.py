@@ -0,0 +1,291 @@
+# src/core/csv_batch.py
+import csv
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+import numpy as np
+from src.core.batch import calculate_batch
+from src.core.formulas import METRICS
+from src.core.money import CURRENCY_MODES, check_currency, format_micros
+
+DEFAULT_CHUNK_SIZE = 50_000
+OUTPUT_DECIMALS = 6  # Точность столбцов метрик в выходном CSV
+
+
+def parse_column(values: Sequence[str]) -> np.ndarray:
+    """Преобразует строки столбца в float64; пустые и некорректные значения становятся NaN."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        pass
+    try:
+        return np.array([value if value.strip() else "nan" for value in values], dtype=np.float64)
+    except ValueError:
+        parsed = np.empty(len(values))
+        for i, value in enumerate(values):
+            try:
+                parsed[i] = float(value) if value.strip() else np.nan
+            except ValueError:
+                parsed[i] = np.nan
+        return parsed
+
+
+def _format_column(values: np.ma.MaskedArray) -> List[str]:
+    """Форматирует результаты для CSV; замаскированные строки остаются пустыми, микроединицы — точно."""
+    if values.dtype.kind == "i":
+        formatted = format_micros(values.data, OUTPUT_DECIMALS)
+    else:
+        formatted = [repr(value) for value in np.round(values.data, OUTPUT_DECIMALS).tolist()]
+    mask = np.ma.getmaskarray(values)
+    for i in np.flatnonzero(mask).tolist():
+        formatted[i] = ""
+    return formatted
+
+
+def resolve_metrics(header: List[str], metrics: Optional[Iterable[str]] = None) -> List[str]:
+    """Возвращает метрики, все входные поля которых есть среди столбцов CSV."""
+    available = set(header)
+    candidates = metrics if metrics is not None else METRICS
+    return [metric_id for metric_id in candidates if set(METRICS[metric_id].inputs) <= available]
+
+
+def process_rows(rows: List[List[str]], header: List[str], metrics: List[str],
+                 currency: str = "float") -> List[List[str]]:
+    """
+    Рассчитывает метрики для блока строк CSV и дописывает их столбцами в конец каждой строки.
+
+    Строки дополняются на месте, чтобы не копировать блок.
+
+    Args:
+        rows (List[List[str]]): Строки блока без заголовка.
+        header (List[str]): Заголовок входного файла.
+        metrics (List[str]): Идентификаторы рассчитываемых метрик.
+        currency (str): 'micros' — денежные поля переводятся в целые микроединицы, денежные метрики
+            округляются по правилу half_even и записываются точно.
+
+    Returns:
+        List[List[str]]: Строки с добавленными столбцами метрик.
+    """
+    if not rows:
+        return []
+    width = len(header)
+    for i, row in enumerate(rows):
+        if len(row) != width:
+            rows[i] = (row + [""] * width)[:width]
+    if not metrics:
+        return rows
+    index = {name: i for i, name in enumerate(header)}
+    transposed = list(zip(*rows))
+    needed = {name for metric_id in metrics for name in METRICS[metric_id].inputs}
+    columns: Dict[str, np.ndarray] = {name: parse_column(transposed[index[name]]) for name in needed}
+    results = calculate_batch(columns, metrics=metrics, currency=currency)
+    formatted = zip(*[_format_column(results[metric_id]) for metric_id in metrics])
+    for row, extra in zip(rows, formatted):
+        row.extend(extra)
+    return rows
+
+
+def iter_chunks(reader: Iterator[List[str]], chunk_size: int) -> Iterator[List[List[str]]]:
+    """Разбивает поток строк CSV на блоки не длиннее chunk_size."""
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def process_stream(source: TextIO, target: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   metrics: Optional[Iterable[str]] = None, delimiter: str = ",", currency: str = "float") -> int:
+    """
+    Потоково рассчитывает метрики для CSV из source и записывает результат в target.
+
+    В памяти одновременно находится не больше chunk_size строк, поэтому размер файла не ограничен.
+
+    Args:
+        source (TextIO): Входной CSV с заголовком; имена столбцов совпадают с полями FORMULAS
+            ('ctr_impressions', 'cpc_total_cost', ...).
+        target (TextIO): Выходной CSV: исходные столбцы и столбцы метрик по их идентификаторам.
+        chunk_size (int): Количество строк в одном блоке.
+        metrics (Optional[Iterable[str]]): Ограничение набора метрик; по умолчанию все, для которых есть столбцы.
+        delimiter (str): Разделитель столбцов.
+        currency (str): 'float' или 'micros' — точный расчёт денежных метрик в микроединицах.
+
+    Returns:
+        int: Количество обработанных строк.
+    """
+    check_currency(currency)
+    reader = csv.reader(source, delimiter=delimiter)
+    writer = csv.writer(target, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return 0
+    selected = resolve_metrics(header, metrics)
+    if not selected:
+        logging.warning("CSV header contains no complete set of metric inputs")
+    writer.writerow(header + selected)
+    total = 0
+    for chunk in iter_chunks(reader, chunk_size):
+        writer.writerows(process_rows(chunk, header, selected, currency))
+        total += len(chunk)
+    logging.info(f"Processed {total} CSV rows, metrics: {selected}")
+    return total
+
+
+def process_csv(input_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                metrics: Optional[Iterable[str]] = None, delimiter: str = ",", encoding: str = "utf-8",
+                currency: str = "float") -> int:
+    """
+    Рассчитывает метрики для CSV-файла любого размера и записывает результат в новый CSV.
+
+    Args:
+        input_path (str): Путь к входному CSV.
+        output_path (str): Путь к выходному CSV.
+        chunk_size (int): Количество строк в одном блоке.
+        metrics (Optional[Iterable[str]]): Ограничение набора метрик.
+        delimiter (str): Разделитель столбцов.
+        encoding (str): Кодировка файлов.
+        currency (str): 'float' или 'micros' — точный расчёт денежных метрик в микроединицах.
+
+    Returns:
+        int: Количество обработанных строк.
+    """
+    with open(input_path, "r", newline="", encoding=encoding) as source, \
+            open(output_path, "w", newline="", encoding=encoding) as target:
+        return process_stream(source, target, chunk_size, metrics, delimiter, currency)
+
+
+def shard_ranges(input_path: str, shards: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Делит файл на диапазоны байтов, выровненные по границам строк.
+
+    Args:
+        input_path (str): Путь к CSV.
+        shards (int): Желаемое количество диапазонов.
+
+    Returns:
+        Tuple[bytes, List[Tuple[int, int]]]: Строка заголовка и список непустых диапазонов [начало, конец).
+    """
+    size = os.path.getsize(input_path)
+    with open(input_path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        boundaries = [data_start]
+        for i in range(1, shards):
+            position = max(data_start + (size - data_start) * i // shards, boundaries[-1])
+            f.seek(position)
+            if position > data_start:
+                f.seek(position - 1)
+                f.readline()  # Дочитываем строку, на которую попала граница
+            boundaries.append(max(f.tell(), boundaries[-1]))
+        boundaries.append(size)
+    ranges = [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    return header, ranges
+
+
+def _read_range(input_path: str, start: int, end: int, encoding: str) -> Iterator[str]:
+    with open(input_path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode(encoding)
+
+
+def _process_shard(task: Tuple[str, str, int, int, List[str], List[str], int, str, str, bool, str]) -> int:
+    input_path, shard_path, start, end, header, metrics, chunk_size, delimiter, encoding, write_header, currency = task
+    reader = csv.reader(_read_range(input_path, start, end, encoding), delimiter=delimiter)
+    total = 0
+    with open(shard_path, "w", newline="", encoding=encoding) as target:
+        writer = csv.writer(target, delimiter=delimiter)
+        if write_header:
+            writer.writerow(header + metrics)
+        for chunk in iter_chunks(reader, chunk_size):
+            writer.writerows(process_rows(chunk, header, metrics, currency))
+            total += len(chunk)
+    return total
+
+
+def process_csv_parallel(input_path: str, output_path: str, workers: Optional[int] = None,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE, metrics: Optional[Iterable[str]] = None,
+                         delimiter: str = ",", encoding: str = "utf-8", shards: Optional[int] = None,
+                         merge: bool = True, currency: str = "float") -> int:
+    """
+    Рассчитывает метрики для большого CSV в нескольких процессах.
+
+    Файл делится на диапазоны байтов по границам строк, каждый диапазон обрабатывается отдельным
+    процессом в свой файл. Поля с переводом строки внутри кавычек в этом режиме не поддерживаются.
+
+    Args:
+        input_path (str): Путь к входному CSV.
+        output_path (str): Путь к выходному CSV; при merge=False — префикс файлов частей
+            (output_path.part0000, output_path.part0001, ...), у каждой части свой заголовок.
+        workers (Optional[int]): Количество процессов; по умолчанию — число ядер.
+        chunk_size (int): Количество строк в одном блоке внутри процесса.
+        metrics (Optional[Iterable[str]]): Ограничение набора метрик.
+        delimiter (str): Разделитель столбцов.
+        encoding (str): Кодировка файлов (ASCII-совместимая, например UTF-8).
+        shards (Optional[int]): Количество частей; по умолчанию равно количеству процессов.
+        merge (bool): Склеить части в output_path в порядке входного файла.
+        currency (str): 'float' или 'micros' — точный расчёт денежных метрик в микроединицах.
+
+    Returns:
+        int: Количество обработанных строк.
+    """
+    check_currency(currency)
+    workers = workers or os.cpu_count() or 1
+    header_line, ranges = shard_ranges(input_path, shards or workers)
+    if not header_line:
+        open(output_path, "w", encoding=encoding).close()
+        return 0
+    header = next(csv.reader([header_line.decode(encoding)], delimiter=delimiter))
+    selected = resolve_metrics(header, metrics)
+    shard_paths = [f"{output_path}.part{i:04d}" for i in range(len(ranges))]
+    tasks = [(input_path, shard_path, start, end, header, selected, chunk_size, delimiter, encoding, not merge,
+              currency)
+             for shard_path, (start, end) in zip(shard_paths, ranges)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        total = sum(executor.map(_process_shard, tasks))
+
+    if merge:
+        with open(output_path, "w", newline="", encoding=encoding) as target:
+            csv.writer(target, delimiter=delimiter).writerow(header + selected)
+            for shard_path in shard_paths:
+                with open(shard_path, "r", newline="", encoding=encoding) as part:
+                    shutil.copyfileobj(part, target)
+                os.remove(shard_path)
+    logging.info(f"Processed {total} CSV rows in {len(ranges)} shards with {workers} workers")
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Точка входа для пакетного расчёта: python -m src.core.csv_batch input.csv output.csv"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Batch calculation of marketing metrics for a CSV file")
+    parser.add_argument("input", help="input CSV with FORMULAS field names in the header")
+    parser.add_argument("output", help="output CSV with metric columns appended")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument("--metrics", nargs="*", choices=list(METRICS), help="metric ids to calculate")
+    parser.add_argument("--delimiter", default=",", help="column delimiter")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, 0 means all cores")
+    parser.add_argument("--split-output", action="store_true", help="keep one output file per shard")
+    parser.add_argument("--currency", choices=CURRENCY_MODES, default="float",
+                        help="'micros' computes money metrics exactly in integer micro-units")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    if args.workers == 1 and not args.split_output:
+        process_csv(args.input, args.output, args.chunk_size, args.metrics, args.delimiter, currency=args.currency)
+    else:
+        process_csv_parallel(args.input, args.output, args.workers or None, args.chunk_size, args.metrics,
+                             args.delimiter, merge=not args.split_output, currency=args.currency)
+
+
+if __name__ == "__main__":
+    main()
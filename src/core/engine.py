@@ -0,0 +1,150 @@
+# src/core/engine.py
+import logging
+from typing import Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
+from src.core.bands import classify_value
+from src.core.formulas import INPUT_FIELDS, METRICS, MONEY_INPUTS
+
+# Модуль намеренно не импортирует tkinter, ttkbootstrap и matplotlib:
+# его используют воркеры, серверы и пакетные задания без графического окружения.
+
+# Метрики, зависящие от каждого поля ввода: по ним update пересчитывает только затронутое
+DEPENDENTS: Dict[str, Tuple[str, ...]] = {
+    name: tuple(metric_id for metric_id, spec in METRICS.items() if name in spec.inputs) for name in INPUT_FIELDS
+}
+
+
+class MetricResult(NamedTuple):
+    """
+    Результат расчёта одной метрики: исходное число без форматирования.
+
+    Текст для интерфейса собирается только при отображении (src.core.calculations.format_result).
+    """
+    metric_id: str
+    value: float  # В режиме currency="micros" денежные метрики — int в микроединицах
+    band: str
+    unit: str  # 'percent', 'currency' или 'ratio'
+
+
+def _evaluate_metric(metric_id: str, values: Mapping[str, Optional[float]], vertical: Optional[str],
+                     money, rounding: str) -> Tuple[Optional[MetricResult], bool]:
+    """Рассчитывает одну метрику; возвращает (результат или None, заполнена ли только часть полей)."""
+    spec = METRICS[metric_id]
+    args = [values.get(name) for name in spec.inputs]
+    if any(arg is None for arg in args):
+        return None, any(arg is not None for arg in args)
+    if any(arg == 0 for arg in args):
+        logging.warning(f"Zero value in inputs of {metric_id}, metric skipped")
+        return None, False
+    if money is None:
+        value = spec.compute(*args)
+        return MetricResult(metric_id, value, classify_value(metric_id, value, vertical), spec.unit), False
+    args = [money.to_micros(arg, rounding) if name in MONEY_INPUTS else arg
+            for name, arg in zip(spec.inputs, args)]
+    value = spec.compute(*args)
+    if spec.unit == "currency":
+        value = money.round_micros(value, rounding)
+        band = classify_value(metric_id, money.from_micros(value), vertical)
+    else:
+        value = float(value)
+        band = classify_value(metric_id, value, vertical)
+    return MetricResult(metric_id, value, band, spec.unit), False
+
+
+def _money_module(currency: str, rounding: str):
+    if currency == "float":
+        return None
+    from src.core import money  # numpy нужен только для точного денежного режима
+    money.check_currency(currency, rounding)
+    return money
+
+
+def evaluate(values: Mapping[str, Optional[float]], vertical: Optional[str] = None,
+             currency: str = "float", rounding: str = "half_even") -> Tuple[List[MetricResult], List[str]]:
+    """
+    Рассчитывает все метрики, для которых заданы входные значения.
+
+    Args:
+        values (Mapping[str, Optional[float]]): Значения полей ввода; None или отсутствие ключа
+            означает незаполненное поле.
+        vertical (Optional[str]): Вертикаль с собственными порогами диапазонов (см. assets/bands.json).
+        currency (str): 'float' или 'micros'. В режиме 'micros' денежные поля задаются в единицах валюты
+            и переводятся в микроединицы; денежные метрики возвращаются целыми микроединицами.
+        rounding (str): Правило округления для режима 'micros' (см. src.core.money.round_micros).
+
+    Returns:
+        Tuple[List[MetricResult], List[str]]: Рассчитанные метрики и идентификаторы метрик,
+            у которых заполнена только часть полей.
+    """
+    money = _money_module(currency, rounding)
+    results = []
+    incomplete = []
+    for metric_id in METRICS:
+        result, partial = _evaluate_metric(metric_id, values, vertical, money, rounding)
+        if result is not None:
+            results.append(result)
+        elif partial:
+            incomplete.append(metric_id)
+    return results, incomplete
+
+
+class ResultDiff(NamedTuple):
+    """Изменения результатов после правки входов: новые и изменившиеся метрики, исчезнувшие метрики."""
+    changed: List[MetricResult]
+    removed: List[str]
+    incomplete_changed: bool  # Изменился ли список метрик с частично заполненными полями
+
+
+class IncrementalEvaluator:
+    """
+    Инкрементальный расчёт для живого обновления результатов.
+
+    Хранит текущие входы и результаты; update пересчитывает только метрики, зависящие от изменённых
+    входов, и возвращает разницу с предыдущим состоянием. Итог совпадает с evaluate по тем же входам.
+    """
+
+    def __init__(self, vertical: Optional[str] = None, currency: str = "float", rounding: str = "half_even"):
+        self.vertical = vertical
+        self.rounding = rounding
+        self._money = _money_module(currency, rounding)
+        self.values: Dict[str, Optional[float]] = {}
+        self.results: Dict[str, MetricResult] = {}
+        self.incomplete: Set[str] = set()
+
+    def update(self, changes: Mapping[str, Optional[float]]) -> ResultDiff:
+        """
+        Применяет новые значения изменённых входов.
+
+        Args:
+            changes (Mapping[str, Optional[float]]): Изменённые поля и их значения (None — поле очищено).
+
+        Returns:
+            ResultDiff: Метрики, значение или диапазон которых изменились, и метрики, которые больше
+                не рассчитываются. Порядок — как в METRICS.
+        """
+        affected = set()
+        for name, value in changes.items():
+            if self.values.get(name) != value:
+                self.values[name] = value
+                affected.update(DEPENDENTS.get(name, ()))
+        changed, removed = [], []
+        incomplete_changed = False
+        for metric_id in METRICS:
+            if metric_id not in affected:
+                continue
+            result, partial = _evaluate_metric(metric_id, self.values, self.vertical, self._money, self.rounding)
+            if partial != (metric_id in self.incomplete):
+                incomplete_changed = True
+                (self.incomplete.add if partial else self.incomplete.discard)(metric_id)
+            previous = self.results.get(metric_id)
+            if result is None:
+                if previous is not None:
+                    del self.results[metric_id]
+                    removed.append(metric_id)
+            elif result != previous:
+                self.results[metric_id] = result
+                changed.append(result)
+        return ResultDiff(changed, removed, incomplete_changed)
+
+    def result_list(self) -> List[MetricResult]:
+        """Текущие результаты в порядке METRICS."""
+        return [self.results[metric_id] for metric_id in METRICS if metric_id in self.results]
@@ -1,136 +1,165 @@
+# src/core/formulas.py
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+
+class MetricSpec(NamedTuple):
+    """
+    Описание метрики: входные поля, выражение, единица измерения и скомпилированная функция.
+
+    Пороги диапазонов качества хранятся отдельно, в assets/bands.json (см. src.core.bands).
+    """
+    metric_id: str
+    inputs: Tuple[str, ...]
+    expression: str
+    unit: str  # 'percent', 'currency' или 'ratio'
+    example: str  # Шаблон формулы для интерфейса; {0}, {1}, ... — подписи полей
+    compute: Callable[..., float]
+
+
+# Метрики объявляются один раз, без привязки к языку. Порядок определяет порядок в интерфейсе.
+_DEFINITIONS = (
+    ("ctr", ("ctr_impressions", "ctr_clicks"), "ctr_clicks / ctr_impressions * 100",
+     "percent", "CTR = ({1} / {0}) × 100%"),
+    ("cpc", ("cpc_total_cost", "cpc_clicks"), "cpc_total_cost / cpc_clicks",
+     "currency", "CPC = {0} / {1}"),
+    ("cpa", ("cpa_total_cost", "cpa_actions"), "cpa_total_cost / cpa_actions",
+     "currency", "CPA = {0} / {1}"),
+    ("roas", ("roas_revenue", "roas_total_cost"), "roas_revenue / roas_total_cost",
+     "ratio", "ROAS = {0} / {1}"),
+    ("cr", ("cr_clicks", "cr_conversions"), "cr_conversions / cr_clicks * 100",
+     "percent", "CR = ({1} / {0}) × 100%"),
+    ("ltv", ("ltv_avg_revenue", "ltv_purchases", "ltv_period"), "ltv_avg_revenue * ltv_purchases * ltv_period",
+     "currency", "LTV = {0} × {1} × {2}"),
+    ("cpl", ("cpl_total_cost", "cpl_leads"), "cpl_total_cost / cpl_leads",
+     "currency", "CPL = {0} / {1}"),
+    ("rpm", ("rpm_revenue", "rpm_impressions"), "rpm_revenue / rpm_impressions * 1000",
+     "currency", "RPM = ({0} / {1}) × 1000"),
+)
+
+
+def compile_expression(name: str, inputs: Tuple[str, ...], expression: str) -> Callable[..., float]:
+    """
+    Компилирует арифметическое выражение в функцию с позиционными аргументами.
+
+    Функция работает как с числами, так и с массивами NumPy.
+
+    Args:
+        name (str): Имя для трассировки ошибок.
+        inputs (Tuple[str, ...]): Имена аргументов в порядке передачи.
+        expression (str): Выражение над входными полями.
+
+    Returns:
+        Callable[..., float]: Скомпилированная функция.
+    """
+    code = compile(f"lambda {', '.join(inputs)}: {expression}", f"<metric {name}>", "eval")
+    return eval(code, {"__builtins__": {}})
+
+
+METRICS: Dict[str, MetricSpec] = {
+    metric_id: MetricSpec(metric_id, inputs, expression, unit, example, compile_expression(metric_id, inputs, expression))
+    for metric_id, inputs, expression, unit, example in _DEFINITIONS
+}
+
+INPUT_FIELDS: Tuple[str, ...] = tuple(name for spec in METRICS.values() for name in spec.inputs)
+
+# Денежные поля: в режиме currency="micros" передаются целыми микроединицами (см. src.core.money).
+# Метрики с единицей 'currency' содержат ровно один денежный множитель и тоже получаются в микроединицах.
+MONEY_INPUTS = frozenset(name for name in INPUT_FIELDS if name.endswith(("_total_cost", "_revenue")))
+
+# Поля-средние: их нельзя суммировать при агрегации по группам, поэтому LTV не пересчитывается по суммам.
+NON_ADDITIVE_INPUTS = frozenset({"ltv_avg_revenue", "ltv_purchases", "ltv_period"})
+
+# Локализация: названия и описания метрик, подписи и подсказки полей.
+TITLES = {
+    "ru": {
+        "ctr": ("CTR (Кликабельность)", "Кликабельность (CTR) — процент кликов от общего числа показов."),
+        "cpc": ("CPC (Стоимость за клик)", "Стоимость за клик (CPC) — затраты на один клик."),
+        "cpa": ("CPA (Стоимость за действие)", "Стоимость за действие (CPA) — затраты на одно целевое действие."),
+        "roas": ("ROAS (Возврат затрат)", "Возврат затрат на рекламу (ROAS) — отношение дохода к затратам."),
+        "cr": ("CR (Конверсия)", "Конверсия (CR) — процент конверсий от общего числа кликов."),
+        "ltv": ("LTV (Пожизненная ценность клиента)",
+                "LTV — это доход, который клиент приносит за всё время взаимодействия с компанией."),
+        "cpl": ("CPL (Стоимость за лид)", "Стоимость за лид (CPL) — затраты на одного лида."),
+        "rpm": ("RPM (Доход на тысячу показов)", "Доход на тысячу показов (RPM) — доход с 1000 показов."),
+    },
+    "en": {
+        "ctr": ("CTR (Click-Through Rate)", "Click-Through Rate (CTR) — the percentage of clicks from total impressions."),
+        "cpc": ("CPC (Cost Per Click)", "Cost Per Click (CPC) — the cost per one click."),
+        "cpa": ("CPA (Cost Per Action)", "Cost Per Action (CPA) — the cost of one target action."),
+        "roas": ("ROAS (Return on Ad Spend)", "Return on Ad Spend (ROAS) — the ratio of revenue to advertising cost."),
+        "cr": ("CR (Conversion Rate)", "Conversion Rate (CR) — the percentage of conversions from total clicks."),
+        "ltv": ("LTV (Lifetime Value)",
+                "LTV — the revenue a customer brings over their entire relationship with the company."),
+        "cpl": ("CPL (Cost Per Lead)", "Cost Per Lead (CPL) — the cost per one lead."),
+        "rpm": ("RPM (Revenue Per Mille)", "Revenue Per Mille (RPM) — revenue per 1000 impressions."),
+    },
+}
+
+FIELD_LABELS = {
+    "ru": {
+        "ctr_impressions": ("Количество показов:", "Общее количество показов рекламы"),
+        "ctr_clicks": ("Количество кликов:", "Общее количество кликов по рекламе"),
+        "cpc_total_cost": ("Затраты на рекламу ($):", "Общие затраты на рекламу в долларах"),
+        "cpc_clicks": ("Количество кликов:", "Общее количество кликов"),
+        "cpa_total_cost": ("Затраты на рекламу ($):", "Общие затраты на рекламу в долларах"),
+        "cpa_actions": ("Количество конверсий:", "Общее количество целевых действий"),
+        "roas_revenue": ("Доход от рекламы ($):", "Общий доход от рекламы в долларах"),
+        "roas_total_cost": ("Затраты на рекламу ($):", "Общие затраты на рекламу в долларах"),
+        "cr_clicks": ("Количество кликов:", "Общее количество кликов"),
+        "cr_conversions": ("Количество конверсий:", "Общее количество конверсий"),
+        "ltv_avg_revenue": ("Средний доход ($):", "Средний доход от клиента за одну покупку в долларах"),
+        "ltv_purchases": ("Количество покупок:", "Среднее количество покупок клиента"),
+        "ltv_period": ("Период (лет):", "Средний срок жизни клиента в годах"),
+        "cpl_total_cost": ("Затраты на рекламу ($):", "Общие затраты на рекламу в долларах"),
+        "cpl_leads": ("Количество лидов:", "Общее количество лидов"),
+        "rpm_revenue": ("Доход от рекламы ($):", "Общий доход от рекламы в долларах"),
+        "rpm_impressions": ("Количество показов:", "Общее количество показов рекламы"),
+    },
+    "en": {
+        "ctr_impressions": ("Number of Impressions:", "Total number of ad impressions"),
+        "ctr_clicks": ("Number of Clicks:", "Total number of clicks on the ad"),
+        "cpc_total_cost": ("Advertising Cost ($):", "Total advertising cost in dollars"),
+        "cpc_clicks": ("Number of Clicks:", "Total number of clicks"),
+        "cpa_total_cost": ("Advertising Cost ($):", "Total advertising cost in dollars"),
+        "cpa_actions": ("Number of Conversions:", "Total number of target actions"),
+        "roas_revenue": ("Advertising Revenue ($):", "Total revenue from advertising in dollars"),
+        "roas_total_cost": ("Advertising Cost ($):", "Total advertising cost in dollars"),
+        "cr_clicks": ("Number of Clicks:", "Total number of clicks"),
+        "cr_conversions": ("Number of Conversions:", "Total number of conversions"),
+        "ltv_avg_revenue": ("Average Revenue ($):", "Average revenue per purchase in dollars"),
+        "ltv_purchases": ("Number of Purchases:", "Average number of purchases per customer"),
+        "ltv_period": ("Period (years):", "Average customer lifespan in years"),
+        "cpl_total_cost": ("Advertising Cost ($):", "Total advertising cost in dollars"),
+        "cpl_leads": ("Number of Leads:", "Total number of leads"),
+        "rpm_revenue": ("Advertising Revenue ($):", "Total revenue from advertising in dollars"),
+        "rpm_impressions": ("Number of Impressions:", "Total number of ad impressions"),
+    },
+}
+
+
+def metric_title(metric_id: str, lang: str) -> str:
+    """Возвращает локализованное название метрики."""
+    return TITLES[lang][metric_id][0]
+
+
+def localized_formulas(lang: str) -> List[Tuple[str, str, str, List[Tuple[str, str, str]]]]:
+    """
+    Собирает описание формул для интерфейса на заданном языке.
+
+    Returns:
+        List[Tuple[str, str, str, List[Tuple[str, str, str]]]]: Список (идентификатор, название, описание,
+            поля), где каждое поле — (подпись, имя поля, подсказка).
+    """
+    formulas = []
+    for metric_id, spec in METRICS.items():
+        title, description = TITLES[lang][metric_id]
+        fields = [(FIELD_LABELS[lang][name][0], name, FIELD_LABELS[lang][name][1]) for name in spec.inputs]
+        formulas.append((metric_id, title, description, fields))
+    return formulas
+
+
+# Представление для интерфейса в прежнем формате: (название, описание, поля) по языкам.
 FORMULAS = {
-    "ru": [
-        (
-            "CTR (Кликабельность)",
-            "Кликабельность (CTR) — процент кликов от общего числа показов.",
-            [
-                ("Количество показов:", "ctr_impressions", "Общее количество показов рекламы"),
-                ("Количество кликов:", "ctr_clicks", "Общее количество кликов по рекламе"),
-            ]
-        ),
-        (
-            "CPC (Стоимость за клик)",
-            "Стоимость за клик (CPC) — затраты на один клик.",
-            [
-                ("Затраты на рекламу ($):", "cpc_total_cost", "Общие затраты на рекламу в долларах"),
-                ("Количество кликов:", "cpc_clicks", "Общее количество кликов"),
-            ]
-        ),
-        (
-            "CPA (Стоимость за действие)",
-            "Стоимость за действие (CPA) — затраты на одно целевое действие.",
-            [
-                ("Затраты на рекламу ($):", "cpa_total_cost", "Общие затраты на рекламу в долларах"),
-                ("Количество конверсий:", "cpa_actions", "Общее количество целевых действий"),
-            ]
-        ),
-        (
-            "ROAS (Возврат затрат)",
-            "Возврат затрат на рекламу (ROAS) — отношение дохода к затратам.",
-            [
-                ("Доход от рекламы ($):", "roas_revenue", "Общий доход от рекламы в долларах"),
-                ("Затраты на рекламу ($):", "roas_total_cost", "Общие затраты на рекламу в долларах"),
-            ]
-        ),
-        (
-            "CR (Конверсия)",
-            "Конверсия (CR) — процент конверсий от общего числа кликов.",
-            [
-                ("Количество кликов:", "cr_clicks", "Общее количество кликов"),
-                ("Количество конверсий:", "cr_conversions", "Общее количество конверсий"),
-            ]
-        ),
-        (
-            "LTV (Пожизненная ценность клиента)",
-            "LTV — это доход, который клиент приносит за всё время взаимодействия с компанией.",
-            [
-                ("Средний доход ($):", "ltv_avg_revenue", "Средний доход от клиента за одну покупку в долларах"),
-                ("Количество покупок:", "ltv_purchases", "Среднее количество покупок клиента"),
-                ("Период (лет):", "ltv_period", "Средний срок жизни клиента в годах"),
-            ]
-        ),
-        (
-            "CPL (Стоимость за лид)",
-            "Стоимость за лид (CPL) — затраты на одного лида.",
-            [
-                ("Затраты на рекламу ($):", "cpl_total_cost", "Общие затраты на рекламу в долларах"),
-                ("Количество лидов:", "cpl_leads", "Общее количество лидов"),
-            ]
-        ),
-        (
-            "RPM (Доход на тысячу показов)",
-            "Доход на тысячу показов (RPM) — доход с 1000 показов.",
-            [
-                ("Доход от рекламы ($):", "rpm_revenue", "Общий доход от рекламы в долларах"),
-                ("Количество показов:", "rpm_impressions", "Общее количество показов рекламы"),
-            ]
-        ),
-    ],
-    "en": [
-        (
-            "CTR (Click-Through Rate)",
-            "Click-Through Rate (CTR) — the percentage of clicks from total impressions.",
-            [
-                ("Number of Impressions:", "ctr_impressions", "Total number of ad impressions"),
-                ("Number of Clicks:", "ctr_clicks", "Total number of clicks on the ad"),
-            ]
-        ),
-        (
-            "CPC (Cost Per Click)",
-            "Cost Per Click (CPC) — the cost per one click.",
-            [
-                ("Advertising Cost ($):", "cpc_total_cost", "Total advertising cost in dollars"),
-                ("Number of Clicks:", "cpc_clicks", "Total number of clicks"),
-            ]
-        ),
-        (
-            "CPA (Cost Per Action)",
-            "Cost Per Action (CPA) — the cost of one target action.",
-            [
-                ("Advertising Cost ($):", "cpa_total_cost", "Total advertising cost in dollars"),
-                ("Number of Conversions:", "cpa_actions", "Total number of target actions"),
-            ]
-        ),
-        (
-            "ROAS (Return on Ad Spend)",
-            "Return on Ad Spend (ROAS) — the ratio of revenue to advertising cost.",
-            [
-                ("Advertising Revenue ($):", "roas_revenue", "Total revenue from advertising in dollars"),
-                ("Advertising Cost ($):", "roas_total_cost", "Total advertising cost in dollars"),
-            ]
-        ),
-        (
-            "CR (Conversion Rate)",
-            "Conversion Rate (CR) — the percentage of conversions from total clicks.",
-            [
-                ("Number of Clicks:", "cr_clicks", "Total number of clicks"),
-                ("Number of Conversions:", "cr_conversions", "Total number of conversions"),
-            ]
-        ),
-        (
-            "LTV (Lifetime Value)",
-            "LTV — the revenue a customer brings over their entire relationship with the company.",
-            [
-                ("Average Revenue ($):", "ltv_avg_revenue", "Average revenue per purchase in dollars"),
-                ("Number of Purchases:", "ltv_purchases", "Average number of purchases per customer"),
-                ("Period (years):", "ltv_period", "Average customer lifespan in years"),
-            ]
-        ),
-        (
-            "CPL (Cost Per Lead)",
-            "Cost Per Lead (CPL) — the cost per one lead.",
-            [
-                ("Advertising Cost ($):", "cpl_total_cost", "Total advertising cost in dollars"),
-                ("Number of Leads:", "cpl_leads", "Total number of leads"),
-            ]
-        ),
-        (
-            "RPM (Revenue Per Mille)",
-            "Revenue Per Mille (RPM) — revenue per 1000 impressions.",
-            [
-                ("Advertising Revenue ($):", "rpm_revenue", "Total revenue from advertising in dollars"),
-                ("Number of Impressions:", "rpm_impressions", "Total number of ad impressions"),
-            ]
-        ),
-    ]
-}
\ No newline at end of file
+    lang: [(title, description, fields) for _, title, description, fields in localized_formulas(lang)]
+    for lang in TITLES
+}
@@ -0,0 +1,216 @@
+# src/core/graph.py
+import ast
+import logging
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+import numpy as np
+from src.core.formulas import METRICS, compile_expression
+
+# Общие входные данные: одно значение затрат вместо cpc_total_cost, cpa_total_cost и cpl_total_cost.
+BASE_INPUTS: Tuple[str, ...] = (
+    "spend", "impressions", "clicks", "conversions", "revenue", "leads", "customers",
+    "avg_revenue", "purchases", "period", "margin",
+)
+
+# Производные величины планирования поверх метрик METRICS. Зависимости определяются по именам в выражениях.
+DERIVED_DEFINITIONS: Dict[str, str] = {
+    "cpm": "spend / impressions * 1000",
+    "profit": "revenue - spend",
+    "roi": "profit / spend * 100",
+    "cac": "spend / customers",
+    "ltv_cac": "ltv / cac",
+    "gross_profit": "revenue * margin",
+    "margin_roas": "gross_profit / spend",
+}
+
+# Соответствие полей интерфейса (FORMULAS) общим входным данным.
+LEGACY_INPUTS: Dict[str, str] = {
+    "ctr_impressions": "impressions", "ctr_clicks": "clicks",
+    "cpc_total_cost": "spend", "cpc_clicks": "clicks",
+    "cpa_total_cost": "spend", "cpa_actions": "conversions",
+    "roas_revenue": "revenue", "roas_total_cost": "spend",
+    "cr_clicks": "clicks", "cr_conversions": "conversions",
+    "ltv_avg_revenue": "avg_revenue", "ltv_purchases": "purchases", "ltv_period": "period",
+    "cpl_total_cost": "spend", "cpl_leads": "leads",
+    "rpm_revenue": "revenue", "rpm_impressions": "impressions",
+}
+
+
+class _RenameInputs(ast.NodeTransformer):
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        return ast.copy_location(ast.Name(id=LEGACY_INPUTS.get(node.id, node.id), ctx=node.ctx), node)
+
+
+def base_expression(metric_id: str) -> str:
+    """Выражение метрики из METRICS над общими входными данными вместо полей интерфейса."""
+    return ast.unparse(_RenameInputs().visit(ast.parse(METRICS[metric_id].expression, mode="eval")))
+
+
+# Узлы графа: метрики из METRICS (единственный источник формул) и производные величины.
+GRAPH_DEFINITIONS: Dict[str, str] = {metric_id: base_expression(metric_id) for metric_id in METRICS}
+GRAPH_DEFINITIONS.update(DERIVED_DEFINITIONS)
+
+
+def expression_names(expression: str) -> List[str]:
+    """Возвращает имена переменных выражения в порядке первого появления."""
+    names = []
+    for node in ast.walk(ast.parse(expression, mode="eval")):
+        if isinstance(node, ast.Name) and node.id not in names:
+            names.append(node.id)
+    return names
+
+
+class MetricGraph:
+    """
+    Граф зависимостей метрик над общими входными данными.
+
+    Узлы вычисляются в топологическом порядке, каждый промежуточный узел — ровно один раз
+    за вызов evaluate (для одного значения или для целого массива строк). Вычисляются только узлы,
+    нужные для запрошенных метрик. Узлы zero_undefined, как метрики в src.core.engine.evaluate,
+    не определены, если хотя бы один их аргумент равен нулю.
+    """
+
+    def __init__(self, inputs: Sequence[str] = BASE_INPUTS, definitions: Mapping[str, str] = GRAPH_DEFINITIONS,
+                 zero_undefined: Iterable[str] = tuple(METRICS)):
+        self.inputs = tuple(inputs)
+        self.definitions = dict(definitions)
+        self.zero_undefined = frozenset(name for name in zero_undefined if name in self.definitions)
+        self.dependencies: Dict[str, Tuple[str, ...]] = {}
+        for name, expression in self.definitions.items():
+            if name in self.inputs:
+                raise ValueError(f"Node {name} is both an input and a metric")
+            deps = tuple(expression_names(expression))
+            unknown = [dep for dep in deps if dep not in self.inputs and dep not in self.definitions]
+            if unknown:
+                raise ValueError(f"Node {name} depends on unknown names: {unknown}")
+            self.dependencies[name] = deps
+        self.order = self._topological_order()
+        self._compiled = {name: compile_expression(name, self.dependencies[name], expression)
+                          for name, expression in self.definitions.items()}
+        self.dependents: Dict[str, Tuple[str, ...]] = {
+            name: tuple(node for node in self.order if name in self.dependencies[node])
+            for name in self.inputs + tuple(self.order)
+        }
+
+    def __reduce__(self):
+        # Скомпилированные функции не сериализуются: для передачи в другой процесс граф собирается заново
+        return MetricGraph, (self.inputs, self.definitions, tuple(self.zero_undefined))
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 — в обработке, 2 — готово
+
+        def visit(name: str, path: Tuple[str, ...]):
+            if state.get(name) == 2 or name in self.inputs:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Cycle in metric graph: {' -> '.join(path + (name,))}")
+            state[name] = 1
+            for dep in self.dependencies[name]:
+                visit(dep, path + (name,))
+            state[name] = 2
+            order.append(name)
+
+        for name in self.definitions:
+            visit(name, ())
+        return order
+
+    @property
+    def metrics(self) -> Tuple[str, ...]:
+        """Все вычисляемые узлы в топологическом порядке."""
+        return tuple(self.order)
+
+    def plan(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """Возвращает узлы, нужные для targets, в порядке вычисления."""
+        if targets is None:
+            return list(self.order)
+        needed: Set[str] = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed or name in self.inputs:
+                continue
+            if name not in self.definitions:
+                raise KeyError(f"Unknown metric: {name}")
+            needed.add(name)
+            stack.extend(self.dependencies[name])
+        return [name for name in self.order if name in needed]
+
+    def required_inputs(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """Возвращает входные данные, от которых зависят targets."""
+        needed = {dep for name in self.plan(targets) for dep in self.dependencies[name] if dep in self.inputs}
+        return [name for name in self.inputs if name in needed]
+
+    def downstream(self, names: Iterable[str]) -> List[str]:
+        """Возвращает узлы, которые зависят (прямо или косвенно) от names, в порядке вычисления."""
+        affected: Set[str] = set()
+        stack = list(names)
+        while stack:
+            for node in self.dependents.get(stack.pop(), ()):
+                if node not in affected:
+                    affected.add(node)
+                    stack.append(node)
+        return [name for name in self.order if name in affected]
+
+    def evaluate(self, values: Mapping[str, object], targets: Optional[Iterable[str]] = None,
+                 keep_intermediate: bool = False) -> Dict[str, object]:
+        """
+        Вычисляет метрики по общим входным данным.
+
+        Args:
+            values (Mapping[str, object]): Входные данные: числа или массивы одной длины. None, NaN или
+                отсутствие ключа означают, что значение неизвестно.
+            targets (Optional[Iterable[str]]): Нужные метрики; по умолчанию все узлы графа.
+            keep_intermediate (bool): Вернуть также промежуточные узлы, не входящие в targets.
+
+        Returns:
+            Dict[str, object]: Для скалярных входов — float или None, для массивов — np.ma.MaskedArray,
+                где маска отмечает строки без результата (нет данных или деление на ноль).
+        """
+        targets = list(targets) if targets is not None else list(self.order)
+        plan = self.plan(targets)
+        scalar = all(np.ndim(value) == 0 for value in values.values() if value is not None)
+        env: Dict[str, np.ndarray] = {}
+        for name in self.required_inputs(targets):
+            value = values.get(name)
+            if value is None:
+                value = np.nan
+            elif isinstance(value, np.ma.MaskedArray):
+                value = value.astype(np.float64).filled(np.nan)
+            env[name] = np.asarray(value, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for name in plan:
+                args = [env[dep] for dep in self.dependencies[name]]
+                result = self._compiled[name](*args)
+                valid = np.isfinite(result)
+                if name in self.zero_undefined:
+                    for arg in args:  # Аргументы разной формы в сетке сценариев: маска по трансляции
+                        valid = valid & (arg != 0)
+                env[name] = np.where(valid, result, np.nan)
+        logging.debug(f"Graph evaluated {len(plan)} nodes for {targets}")
+
+        names = plan if keep_intermediate else [name for name in plan if name in targets]
+        if scalar:
+            return {name: None if np.isnan(env[name]) else float(env[name]) for name in names}
+        return {name: np.ma.masked_invalid(env[name]) for name in names}
+
+
+def from_legacy_inputs(values: Mapping[str, Optional[float]]) -> Dict[str, Optional[float]]:
+    """
+    Сводит поля интерфейса к общим входным данным графа.
+
+    Если одно и то же значение (например, затраты) введено в нескольких полях по-разному,
+    используется первое заполненное поле и пишется предупреждение в лог.
+    """
+    base: Dict[str, Optional[float]] = {}
+    for field, name in LEGACY_INPUTS.items():
+        value = values.get(field)
+        if value is None:
+            continue
+        if base.get(name) is None:
+            base[name] = value
+        elif base[name] != value:
+            logging.warning(f"Conflicting values for {name}: {base[name]} and {value} ({field})")
+    return base
+
+
+DEFAULT_GRAPH = MetricGraph()
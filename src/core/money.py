@@ -0,0 +1,93 @@
+# src/core/money.py
+from typing import List, Union
+import numpy as np
+
+# Денежные значения в режиме currency="micros" хранятся целыми микроединицами (1 $ = 1 000 000) в int64:
+# суммы по миллионам строк точны, а расчёты остаются векторными.
+MICROS_PER_UNIT = 1_000_000
+CURRENCY_MODES = ("float", "micros")
+ROUNDING_MODES = ("half_even", "half_up", "down", "floor", "ceiling")
+DEFAULT_ROUNDING = "half_even"
+
+ArrayOrScalar = Union[np.ndarray, float, int]
+
+
+def check_currency(currency: str, rounding: str = DEFAULT_ROUNDING):
+    """Проверяет режим денежных значений и правило округления."""
+    if currency not in CURRENCY_MODES:
+        raise ValueError(f"Currency mode must be one of {CURRENCY_MODES}, got {currency!r}")
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"Rounding must be one of {ROUNDING_MODES}, got {rounding!r}")
+
+
+def round_micros(values: ArrayOrScalar, rounding: str = DEFAULT_ROUNDING) -> ArrayOrScalar:
+    """
+    Округляет значения, выраженные в микроединицах, до целых по явному правилу.
+
+    Правила: 'half_even' — банковское округление, 'half_up' — половина от нуля, 'down' — к нулю,
+    'floor' — вниз, 'ceiling' — вверх. NaN превращается в 0, поэтому отсутствующие значения нужно
+    отмечать маской отдельно.
+
+    Args:
+        values (ArrayOrScalar): Число или массив в микроединицах.
+        rounding (str): Правило округления.
+
+    Returns:
+        ArrayOrScalar: int для скаляра, массив int64 для массива.
+    """
+    check_currency("micros", rounding)
+    data = np.asarray(values, dtype=np.float64)
+    if rounding == "half_even":
+        rounded = np.rint(data)
+    elif rounding == "half_up":
+        rounded = np.copysign(np.floor(np.abs(data) + 0.5), data)
+    elif rounding == "down":
+        rounded = np.trunc(data)
+    elif rounding == "floor":
+        rounded = np.floor(data)
+    else:
+        rounded = np.ceil(data)
+    result = np.where(np.isfinite(rounded), rounded, 0).astype(np.int64)
+    return int(result) if result.ndim == 0 else result
+
+
+def to_micros(values: ArrayOrScalar, rounding: str = DEFAULT_ROUNDING) -> ArrayOrScalar:
+    """
+    Переводит денежные значения в целые микроединицы.
+
+    Скаляры (int и float) всегда заданы в единицах валюты. Массивы с целочисленным dtype, как и в
+    src.core.batch, считаются уже переведёнными в микроединицы и возвращаются как int64.
+    Для десятичных значений с не более чем 6 знаками после точки перевод точен до 9·10⁹ единиц валюты.
+    """
+    if isinstance(values, np.ndarray) and values.ndim > 0 and values.dtype.kind in "iu":
+        return values.astype(np.int64)
+    return round_micros(np.asarray(values, dtype=np.float64) * MICROS_PER_UNIT, rounding)
+
+
+def from_micros(micros: ArrayOrScalar) -> ArrayOrScalar:
+    """Переводит микроединицы обратно в единицы валюты (float)."""
+    result = np.asarray(micros, dtype=np.float64) / MICROS_PER_UNIT
+    return float(result) if result.ndim == 0 else result
+
+
+def format_micros(micros: ArrayOrScalar, decimals: int = 6) -> Union[str, List[str]]:
+    """
+    Форматирует микроединицы в десятичную строку без потери точности.
+
+    Args:
+        micros (ArrayOrScalar): Целое число или массив микроединиц.
+        decimals (int): Количество знаков после точки (от 0 до 6); лишние знаки отбрасываются
+            только если они нулевые, иначе используется полная точность.
+
+    Returns:
+        Union[str, List[str]]: Строка или список строк, например '12.500000'.
+    """
+    data = np.asarray(micros, dtype=np.int64)
+    formatted = []
+    for value in data.reshape(-1).tolist():
+        units, fraction = divmod(abs(value), MICROS_PER_UNIT)
+        digits = f"{fraction:06d}"
+        keep = max(decimals, len(digits.rstrip("0")))
+        text = f"{units}.{digits[:keep]}" if keep else str(units)
+        formatted.append(f"-{text}" if value < 0 else text)
+    return formatted[0] if data.ndim == 0 else formatted
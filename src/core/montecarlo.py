@@ -0,0 +1,188 @@
+# src/core/montecarlo.py
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Union
+import numpy as np
+from src.core.graph import MetricGraph
+from src.core.scenarios import PLANNING_GRAPH
+
+DISTRIBUTIONS = ("fixed", "lognormal", "beta", "uniform", "normal")
+DEFAULT_TARGETS = ("ltv", "roas", "cpa")
+DEFAULT_PERCENTILES = (5.0, 50.0, 95.0)
+DEFAULT_DRAWS = 1_000_000
+CHUNK_DRAWS = 250_000  # Розыгрышей за один проход: ограничивает память промежуточных массивов
+
+
+class Distribution(NamedTuple):
+    """
+    Распределение входа симуляции.
+
+    Параметры по видам: 'fixed' — (значение, -); 'lognormal' — (среднее, σ логарифма);
+    'beta' — (среднее в единицах scale, концентрация α + β); 'uniform' — (от, до); 'normal' — (среднее, σ).
+    """
+    kind: str
+    first: float
+    second: float = 0.0
+    scale: float = 1.0
+
+    def sample(self, rng: np.random.Generator, size: int) -> Union[float, np.ndarray]:
+        """Возвращает size значений; для 'fixed' — одно число, которое транслируется при расчёте."""
+        if self.kind == "fixed":
+            return self.first
+        if self.kind == "lognormal":
+            # Среднее логнормального распределения равно exp(μ + σ²/2), поэтому μ сдвигается на −σ²/2
+            return rng.lognormal(math.log(self.first) - self.second ** 2 / 2, self.second, size)
+        if self.kind == "beta":
+            mean = self.first / self.scale
+            return rng.beta(mean * self.second, (1 - mean) * self.second, size) * self.scale
+        if self.kind == "uniform":
+            return rng.uniform(self.first, self.second, size)
+        return rng.normal(self.first, self.second, size)
+
+
+def fixed(value: float) -> Distribution:
+    return Distribution("fixed", value)
+
+
+def lognormal(mean: float, sigma: float) -> Distribution:
+    """Логнормальное распределение с заданным средним (точечной оценкой) и разбросом σ в логарифмах."""
+    return Distribution("lognormal", mean, sigma)
+
+
+def beta(mean: float, concentration: float, scale: float = 1.0) -> Distribution:
+    """Бета-распределение для долей; scale=100 — значения в процентах (CR, CTR)."""
+    return Distribution("beta", mean, concentration, scale)
+
+
+def beta_from_counts(successes: float, trials: float, scale: float = 1.0) -> Distribution:
+    """Апостериорное Beta(успехи + 1, неудачи + 1) по наблюдённым счётчикам."""
+    return Distribution("beta", (successes + 1) / (trials + 2) * scale, trials + 2, scale)
+
+
+def parse_distribution(spec: Union[float, int, Mapping, Distribution]) -> Distribution:
+    """
+    Создаёт распределение из конфигурации: число — фиксированное значение, словарь — описание вида
+    {"kind": "lognormal", "mean": 50, "sigma": 0.3}, {"kind": "beta", "mean": 2.5, "concentration": 400,
+    "scale": 100}, {"kind": "uniform", "low": 1, "high": 2} или {"kind": "normal", "mean": 1, "std": 0.1}.
+    """
+    if isinstance(spec, Distribution):
+        distribution = spec
+    elif isinstance(spec, (int, float)):
+        distribution = fixed(float(spec))
+    else:
+        kind = spec.get("kind")
+        if kind == "fixed":
+            distribution = fixed(spec["value"])
+        elif kind == "lognormal":
+            distribution = lognormal(spec["mean"], spec["sigma"])
+        elif kind == "beta" and "successes" in spec:
+            distribution = beta_from_counts(spec["successes"], spec["trials"], spec.get("scale", 1.0))
+        elif kind == "beta":
+            distribution = beta(spec["mean"], spec["concentration"], spec.get("scale", 1.0))
+        elif kind == "uniform":
+            distribution = Distribution("uniform", spec["low"], spec["high"])
+        elif kind == "normal":
+            distribution = Distribution("normal", spec["mean"], spec["std"])
+        else:
+            raise ValueError(f"Distribution kind must be one of {DISTRIBUTIONS}, got {kind!r}")
+    if distribution.kind == "lognormal" and distribution.first <= 0:
+        raise ValueError(f"Lognormal mean must be positive, got {distribution.first}")
+    if distribution.kind == "beta" and not (0 < distribution.first < distribution.scale and distribution.second > 0):
+        raise ValueError(f"Beta mean must be inside (0, {distribution.scale}) with positive concentration")
+    return distribution
+
+
+class Forecast(NamedTuple):
+    """Итог симуляции метрики: среднее, стандартное отклонение, процентили и доля определённых розыгрышей."""
+    mean: float
+    std: float
+    percentiles: Dict[float, float]
+    valid: float
+
+
+def simulate(inputs: Mapping[str, object], targets: Iterable[str] = DEFAULT_TARGETS, draws: int = DEFAULT_DRAWS,
+             seed: Union[None, int, np.random.SeedSequence] = None,
+             percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+             graph: MetricGraph = PLANNING_GRAPH) -> Dict[str, Forecast]:
+    """
+    Монте-Карло прогноз метрик одной кампании.
+
+    Каждый вход разыгрывается из своего распределения, метрики считаются по графу векторно
+    блоками по CHUNK_DRAWS розыгрышей; хранятся только значения целевых метрик.
+
+    Args:
+        inputs (Mapping[str, object]): Распределения входов графа (Distribution, число или словарь
+            конфигурации, см. parse_distribution). По умолчанию входы планирования: spend, cpc, cr (%),
+            aov, purchases, period, ...
+        targets (Iterable[str]): Метрики прогноза; по умолчанию LTV, ROAS и CPA.
+        draws (int): Количество розыгрышей.
+        seed (Union[None, int, np.random.SeedSequence]): Зерно генератора для воспроизводимых отчётов.
+        percentiles (Sequence[float]): Процентили для полос прогноза.
+        graph (MetricGraph): Граф метрик.
+
+    Returns:
+        Dict[str, Forecast]: Прогноз по каждой метрике; розыгрыши без значения (деление на ноль)
+            не учитываются в статистиках.
+    """
+    targets = list(targets)
+    distributions = {name: parse_distribution(spec) for name, spec in inputs.items()}
+    unknown = [name for name in distributions if name not in graph.inputs]
+    if unknown:
+        raise KeyError(f"Unknown simulation inputs: {unknown}")
+    rng = np.random.default_rng(seed)
+    samples = {metric_id: np.empty(draws) for metric_id in targets}
+    for start in range(0, draws, CHUNK_DRAWS):
+        size = min(CHUNK_DRAWS, draws - start)
+        values = {name: distribution.sample(rng, size) for name, distribution in distributions.items()}
+        results = graph.evaluate(values, targets)
+        for metric_id, result in results.items():
+            samples[metric_id][start:start + size] = np.broadcast_to(np.ma.filled(result, np.nan), (size,))
+
+    forecasts = {}
+    for metric_id, values in samples.items():
+        finite = values[np.isfinite(values)]
+        if len(finite) == 0:
+            forecasts[metric_id] = Forecast(math.nan, math.nan, {p: math.nan for p in percentiles}, 0.0)
+            continue
+        bands = np.percentile(finite, list(percentiles))
+        forecasts[metric_id] = Forecast(float(finite.mean()), float(finite.std()),
+                                        dict(zip(percentiles, bands.tolist())), len(finite) / draws)
+    logging.debug(f"Simulated {draws} draws for {targets}")
+    return forecasts
+
+
+def _simulate_task(task) -> Dict[str, Forecast]:
+    inputs, targets, draws, seed, percentiles, graph = task
+    return simulate(inputs, targets, draws, seed, percentiles, graph)
+
+
+def simulate_campaigns(campaigns: Sequence[Mapping[str, object]], targets: Iterable[str] = DEFAULT_TARGETS,
+                       draws: int = DEFAULT_DRAWS, seed: Optional[int] = None,
+                       percentiles: Sequence[float] = DEFAULT_PERCENTILES, workers: int = 1,
+                       graph: MetricGraph = PLANNING_GRAPH) -> List[Dict[str, Forecast]]:
+    """
+    Прогноз для множества кампаний, при workers > 1 — в нескольких процессах.
+
+    Зёрна кампаний порождаются из общего seed через SeedSequence.spawn, поэтому результат
+    каждой кампании не зависит от числа процессов и порядка выполнения.
+
+    Args:
+        campaigns (Sequence[Mapping[str, object]]): Распределения входов каждой кампании.
+        targets (Iterable[str]): Метрики прогноза.
+        draws (int): Розыгрышей на кампанию.
+        seed (Optional[int]): Общее зерно.
+        percentiles (Sequence[float]): Процентили.
+        workers (int): Количество процессов; 0 — по числу ядер.
+        graph (MetricGraph): Граф метрик.
+
+    Returns:
+        List[Dict[str, Forecast]]: Прогнозы в порядке кампаний.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(campaigns))
+    tasks = [(dict(inputs), list(targets), draws, child, tuple(percentiles), graph)
+             for inputs, child in zip(campaigns, seeds)]
+    if workers == 1 or len(tasks) <= 1:
+        return [_simulate_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers or None) as executor:
+        return list(executor.map(_simulate_task, tasks))
@@ -0,0 +1,262 @@
+# src/core/rollup.py
+import csv
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from src.core.batch import calculate_batch
+from src.core.csv_batch import DEFAULT_CHUNK_SIZE, OUTPUT_DECIMALS, iter_chunks, parse_column, resolve_metrics
+from src.core.formulas import METRICS, MONEY_INPUTS, NON_ADDITIVE_INPUTS
+from src.core.money import DEFAULT_ROUNDING, check_currency, format_micros, to_micros
+
+ROWS_COLUMN = "rows"
+
+KeyArrays = List[np.ndarray]
+SumArrays = Dict[str, np.ndarray]
+
+
+def additive_metrics(metrics: Optional[Iterable[str]] = None) -> List[str]:
+    """Возвращает метрики, которые можно пересчитать по суммам входных полей (без LTV)."""
+    candidates = metrics if metrics is not None else METRICS
+    return [metric_id for metric_id in candidates if not set(METRICS[metric_id].inputs) & NON_ADDITIVE_INPUTS]
+
+
+def week_start(dates: np.ndarray) -> np.ndarray:
+    """Переводит даты (ISO-строки или datetime64) в дату понедельника соответствующей недели."""
+    days = np.asarray(dates).astype("datetime64[D]")
+    # 1970-01-01 — четверг, поэтому понедельник получается сдвигом (день + 3) % 7
+    offset = (days.astype(np.int64) + 3) % 7
+    return (days - offset.astype("timedelta64[D]")).astype(str)
+
+
+def _aggregate(keys: KeyArrays, sums: SumArrays) -> Tuple[KeyArrays, SumArrays]:
+    """Группирует строки по ключам и суммирует значения внутри групп."""
+    size = len(keys[0]) if keys else 0
+    if size == 0:
+        return keys, sums
+    codes = np.zeros(size, dtype=np.int64)
+    for key in keys:
+        uniques, inverse = np.unique(key, return_inverse=True)
+        codes = codes * len(uniques) + inverse.reshape(-1)
+        # Сжимаем коды после каждого ключа, чтобы произведение мощностей не переполнило int64
+        _, codes = np.unique(codes, return_inverse=True)
+        codes = codes.reshape(-1)
+    _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    groups = len(first)
+    group_keys = [key[first] for key in keys]
+    group_sums = {}
+    starts = order = None
+    for name, values in sums.items():
+        if values.dtype.kind != "i":
+            group_sums[name] = np.bincount(inverse, weights=values, minlength=groups)
+            continue
+        # Целые микроединицы суммируем точно в int64: bincount накапливает во float64
+        if order is None:
+            order = np.argsort(inverse, kind="stable")
+            starts = np.searchsorted(inverse[order], np.arange(groups))
+        group_sums[name] = np.add.reduceat(values[order], starts)
+    return group_keys, group_sums
+
+
+class GroupAggregator:
+    """
+    Потоковая агрегация входных полей метрик по ключам группировки.
+
+    Для каждой группы суммируются числители и знаменатели, после чего метрики считаются один раз
+    по суммам: CTR группы — это sum(clicks) / sum(impressions), а не среднее долей по строкам.
+    Если групп становится больше max_groups, частичные суммы сбрасываются на диск по хеш-разделам
+    и затем досчитываются раздел за разделом, так что память ограничена независимо от числа групп.
+    В режиме currency="micros" денежные поля суммируются точно, целыми микроединицами в int64.
+    """
+
+    def __init__(self, keys: Sequence[str], metrics: Optional[Iterable[str]] = None,
+                 max_groups: int = 1_000_000, partitions: int = 16, spill_dir: Optional[str] = None,
+                 currency: str = "float", rounding: str = DEFAULT_ROUNDING):
+        check_currency(currency, rounding)
+        self.keys = list(keys)
+        self.metrics = additive_metrics(metrics)
+        self.inputs = [name for metric_id in self.metrics for name in METRICS[metric_id].inputs]
+        self.max_groups = max_groups
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.currency = currency
+        self.rounding = rounding
+        self._spill_path: Optional[str] = None
+        self._state_keys: KeyArrays = []
+        self._state_sums: SumArrays = {}
+
+    def add(self, columns: Mapping[str, object]):
+        """
+        Добавляет блок строк.
+
+        Args:
+            columns (Mapping[str, object]): Столбцы ключей и входных полей FORMULAS. Строка учитывается в метрике,
+                только если все входные поля этой метрики заполнены.
+        """
+        keys = [np.asarray(columns[name]) for name in self.keys]
+        size = len(keys[0])
+        sums = {ROWS_COLUMN: np.ones(size)}
+        for metric_id in self.metrics:
+            inputs = METRICS[metric_id].inputs
+            values = [np.asarray(columns[name], dtype=np.float64) if name in columns else np.full(size, np.nan)
+                      for name in inputs]
+            valid = np.logical_and.reduce([np.isfinite(value) for value in values])
+            for name, value in zip(inputs, values):
+                sums[name] = np.where(valid, value, 0.0)
+                if self.currency == "micros" and name in MONEY_INPUTS:
+                    # Отсутствующий столбец уже заполнен NaN и обнулён маской: переводится как дробный
+                    raw = np.asarray(columns[name]) if name in columns else None
+                    if raw is not None and raw.dtype.kind in "iu":
+                        sums[name] = np.where(valid, raw, 0)
+                    else:
+                        sums[name] = to_micros(sums[name], self.rounding)
+        if self._state_keys:
+            keys = [np.concatenate([old, new]) for old, new in zip(self._state_keys, keys)]
+            sums = {name: np.concatenate([self._state_sums[name], values]) for name, values in sums.items()}
+        self._state_keys, self._state_sums = _aggregate(keys, sums)
+        if len(self._state_keys[0]) > self.max_groups:
+            self._spill()
+
+    def _spill(self):
+        if self._spill_path is None:
+            self._spill_path = tempfile.mkdtemp(prefix="rollup_", dir=self.spill_dir)
+        partition = np.fromiter((hash(key) % self.partitions for key in zip(*self._state_keys)),
+                                dtype=np.int64, count=len(self._state_keys[0]))
+        for part in range(self.partitions):
+            selected = partition == part
+            if not selected.any():
+                continue
+            with open(os.path.join(self._spill_path, f"part{part:04d}.pkl"), "ab") as f:
+                pickle.dump(([key[selected] for key in self._state_keys],
+                             {name: values[selected] for name, values in self._state_sums.items()}), f)
+        logging.debug(f"Spilled {len(partition)} groups to {self._spill_path}")
+        self._state_keys, self._state_sums = [], {}
+
+    def _finish_block(self, keys: KeyArrays, sums: SumArrays) -> Dict[str, np.ndarray]:
+        block: Dict[str, np.ndarray] = dict(zip(self.keys, keys))
+        block.update(sums)
+        block.update(calculate_batch({name: sums[name] for name in self.inputs}, metrics=self.metrics,
+                                     currency=self.currency, rounding=self.rounding))
+        return block
+
+    def results(self) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Возвращает итоговые группы блоками: ключи, число строк, суммы входных полей и метрики.
+
+        Без сброса на диск возвращается один блок; иначе — по блоку на хеш-раздел.
+        """
+        if self._spill_path is None:
+            if self._state_keys:
+                yield self._finish_block(self._state_keys, self._state_sums)
+            return
+        if self._state_keys:
+            self._spill()
+        try:
+            for name in sorted(os.listdir(self._spill_path)):
+                parts = []
+                with open(os.path.join(self._spill_path, name), "rb") as f:
+                    while True:
+                        try:
+                            parts.append(pickle.load(f))
+                        except EOFError:
+                            break
+                keys = [np.concatenate([part[0][i] for part in parts]) for i in range(len(self.keys))]
+                sums = {column: np.concatenate([part[1][column] for part in parts]) for column in parts[0][1]}
+                yield self._finish_block(*_aggregate(keys, sums))
+        finally:
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_path = None
+
+
+def rollup(columns: Mapping[str, object], keys: Sequence[str], metrics: Optional[Iterable[str]] = None,
+           currency: str = "float") -> Dict[str, np.ndarray]:
+    """
+    Группирует данные в памяти и рассчитывает метрики по суммам внутри групп.
+
+    Args:
+        columns (Mapping[str, object]): Столбцы ключей и входных полей FORMULAS.
+        keys (Sequence[str]): Имена столбцов группировки.
+        metrics (Optional[Iterable[str]]): Идентификаторы метрик; LTV исключается, так как его входы — средние.
+        currency (str): 'micros' — денежные суммы и метрики в целых микроединицах (int64).
+
+    Returns:
+        Dict[str, np.ndarray]: Столбцы ключей групп, 'rows', суммы входных полей и метрики (MaskedArray).
+    """
+    aggregator = GroupAggregator(keys, metrics, max_groups=np.iinfo(np.int64).max, currency=currency)
+    aggregator.add(columns)
+    return next(aggregator.results(), {})
+
+
+def _key_column(rows: List[List[str]], index: int, transform: Optional[str]) -> np.ndarray:
+    column = np.array([row[index] for row in rows])
+    if transform == "week":
+        return week_start(column)
+    if transform == "day":
+        return column.astype("datetime64[D]").astype(str)
+    return column
+
+
+def _csv_values(values: np.ndarray) -> List[object]:
+    """Значения столбца для CSV: микроединицы — точной десятичной строкой, остальное — с округлением."""
+    if values.dtype.kind == "i":
+        return format_micros(values, OUTPUT_DECIMALS)
+    return np.round(values, OUTPUT_DECIMALS).tolist()
+
+
+def rollup_csv(input_path: str, output_path: str, keys: Sequence[str], metrics: Optional[Iterable[str]] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, max_groups: int = 1_000_000, delimiter: str = ",",
+               encoding: str = "utf-8", currency: str = "float") -> int:
+    """
+    Агрегирует CSV любого размера по ключам и записывает метрики групп в новый CSV.
+
+    Args:
+        input_path (str): Путь к входному CSV.
+        output_path (str): Путь к выходному CSV.
+        keys (Sequence[str]): Столбцы группировки; суффикс ':week' или ':day' группирует дату по неделям или дням
+            (например, 'date:week').
+        metrics (Optional[Iterable[str]]): Ограничение набора метрик; метрики, входных полей которых нет
+            в заголовке CSV, пропускаются.
+        chunk_size (int): Количество строк в одном блоке.
+        max_groups (int): Количество групп в памяти, после которого частичные суммы сбрасываются на диск.
+        delimiter (str): Разделитель столбцов.
+        encoding (str): Кодировка файлов.
+        currency (str): 'micros' — денежные суммы и метрики считаются и записываются точно.
+
+    Returns:
+        int: Количество групп.
+    """
+    key_specs = [(key.split(":", 1) + [None])[:2] for key in keys]
+    with open(input_path, "r", newline="", encoding=encoding) as source:
+        reader = csv.reader(source, delimiter=delimiter)
+        header = next(reader, [])
+        index = {name: i for i, name in enumerate(header)}
+        aggregator = GroupAggregator(list(keys), resolve_metrics(header, metrics), max_groups=max_groups,
+                                     currency=currency)
+        inputs = aggregator.inputs
+        for chunk in iter_chunks(reader, chunk_size):
+            transposed = list(zip(*chunk))
+            columns: Dict[str, object] = {name: parse_column(transposed[index[name]]) for name in inputs}
+            for key, (name, transform) in zip(keys, key_specs):
+                columns[key] = _key_column(chunk, index[name], transform)
+            aggregator.add(columns)
+
+    groups = 0
+    with open(output_path, "w", newline="", encoding=encoding) as target:
+        writer = csv.writer(target, delimiter=delimiter)
+        writer.writerow(list(keys) + [ROWS_COLUMN] + aggregator.inputs + aggregator.metrics)
+        for block in aggregator.results():
+            columns = [block[key].tolist() for key in keys]
+            columns.append(block[ROWS_COLUMN].astype(np.int64).tolist())
+            columns.extend(_csv_values(block[name]) for name in aggregator.inputs)
+            columns.extend([None if masked else value for value, masked in
+                            zip(_csv_values(np.ma.getdata(block[metric_id])),
+                                np.ma.getmaskarray(block[metric_id]).tolist())]
+                           for metric_id in aggregator.metrics)
+            writer.writerows(zip(*columns))
+            groups += len(columns[0])
+    logging.info(f"Rolled up {input_path} into {groups} groups")
+    return groups
@@ -0,0 +1,207 @@
+# src/core/scenarios.py
+import logging
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from src.core.graph import GRAPH_DEFINITIONS, MetricGraph
+
+# Допущения планирования: бюджет, стоимость клика, конверсия (%), средний чек (AOV),
+# CTR (%), параметры LTV и число лидов. Из них выводятся базовые величины графа метрик.
+PLANNING_INPUTS: Tuple[str, ...] = ("spend", "cpc", "cr", "aov", "ctr", "purchases", "period", "margin", "leads")
+PLANNING_DEFINITIONS: Dict[str, str] = {
+    "clicks": "spend / cpc",
+    "conversions": "clicks * cr / 100",
+    "revenue": "conversions * aov",
+    "impressions": "clicks / ctr * 100",
+    "avg_revenue": "aov",
+    "customers": "conversions",
+}
+DEFAULT_TARGETS = ("cpa", "roas", "ltv")
+DEFAULT_MAX_CELLS = 2_000_000  # Ячеек сетки в одном блоке: ~16 МБ на метрику во float64
+
+
+def planning_graph() -> MetricGraph:
+    """Граф метрик над допущениями планирования: выводимые величины плюс GRAPH_DEFINITIONS без исходных."""
+    definitions = dict(PLANNING_DEFINITIONS)
+    definitions.update({name: expression for name, expression in GRAPH_DEFINITIONS.items()
+                        if name not in PLANNING_INPUTS})
+    return MetricGraph(PLANNING_INPUTS, definitions)
+
+
+PLANNING_GRAPH = planning_graph()
+
+
+def axis_range(start: float, stop: float, steps: int) -> np.ndarray:
+    """Равномерная ось значений от start до stop включительно."""
+    if steps < 1:
+        raise ValueError(f"Axis needs at least one step, got {steps}")
+    return np.linspace(start, stop, steps)
+
+
+class ScenarioResult(NamedTuple):
+    """N-мерный результат сценариев: оси в порядке измерений и массивы метрик формы сетки."""
+    axes: Dict[str, np.ndarray]
+    values: Dict[str, np.ma.MaskedArray]
+
+    def select(self, **indices: int) -> "ScenarioResult":
+        """Срез по индексам осей, например select(cpc=0); выбранные оси исчезают из результата."""
+        index = tuple(indices.pop(name, slice(None)) for name in self.axes)
+        if indices:
+            raise KeyError(f"Unknown axes: {list(indices)}")
+        axes = {name: values for name, values, i in zip(self.axes, self.axes.values(), index) if isinstance(i, slice)}
+        return ScenarioResult(axes, {metric_id: values[index] for metric_id, values in self.values.items()})
+
+
+class ScenarioGrid:
+    """
+    Декартова сетка допущений, вычисляемая трансляцией (broadcasting) NumPy.
+
+    Каждая ось — одномерный массив значений одного входа; остальные входы фиксированы.
+    Сетка не материализуется целиком: blocks() выдаёт её частями не больше max_cells ячеек,
+    поэтому размер сетки ограничен только временем, а не памятью.
+    """
+
+    def __init__(self, axes: Mapping[str, Sequence[float]], fixed: Optional[Mapping[str, float]] = None,
+                 targets: Iterable[str] = DEFAULT_TARGETS, graph: MetricGraph = PLANNING_GRAPH):
+        self.graph = graph
+        self.axes = {name: np.atleast_1d(np.asarray(values, dtype=np.float64)) for name, values in axes.items()}
+        self.fixed = dict(fixed or {})
+        self.targets = list(targets)
+        if not self.axes:
+            raise ValueError("Scenario grid needs at least one axis")
+        for name in list(self.axes) + list(self.fixed):
+            if name not in graph.inputs:
+                raise KeyError(f"Unknown scenario input: {name}; expected one of {graph.inputs}")
+        overlap = set(self.axes) & set(self.fixed)
+        if overlap:
+            raise ValueError(f"Inputs are both axes and fixed: {sorted(overlap)}")
+        graph.plan(self.targets)  # Проверка идентификаторов метрик
+        missing = [name for name in graph.required_inputs(self.targets) if name not in self.axes and name not in self.fixed]
+        if missing:
+            logging.warning(f"Scenario inputs not set, dependent metrics will be masked: {missing}")
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(len(values) for values in self.axes.values())
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    def _evaluate(self, axis_values: List[np.ndarray]) -> Dict[str, np.ma.MaskedArray]:
+        """Вычисляет блок: axis_values — значения осей блока, каждая вытянута вдоль своего измерения."""
+        ndim = len(axis_values)
+        values: Dict[str, object] = dict(self.fixed)
+        for i, (name, axis) in enumerate(zip(self.axes, axis_values)):
+            values[name] = axis.reshape([-1 if j == i else 1 for j in range(ndim)])
+        shape = tuple(len(axis) for axis in axis_values)
+        results = self.graph.evaluate(values, self.targets)
+        block = {}
+        for metric_id, result in results.items():
+            data = np.broadcast_to(np.ma.getdata(result), shape)
+            mask = np.broadcast_to(np.ma.getmaskarray(result), shape)
+            block[metric_id] = np.ma.MaskedArray(data, mask=mask)
+        return block
+
+    def blocks(self, max_cells: int = DEFAULT_MAX_CELLS) -> Iterator[Tuple[Tuple[object, ...], Dict[str, np.ma.MaskedArray]]]:
+        """
+        Лениво перебирает сетку блоками не больше max_cells ячеек.
+
+        Ведущие оси перебираются по одному значению, одна ось режется на отрезки, остальные берутся целиком.
+
+        Yields:
+            Tuple[Tuple[object, ...], Dict[str, np.ma.MaskedArray]]: Индекс блока в полной сетке
+                (целые числа и срезы по осям) и значения метрик блока.
+        """
+        shape = self.shape
+        axes = list(self.axes.values())
+        split = 0
+        while split < len(shape) - 1 and int(np.prod(shape[split + 1:])) > max_cells:
+            split += 1
+        step = max(1, max_cells // int(np.prod(shape[split + 1:])))
+        for outer in np.ndindex(*shape[:split]):
+            for start in range(0, shape[split], step):
+                window = slice(start, min(start + step, shape[split]))
+                index = tuple(outer) + (window,) + tuple(slice(None) for _ in shape[split + 1:])
+                block_axes = [axis[i:i + 1] for axis, i in zip(axes, outer)] + [axes[split][window]] + axes[split + 1:]
+                block = self._evaluate(block_axes)
+                # Ведущие оси блока имеют длину 1 — убираем их, чтобы форма совпала с индексом
+                yield index, {metric_id: values.reshape(values.shape[split:]) for metric_id, values in block.items()}
+
+    def evaluate(self, max_cells: int = DEFAULT_MAX_CELLS) -> ScenarioResult:
+        """
+        Вычисляет всю сетку в памяти.
+
+        Если сетка больше max_cells, она считается блоками и собирается в заранее выделенные массивы.
+        """
+        if self.size <= max_cells:
+            return ScenarioResult(dict(self.axes), self._evaluate(list(self.axes.values())))
+        values = {metric_id: np.ma.MaskedArray(np.empty(self.shape), mask=np.zeros(self.shape, dtype=bool))
+                  for metric_id in self.targets}
+        for index, block in self.blocks(max_cells):
+            for metric_id, result in block.items():
+                values[metric_id][index] = result
+        logging.debug(f"Scenario grid {self.shape} evaluated in blocks of {max_cells} cells")
+        return ScenarioResult(dict(self.axes), values)
+
+    def best(self, metric_id: str, maximize: bool = True,
+             max_cells: int = DEFAULT_MAX_CELLS) -> Optional[Tuple[float, Dict[str, float]]]:
+        """
+        Находит лучший сценарий по метрике, не материализуя сетку.
+
+        Returns:
+            Optional[Tuple[float, Dict[str, float]]]: Значение метрики и значения осей; None, если
+                метрика не определена ни в одной ячейке.
+        """
+        best_value, best_point = None, None
+        for index, block in self.blocks(max_cells):
+            result = block[metric_id]
+            if result.count() == 0:
+                continue
+            flat = result.argmax() if maximize else result.argmin()
+            value = float(result.flat[flat])
+            if best_value is None or (value > best_value if maximize else value < best_value):
+                position = np.unravel_index(flat, result.shape)
+                point = {}
+                offsets = iter(position)
+                for (name, axis), i in zip(self.axes.items(), index):
+                    point[name] = float(axis[i if isinstance(i, int) else (i.start or 0) + next(offsets)])
+                best_value, best_point = value, point
+        return None if best_value is None else (best_value, best_point)
+
+    def heatmap(self, x_axis: str, y_axis: str, metric_id: str,
+                at: Optional[Mapping[str, int]] = None) -> Tuple[np.ndarray, np.ndarray, np.ma.MaskedArray]:
+        """
+        Двумерный срез для тепловой карты: значения metric_id по осям y × x.
+
+        Остальные оси фиксируются в индексах at (по умолчанию — первое значение), поэтому
+        срез считается отдельно и не требует вычисления всей сетки.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ma.MaskedArray]: Значения оси x, оси y и матрица формы (y, x).
+        """
+        if x_axis == y_axis:
+            raise ValueError("Heatmap axes must differ")
+        at = dict(at or {})
+        fixed = dict(self.fixed)
+        for name, values in self.axes.items():
+            if name not in (x_axis, y_axis):
+                fixed[name] = float(values[at.get(name, 0)])
+        grid = ScenarioGrid({y_axis: self.axes[y_axis], x_axis: self.axes[x_axis]}, fixed, [metric_id], self.graph)
+        return self.axes[x_axis], self.axes[y_axis], grid.evaluate().values[metric_id]
+
+
+def scenario_grid(axes: Mapping[str, Sequence[float]], fixed: Optional[Mapping[str, float]] = None,
+                  targets: Iterable[str] = DEFAULT_TARGETS, max_cells: int = DEFAULT_MAX_CELLS) -> ScenarioResult:
+    """
+    Рассчитывает метрики на декартовой сетке допущений.
+
+    Args:
+        axes (Mapping[str, Sequence[float]]): Значения по осям, например {'spend': ..., 'cpc': ..., 'cr': ..., 'aov': ...}.
+        fixed (Optional[Mapping[str, float]]): Значения остальных входов PLANNING_INPUTS.
+        targets (Iterable[str]): Рассчитываемые метрики; по умолчанию CPA, ROAS и LTV.
+        max_cells (int): Размер блока вычисления.
+
+    Returns:
+        ScenarioResult: Оси и массивы метрик формы len(axis1) × len(axis2) × ...
+    """
+    return ScenarioGrid(axes, fixed, targets).evaluate(max_cells)
@@ -0,0 +1,165 @@
+# src/core/solver.py
+import ast
+import logging
+from typing import Dict, Mapping, Optional, Tuple
+import numpy as np
+from src.core.formulas import METRICS
+from src.core.graph import DEFAULT_GRAPH, MetricGraph
+
+DEFAULT_TOLERANCE = 1e-9  # Относительная точность корня
+MAX_ITERATIONS = 200
+BRACKET_STEPS = 64  # Удвоений при поиске отрезка со сменой знака: до 2⁶⁴ от начального значения
+
+Monomial = Tuple[float, Dict[str, float]]  # Коэффициент и степени переменных: c · Π xᵢ^kᵢ
+
+
+def _monomial(node: ast.AST) -> Optional[Monomial]:
+    """Разбирает выражение из умножений, делений и констант; для сумм и разностей возвращает None."""
+    if isinstance(node, ast.Expression):
+        return _monomial(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return float(node.value), {}
+    if isinstance(node, ast.Name):
+        return 1.0, {node.id: 1.0}
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        inner = _monomial(node.operand)
+        return None if inner is None else (-inner[0], inner[1])
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mult, ast.Div)):
+        left, right = _monomial(node.left), _monomial(node.right)
+        if left is None or right is None:
+            return None
+        sign = 1.0 if isinstance(node.op, ast.Mult) else -1.0
+        powers = dict(left[1])
+        for name, power in right[1].items():
+            powers[name] = powers.get(name, 0.0) + sign * power
+        coefficient = left[0] * right[0] if sign > 0 else left[0] / right[0]
+        return coefficient, {name: power for name, power in powers.items() if power != 0}
+    return None
+
+
+def expand_expression(graph: MetricGraph, metric_id: str) -> ast.Expression:
+    """Подставляет выражения промежуточных узлов графа, чтобы метрика зависела только от входных данных."""
+    class Inline(ast.NodeTransformer):
+        def visit_Name(self, node: ast.Name) -> ast.AST:
+            if node.id in graph.definitions:
+                return self.visit(ast.parse(graph.definitions[node.id], mode="eval").body)
+            return node
+
+    return ast.fix_missing_locations(Inline().visit(ast.parse(graph.definitions[metric_id], mode="eval")))
+
+
+def _masked(values: np.ndarray) -> np.ma.MaskedArray:
+    values = np.asarray(values, dtype=np.float64)
+    return np.ma.MaskedArray(values, mask=~np.isfinite(values) | (values <= 0))
+
+
+def _closed_form(monomial: Monomial, target, unknown: str, known: Mapping[str, object]) -> np.ma.MaskedArray:
+    """unknown = (target / (c · Π остальных^k)) ^ (1 / k_unknown)."""
+    coefficient, powers = monomial
+    rest = np.asarray(coefficient, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for name, power in powers.items():
+            if name != unknown:
+                rest = rest * np.asarray(known.get(name, np.nan), dtype=np.float64) ** power
+        return _masked((np.asarray(target, dtype=np.float64) / rest) ** (1.0 / powers[unknown]))
+
+
+def _root(function, target, shape: Tuple[int, ...], tolerance: float) -> np.ma.MaskedArray:
+    """
+    Векторный поиск корня function(x) = target на x > 0.
+
+    Для каждого элемента отрезок со сменой знака ищется удвоением вверх и вниз от 1,
+    затем уточняется бисекцией; элементы без смены знака маскируются.
+    """
+    target = np.broadcast_to(np.asarray(target, dtype=np.float64), shape)
+
+    def residual(x: np.ndarray) -> np.ndarray:
+        return np.ma.filled(np.ma.asarray(function(x)).astype(np.float64), np.nan) - target
+
+    low = np.ones(shape)
+    high = np.ones(shape)
+    f_low = residual(low)
+    f_high = f_low.copy()
+    found = f_low == 0
+    for _ in range(BRACKET_STEPS):
+        pending = ~found & ~(np.sign(f_low) * np.sign(f_high) < 0)
+        if not pending.any():
+            break
+        low = np.where(pending, low / 2, low)
+        high = np.where(pending, high * 2, high)
+        f_low, f_high = residual(low), residual(high)
+    bracketed = np.sign(f_low) * np.sign(f_high) < 0
+    # Отрезок мог найтись только с одной стороны: сужаем его до соседней точки удвоения
+    lower_half = bracketed & (np.sign(f_low) * np.sign(residual(low * 2)) < 0)
+    high = np.where(lower_half, low * 2, high)
+    low = np.where(bracketed & ~lower_half, high / 2, low)
+    f_low = residual(low)
+    for _ in range(MAX_ITERATIONS):
+        middle = (low + high) / 2
+        f_middle = residual(middle)
+        left = np.sign(f_middle) * np.sign(f_low) <= 0
+        high = np.where(left, middle, high)
+        low = np.where(left, low, middle)
+        f_low = np.where(left, f_low, f_middle)
+        if np.all(~bracketed | (high - low <= tolerance * high)):
+            break
+    result = np.where(found, 1.0, np.where(bracketed, (low + high) / 2, np.nan))
+    return _masked(result)
+
+
+def solve(metric_id: str, target, unknown: str, known: Mapping[str, object],
+          graph: MetricGraph = DEFAULT_GRAPH, tolerance: float = DEFAULT_TOLERANCE) -> np.ma.MaskedArray:
+    """
+    Находит значение одного входа, при котором метрика равна целевому значению.
+
+    Если unknown — поле интерфейса из FORMULAS ('cpa_actions'), используется выражение метрики из
+    src.core.formulas; иначе — граф метрик с общими входами ('conversions', 'revenue', ...).
+    Для выражений из умножений и делений (CPA, ROAS, LTV, LTV/CAC, ...) ответ считается в замкнутом виде,
+    для остальных (ROI, прибыль) — векторным поиском корня. Все аргументы могут быть массивами
+    (по кампаниям) и транслируются между собой.
+
+    Args:
+        metric_id (str): Идентификатор метрики ('cpa', 'roas', 'roi', ...).
+        target: Целевое значение метрики (число или массив).
+        unknown (str): Искомый вход.
+        known (Mapping[str, object]): Значения остальных входов метрики.
+        graph (MetricGraph): Граф метрик для производных показателей.
+        tolerance (float): Относительная точность поиска корня.
+
+    Returns:
+        np.ma.MaskedArray: Требуемые значения; замаскированы элементы без положительного решения.
+
+    Raises:
+        KeyError: Если метрика не зависит от unknown.
+    """
+    if metric_id in METRICS and unknown in METRICS[metric_id].inputs:
+        spec = METRICS[metric_id]
+        monomial = _monomial(ast.parse(spec.expression, mode="eval"))
+        if monomial is not None:
+            return _closed_form(monomial, target, unknown, known)
+        inputs = spec.inputs
+        compute = spec.compute
+    else:
+        if unknown not in graph.required_inputs([metric_id]):
+            raise KeyError(f"Metric {metric_id} does not depend on {unknown}")
+        monomial = _monomial(expand_expression(graph, metric_id))
+        if monomial is not None and unknown in monomial[1]:
+            return _closed_form(monomial, target, unknown, known)
+        inputs = tuple(graph.required_inputs([metric_id]))
+        compute = None
+
+    arrays = [np.asarray(target, dtype=np.float64)] + [np.asarray(known.get(name, np.nan), dtype=np.float64)
+                                                      for name in inputs if name != unknown]
+    shape = np.broadcast_shapes(*(array.shape for array in arrays))
+
+    def function(x: np.ndarray) -> np.ndarray:
+        values = {name: np.broadcast_to(np.asarray(known.get(name, np.nan), dtype=np.float64), shape)
+                  for name in inputs if name != unknown}
+        values[unknown] = x
+        if compute is not None:
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                return compute(*(values[name] for name in inputs))
+        return graph.evaluate(values, [metric_id])[metric_id]
+
+    logging.debug(f"Solving {metric_id} = target for {unknown} numerically, shape {shape}")
+    return _root(function, target, shape, tolerance)
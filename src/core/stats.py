@@ -0,0 +1,231 @@
+# src/core/stats.py
+from statistics import NormalDist
+from typing import Mapping, NamedTuple, Optional, Sequence
+import numpy as np
+from src.core.formulas import METRICS
+
+# Метрики-доли: (поле успехов, поле испытаний). Значение метрики — успехи / испытания × 100%.
+RATE_INPUTS = {
+    "ctr": ("ctr_clicks", "ctr_impressions"),
+    "cr": ("cr_conversions", "cr_clicks"),
+}
+# Метрики-отношения с числом событий в знаменателе (затраты / события): событие считается пуассоновским.
+COUNT_RATIO_INPUTS = {
+    "cpa": ("cpa_total_cost", "cpa_actions"),
+    "cpl": ("cpl_total_cost", "cpl_leads"),
+}
+INTERVAL_METHODS = ("wilson", "agresti_coull")
+
+
+class Interval(NamedTuple):
+    """Точечная оценка и границы доверительного интервала; замаскированы строки без данных."""
+    estimate: np.ma.MaskedArray
+    low: np.ma.MaskedArray
+    high: np.ma.MaskedArray
+
+
+def z_value(confidence: float = 0.95) -> float:
+    """Двусторонний квантиль нормального распределения для уровня доверия."""
+    if not 0 < confidence < 1:
+        raise ValueError(f"Confidence must be between 0 and 1, got {confidence}")
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def normal_sf(z: np.ndarray) -> np.ndarray:
+    """
+    Векторная функция выживания N(0, 1): P(Z > z).
+
+    Использует рациональное приближение erfc из Numerical Recipes (относительная погрешность < 1.2e-7),
+    чтобы не требовать SciPy.
+    """
+    x = np.abs(np.asarray(z, dtype=np.float64)) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.5 * x)
+    poly = -x * x - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277))))))))
+    tail = 0.5 * t * np.exp(poly)
+    return np.where(np.asarray(z) >= 0, tail, 1.0 - tail)
+
+
+def _masked(values: np.ndarray, valid: np.ndarray) -> np.ma.MaskedArray:
+    return np.ma.MaskedArray(np.where(valid, values, np.nan), mask=~valid)
+
+
+def proportion_interval(successes, trials, confidence: float = 0.95, method: str = "wilson") -> Interval:
+    """
+    Доверительный интервал доли для массивов успехов и испытаний.
+
+    Интервал Уилсона и интервал Агрести — Коула остаются в [0, 1] и корректны при малом числе
+    испытаний, в отличие от нормального приближения (3 клика из 60 показов дают широкий интервал).
+
+    Args:
+        successes: Количество успехов (клики, конверсии).
+        trials: Количество испытаний (показы, клики).
+        confidence (float): Уровень доверия.
+        method (str): 'wilson' или 'agresti_coull'.
+
+    Returns:
+        Interval: Доля и границы интервала в долях единицы; строки без испытаний или с успехами
+            больше испытаний замаскированы.
+    """
+    if method not in INTERVAL_METHODS:
+        raise ValueError(f"Interval method must be one of {INTERVAL_METHODS}, got {method!r}")
+    z = z_value(confidence)
+    x = np.asarray(successes, dtype=np.float64)
+    n = np.asarray(trials, dtype=np.float64)
+    valid = np.isfinite(x) & np.isfinite(n) & (n > 0) & (x >= 0) & (x <= n)
+    x = np.where(valid, x, 0.0)
+    n = np.where(valid, n, 1.0)
+    p = x / n
+    if method == "wilson":
+        denominator = 1 + z * z / n
+        center = (p + z * z / (2 * n)) / denominator
+        half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    else:
+        n_adj = n + z * z
+        center = (x + z * z / 2) / n_adj
+        half = z * np.sqrt(center * (1 - center) / n_adj)
+    low = np.clip(center - half, 0.0, 1.0)
+    high = np.clip(center + half, 0.0, 1.0)
+    return Interval(_masked(p, valid), _masked(low, valid), _masked(high, valid))
+
+
+def rate_interval(metric_id: str, columns: Mapping[str, object], confidence: float = 0.95,
+                  method: str = "wilson") -> Interval:
+    """
+    Доверительный интервал метрики-доли (CTR, CR) в процентах по столбцам входных полей FORMULAS.
+
+    Args:
+        metric_id (str): 'ctr' или 'cr'.
+        columns (Mapping[str, object]): Столбцы входных полей.
+        confidence (float): Уровень доверия.
+        method (str): 'wilson' или 'agresti_coull'.
+
+    Returns:
+        Interval: Значения в процентах, как у метрики из METRICS.
+    """
+    if metric_id not in RATE_INPUTS:
+        raise ValueError(f"Metric {metric_id} is not a rate; supported: {list(RATE_INPUTS)}")
+    successes, trials = RATE_INPUTS[metric_id]
+    interval = proportion_interval(columns[successes], columns[trials], confidence, method)
+    return Interval(*(part * 100 for part in interval))
+
+
+def count_ratio_interval(metric_id: str, columns: Mapping[str, object], confidence: float = 0.95) -> Interval:
+    """
+    Интервал дельта-методом для затрат на событие (CPA, CPL) по итоговым значениям строки.
+
+    Число событий считается пуассоновским, затраты — известными: se(CPA) ≈ CPA / √события.
+    Нижняя граница не опускается ниже нуля.
+    """
+    if metric_id not in COUNT_RATIO_INPUTS:
+        raise ValueError(f"Metric {metric_id} has no count denominator; supported: {list(COUNT_RATIO_INPUTS)}")
+    z = z_value(confidence)
+    amount, count = (np.asarray(columns[name], dtype=np.float64) for name in COUNT_RATIO_INPUTS[metric_id])
+    valid = np.isfinite(amount) & np.isfinite(count) & (count > 0) & (amount > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = METRICS[metric_id].compute(amount, count)
+        half = z * value / np.sqrt(count)
+        low = np.maximum(value - half, 0.0)
+    return Interval(_masked(value, valid), _masked(low, valid), _masked(value + half, valid))
+
+
+def ratio_interval(numerator, denominator, groups: Optional[Sequence[object]] = None,
+                   confidence: float = 0.95) -> Interval:
+    """
+    Интервал дельта-методом для отношения сумм по строкам группы (ROAS = Σ доход / Σ затраты, CPA, ...).
+
+    Оценка группы — R = Σy / Σx, дисперсия линеаризацией: Var(R) ≈ n / (n − 1) · Σ(y − R·x)² / (Σx)².
+    Все группы считаются за один проход через bincount.
+
+    Args:
+        numerator: Значения числителя по строкам (доход).
+        denominator: Значения знаменателя по строкам (затраты).
+        groups (Optional[Sequence[object]]): Ключ группы (вариант объявления) для каждой строки;
+            по умолчанию все строки — одна группа.
+        confidence (float): Уровень доверия.
+
+    Returns:
+        Interval: Значения по группам в порядке отсортированных ключей; группы меньше чем из двух
+            строк или с нулевой суммой знаменателя замаскированы.
+    """
+    z = z_value(confidence)
+    y = np.asarray(numerator, dtype=np.float64)
+    x = np.asarray(denominator, dtype=np.float64)
+    rows = np.isfinite(x) & np.isfinite(y)
+    if groups is None:
+        codes = np.zeros(len(x), dtype=np.int64)
+    else:
+        _, codes = np.unique(np.asarray(groups), return_inverse=True)
+        codes = codes.reshape(-1)
+    size = int(codes.max()) + 1 if len(codes) else 0
+    y, x = np.where(rows, y, 0.0), np.where(rows, x, 0.0)
+    count = np.bincount(codes, weights=rows, minlength=size)
+    sum_x = np.bincount(codes, weights=x, minlength=size)
+    sum_y = np.bincount(codes, weights=y, minlength=size)
+    valid = (count > 1) & (sum_x != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = sum_y / sum_x
+        residual = np.where(rows, y - ratio[codes] * x, 0.0)
+        variance = count / (count - 1) * np.bincount(codes, weights=residual ** 2, minlength=size) / sum_x ** 2
+        half = z * np.sqrt(variance)
+    return Interval(_masked(ratio, valid), _masked(ratio - half, valid), _masked(ratio + half, valid))
+
+
+class ProportionTest(NamedTuple):
+    """Результат двустороннего z-теста разности долей: B − A, z-статистика и p-значение."""
+    difference: np.ma.MaskedArray
+    z: np.ma.MaskedArray
+    p_value: np.ma.MaskedArray
+
+
+def two_proportion_test(successes_a, trials_a, successes_b, trials_b) -> ProportionTest:
+    """
+    Векторный двусторонний z-тест с объединённой долей для пар вариантов A/B.
+
+    Args:
+        successes_a, trials_a: Успехи и испытания варианта A (массивы одной длины).
+        successes_b, trials_b: Успехи и испытания варианта B.
+
+    Returns:
+        ProportionTest: Разность долей (в долях единицы), z и p-значение; пары без испытаний
+            или с нулевой дисперсией замаскированы.
+    """
+    xa, na, xb, nb = (np.asarray(value, dtype=np.float64) for value in (successes_a, trials_a, successes_b, trials_b))
+    valid = (na > 0) & (nb > 0) & np.isfinite(xa + xb + na + nb)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pa, pb = xa / na, xb / nb
+        pooled = (xa + xb) / (na + nb)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / na + 1 / nb))
+        z = (pb - pa) / se
+    valid &= se > 0
+    p_value = 2 * normal_sf(np.abs(np.where(valid, z, 0.0)))
+    return ProportionTest(_masked(pb - pa, valid), _masked(z, valid), _masked(p_value, valid))
+
+
+def significant(p_values, alpha: float = 0.05, correction: Optional[str] = "fdr") -> np.ndarray:
+    """
+    Отмечает значимые различия среди множества сравнений.
+
+    Args:
+        p_values: p-значения (MaskedArray допускается: замаскированные не значимы и не учитываются).
+        alpha (float): Уровень значимости.
+        correction (Optional[str]): 'fdr' — процедура Бенджамини — Хохберга, 'bonferroni' или None.
+
+    Returns:
+        np.ndarray: Булев массив значимых сравнений.
+    """
+    mask = np.ma.getmaskarray(p_values)
+    p = np.where(mask, np.inf, np.ma.getdata(p_values).astype(np.float64))
+    tested = int((~mask).sum())
+    if correction is None or tested == 0:
+        return p <= alpha
+    if correction == "bonferroni":
+        return p <= alpha / tested
+    if correction != "fdr":
+        raise ValueError(f"Unknown correction: {correction}")
+    order = np.argsort(p, kind="stable")
+    passed = p[order] <= alpha * np.arange(1, len(p) + 1) / tested
+    cutoff = np.flatnonzero(passed).max() + 1 if passed.any() else 0
+    result = np.zeros(len(p), dtype=bool)
+    result[order[:cutoff]] = True
+    return result
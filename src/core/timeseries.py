@@ -0,0 +1,108 @@
+# src/core/timeseries.py
+import logging
+from typing import Dict, Iterable, Mapping, Sequence
+import numpy as np
+from src.core.formulas import METRICS
+
+DEFAULT_WINDOWS = (7, 28)
+DEFAULT_METRICS = ("ctr", "cpa", "roas")
+
+
+def rolling_sums(series_ids: Sequence[object], dates: Sequence[object], values: Mapping[str, np.ndarray],
+                 windows: Iterable[int], require_full_window: bool = False) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    Считает суммы за скользящие календарные окна через префиксные суммы.
+
+    Окно строки с датой d охватывает все строки того же ряда с датами из [d - window + 1, d]:
+    пропущенные дни просто не дают вклада, несколько строк за один день суммируются.
+    Сортировка и префиксные суммы считаются один раз, каждое окно — это разность двух префиксов.
+
+    Args:
+        series_ids (Sequence[object]): Идентификатор ряда (кампании) для каждой строки.
+        dates (Sequence[object]): Даты строк (ISO-строки или datetime64).
+        values (Mapping[str, np.ndarray]): Суммируемые столбцы; NaN считается нулём.
+        windows (Iterable[int]): Длины окон в календарных днях.
+        require_full_window (bool): Заполнять NaN строки, где окно начинается раньше первой даты ряда.
+
+    Returns:
+        Dict[int, Dict[str, np.ndarray]]: Для каждого окна — суммы по столбцам в исходном порядке строк.
+    """
+    windows = list(windows)
+    days = np.asarray(dates).astype("datetime64[D]").astype(np.int64)
+    size = len(days)
+    if size == 0:
+        return {window: {name: np.zeros(0) for name in values} for window in windows}
+    _, codes = np.unique(np.asarray(series_ids), return_inverse=True)
+    codes = codes.reshape(-1).astype(np.int64)
+    # Единый ключ (ряд, день): разнос рядов больше любого окна, поэтому окно не захватывает соседний ряд
+    span = int(days.max() - days.min()) + max(windows) + 1
+    keys = codes * span + (days - days.min())
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    right = np.searchsorted(sorted_keys, sorted_keys, side="right")
+    prefixes = {name: np.concatenate([[0.0], np.cumsum(np.nan_to_num(np.asarray(column, dtype=np.float64)[order]))])
+                for name, column in values.items()}
+    history = None
+    if require_full_window:
+        first_day = np.full(codes.max() + 1, np.iinfo(np.int64).max)
+        np.minimum.at(first_day, codes, days)
+        history = (days - first_day[codes])[order]
+
+    sums = {}
+    for window in windows:
+        left = np.searchsorted(sorted_keys, sorted_keys - (window - 1), side="left")
+        sums[window] = {}
+        for name, prefix in prefixes.items():
+            window_sum = prefix[right] - prefix[left]
+            if history is not None:
+                window_sum[history < window - 1] = np.nan
+            result = np.empty(size)
+            result[order] = window_sum
+            sums[window][name] = result
+    return sums
+
+
+def rolling_metrics(series_ids: Sequence[object], dates: Sequence[object], columns: Mapping[str, object],
+                    windows: Iterable[int] = DEFAULT_WINDOWS, metrics: Iterable[str] = DEFAULT_METRICS,
+                    require_full_window: bool = False) -> Dict[str, np.ma.MaskedArray]:
+    """
+    Рассчитывает метрики за скользящие окна по дневным рядам кампаний.
+
+    Метрика окна считается по суммам входных полей за окно (sum(clicks) / sum(impressions)),
+    суммы получаются из префиксных сумм, поэтому стоимость не зависит от длины окна.
+
+    Args:
+        series_ids (Sequence[object]): Идентификатор ряда (кампании) для каждой строки.
+        dates (Sequence[object]): Даты строк.
+        columns (Mapping[str, object]): Входные поля FORMULAS. Строка учитывается в метрике,
+            только если заполнены все входные поля этой метрики.
+        windows (Iterable[int]): Длины окон в днях.
+        metrics (Iterable[str]): Идентификаторы метрик; по умолчанию CTR, CPA и ROAS.
+        require_full_window (bool): Маскировать строки, для которых окно не покрыто историей ряда.
+
+    Returns:
+        Dict[str, np.ma.MaskedArray]: Значения в исходном порядке строк под ключами вида 'ctr_7d'.
+    """
+    metrics = list(metrics)
+    windows = list(windows)
+    size = len(dates)
+    inputs = {}
+    for metric_id in metrics:
+        names = METRICS[metric_id].inputs
+        values = [np.asarray(columns[name], dtype=np.float64) if name in columns else np.full(size, np.nan)
+                  for name in names]
+        valid = np.logical_and.reduce([np.isfinite(value) for value in values])
+        for name, value in zip(names, values):
+            inputs[name] = np.where(valid, value, 0.0)
+
+    results = {}
+    window_sums = rolling_sums(series_ids, dates, inputs, windows, require_full_window)
+    for window in windows:
+        for metric_id in metrics:
+            args = [window_sums[window][name] for name in METRICS[metric_id].inputs]
+            valid = np.logical_and.reduce([np.isfinite(arg) & (arg != 0) for arg in args])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = METRICS[metric_id].compute(*args)
+            results[f"{metric_id}_{window}d"] = np.ma.MaskedArray(values, mask=~valid)
+    logging.debug(f"Rolling metrics for {size} rows, windows: {windows}")
+    return results
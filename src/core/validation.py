@@ -0,0 +1,100 @@
+# src/core/validation.py
+import re
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+VALUE_PATTERN = re.compile(r'^(0\.\d{1,2}|[1-9]\d*(\.\d{1,2})?)$')  # Число > 0, не больше двух знаков после точки
+
+
+def is_valid_value(value: str) -> bool:
+    """Проверяет готовое значение поля: положительное число с не более чем двумя знаками после точки."""
+    if not value or value.endswith("."):
+        return False
+    if not VALUE_PATTERN.match(value):
+        return False
+    return float(value) > 0
+
+
+class ValidationChange(NamedTuple):
+    """Изменение состояния после правки поля: новая валидность и заполненность формул, которым поле принадлежит."""
+    field: str
+    valid: bool
+    formulas: Tuple[Tuple[str, int], ...]  # (идентификатор формулы, заполнено полей)
+    complete_changed: bool  # Изменилось ли наличие хотя бы одной полностью заполненной формулы
+
+
+class ValidationModel:
+    """
+    Инкрементальная проверка полей ввода.
+
+    Хранит валидность каждого поля и число корректно заполненных полей каждой формулы. Правка поля
+    пересчитывает только его и формулы, в которые оно входит, поэтому стоимость нажатия клавиши
+    не зависит от общего числа полей.
+    """
+
+    def __init__(self, formulas: Mapping[str, Sequence[str]]):
+        self.fields: Dict[str, Tuple[str, ...]] = {formula_id: tuple(fields) for formula_id, fields in formulas.items()}
+        self._owners: Dict[str, List[str]] = {}
+        for formula_id, fields in self.fields.items():
+            for field in fields:
+                self._owners.setdefault(field, []).append(formula_id)
+        self._values: Dict[str, str] = {field: "" for field in self._owners}
+        self._valid: Dict[str, bool] = {field: False for field in self._owners}
+        self._filled: Dict[str, int] = {formula_id: 0 for formula_id in self.fields}
+        self._complete = 0  # Количество полностью заполненных формул
+
+    def update(self, field: str, value: str) -> Optional[ValidationChange]:
+        """
+        Запоминает новое значение поля.
+
+        Returns:
+            Optional[ValidationChange]: Изменение или None, если валидность поля не изменилась
+                (тогда не изменились и индикаторы формул).
+        """
+        self._values[field] = value
+        valid = is_valid_value(value.strip())
+        if valid == self._valid.get(field, False):
+            return None
+        self._valid[field] = valid
+        any_complete = self._complete > 0
+        formulas = []
+        for formula_id in self._owners.get(field, ()):
+            total = len(self.fields[formula_id])
+            was_complete = self._filled[formula_id] == total
+            self._filled[formula_id] += 1 if valid else -1
+            is_complete = self._filled[formula_id] == total
+            self._complete += is_complete - was_complete
+            formulas.append((formula_id, self._filled[formula_id]))
+        return ValidationChange(field, valid, tuple(formulas), any_complete != (self._complete > 0))
+
+    def reset(self, values: Mapping[str, str]):
+        """Пересчитывает состояние целиком по значениям всех полей (отсутствующие считаются пустыми)."""
+        for field in self._owners:
+            self._values[field] = values.get(field, "")
+            self._valid[field] = is_valid_value(self._values[field].strip())
+        self._filled = {formula_id: sum(self._valid[field] for field in fields)
+                        for formula_id, fields in self.fields.items()}
+        self._complete = sum(self._filled[formula_id] == len(fields) for formula_id, fields in self.fields.items())
+
+    def value(self, field: str) -> str:
+        return self._values.get(field, "")
+
+    def valid(self, field: str) -> bool:
+        return self._valid.get(field, False)
+
+    def filled(self, formula_id: str) -> int:
+        return self._filled[formula_id]
+
+    def is_complete(self, formula_id: str) -> bool:
+        return self._filled[formula_id] == len(self.fields[formula_id])
+
+    @property
+    def any_complete(self) -> bool:
+        return self._complete > 0
+
+    def complete_formulas(self) -> List[str]:
+        return [formula_id for formula_id in self.fields if self.is_complete(formula_id)]
+
+    def invalid_fields(self, fields: Optional[Iterable[str]] = None) -> List[str]:
+        """Непустые поля с некорректными значениями."""
+        return [field for field in (self._owners if fields is None else fields)
+                if self._values.get(field, "").strip() and not self._valid.get(field, False)]
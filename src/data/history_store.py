@@ -0,0 +1,259 @@
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    lang TEXT NOT NULL,
+    entries TEXT NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_calculations_ts ON calculations (ts);
+CREATE TABLE IF NOT EXISTS inputs (
+    calc_id INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_inputs_field_value ON inputs (field, value);
+CREATE INDEX IF NOT EXISTS idx_inputs_calc ON inputs (calc_id);
+CREATE TABLE IF NOT EXISTS metrics (
+    calc_id INTEGER NOT NULL,
+    metric_id TEXT NOT NULL,
+    value REAL NOT NULL,
+    band TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_metric_value ON metrics (metric_id, value);
+CREATE INDEX IF NOT EXISTS idx_metrics_metric_band ON metrics (metric_id, band, calc_id);
+CREATE INDEX IF NOT EXISTS idx_metrics_calc ON metrics (calc_id);
+"""
+
+
+class HistoryRecord(NamedTuple):
+    """Запись истории: поля ввода как строки, текст результатов и рассчитанные метрики (id, значение, диапазон)."""
+    id: int
+    timestamp: float
+    lang: str
+    entries: Dict[str, str]
+    results: str
+    metrics: List[Tuple[str, float, str]]
+
+
+class HistoryStore:
+    """
+    Журнал расчётов в SQLite: каждая запись — одна вставка, старые записи не переписываются.
+
+    Индексы по времени, метрикам (значение и диапазон) и значениям полей ввода позволяют выбирать
+    диапазоны и страницы истории, не загружая её целиком.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")  # Добавление в конец без перезаписи файла
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        logging.debug(f"Opened history store {path}")
+
+    def append(self, entries: Dict[str, str], results: str, metrics: Iterable[Tuple[str, float, str]] = (),
+               lang: str = "ru", timestamp: Optional[float] = None) -> int:
+        """
+        Добавляет расчёт в историю одной транзакцией.
+
+        Args:
+            entries (Dict[str, str]): Значения полей ввода; пустые поля не сохраняются.
+            results (str): Текст результатов, как он показан пользователю.
+            metrics (Iterable[Tuple[str, float, str]]): Рассчитанные метрики (id, значение, тег диапазона),
+                например MetricResult из src.core.engine. Метрики с нечисловым значением (NaN после ошибки
+                расчёта) в индекс не попадают, запись и её текст сохраняются.
+            lang (str): Язык интерфейса.
+            timestamp (Optional[float]): Время расчёта (Unix); по умолчанию — текущее.
+
+        Returns:
+            int: Идентификатор записи.
+        """
+        entries = {name: value for name, value in entries.items() if value}
+        numeric = []
+        for name, value in entries.items():
+            try:
+                number = float(value)
+            except ValueError:
+                continue
+            if math.isfinite(number):
+                numeric.append((name, number))
+        # Столбцы value объявлены NOT NULL: NaN сохранился бы как NULL и откатил всю запись
+        metric_rows = [(metric[0], float(metric[1]), metric[2]) for metric in metrics if math.isfinite(metric[1])]
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO calculations (ts, lang, entries, results) VALUES (?, ?, ?, ?)",
+                (time.time() if timestamp is None else timestamp, lang, json.dumps(entries, ensure_ascii=False), results))
+            calc_id = cursor.lastrowid
+            self._connection.executemany("INSERT INTO inputs (calc_id, field, value) VALUES (?, ?, ?)",
+                                         [(calc_id, name, value) for name, value in numeric])
+            self._connection.executemany("INSERT INTO metrics (calc_id, metric_id, value, band) VALUES (?, ?, ?, ?)",
+                                         [(calc_id,) + row for row in metric_rows])
+        return calc_id
+
+    @staticmethod
+    def _filters(metric_id: Optional[str], band: Optional[str], start: Optional[float], end: Optional[float],
+                 value_range: Optional[Tuple[float, float]], input_field: Optional[str],
+                 input_range: Optional[Tuple[float, float]]) -> Tuple[str, List[object]]:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("c.ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("c.ts < ?")
+            params.append(end)
+        if metric_id is not None or band is not None:
+            metric_clauses = ["m.calc_id = c.id"]
+            if metric_id is not None:
+                metric_clauses.append("m.metric_id = ?")
+                params.append(metric_id)
+            if band is not None:
+                metric_clauses.append("m.band = ?")
+                params.append(band)
+            if value_range is not None:
+                metric_clauses.append("m.value BETWEEN ? AND ?")
+                params.extend(value_range)
+            clauses.append(f"EXISTS (SELECT 1 FROM metrics m WHERE {' AND '.join(metric_clauses)})")
+        if input_field is not None:
+            input_clauses = ["i.calc_id = c.id", "i.field = ?"]
+            params.append(input_field)
+            if input_range is not None:
+                input_clauses.append("i.value BETWEEN ? AND ?")
+                params.extend(input_range)
+            clauses.append(f"EXISTS (SELECT 1 FROM inputs i WHERE {' AND '.join(input_clauses)})")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, metric_id: Optional[str] = None, band: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, value_range: Optional[Tuple[float, float]] = None,
+              input_field: Optional[str] = None, input_range: Optional[Tuple[float, float]] = None,
+              before_id: Optional[int] = None, limit: int = 50) -> List[HistoryRecord]:
+        """
+        Возвращает страницу истории от новых записей к старым.
+
+        Args:
+            metric_id (Optional[str]): Только расчёты, где есть эта метрика.
+            band (Optional[str]): Только расчёты с метрикой в этом диапазоне ('danger', ...).
+            start (Optional[float]): Начало интервала времени (Unix, включительно).
+            end (Optional[float]): Конец интервала времени (Unix, не включительно).
+            value_range (Optional[Tuple[float, float]]): Границы значения metric_id.
+            input_field (Optional[str]): Только расчёты, где заполнено это поле ввода.
+            input_range (Optional[Tuple[float, float]]): Границы значения input_field.
+            before_id (Optional[int]): Ключ страницы: записи с id меньше этого (id последней записи
+                предыдущей страницы).
+            limit (int): Размер страницы.
+
+        Returns:
+            List[HistoryRecord]: Записи страницы.
+        """
+        where, params = self._filters(metric_id, band, start, end, value_range, input_field, input_range)
+        if before_id is not None:
+            where += (" AND " if where else " WHERE ") + "c.id < ?"
+            params.append(before_id)
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT c.id, c.ts, c.lang, c.entries, c.results FROM calculations c{where} ORDER BY c.id DESC LIMIT ?",
+                params + [limit]).fetchall()
+            metrics: Dict[int, List[Tuple[str, float, str]]] = {row[0]: [] for row in rows}
+            if rows:
+                placeholders = ", ".join("?" * len(rows))
+                for calc_id, metric, value, metric_band in self._connection.execute(
+                        f"SELECT calc_id, metric_id, value, band FROM metrics WHERE calc_id IN ({placeholders}) "
+                        f"ORDER BY rowid", list(metrics)):
+                    metrics[calc_id].append((metric, value, metric_band))
+        return [HistoryRecord(calc_id, ts, lang, json.loads(entries), results, metrics[calc_id])
+                for calc_id, ts, lang, entries, results in rows]
+
+    def count(self, metric_id: Optional[str] = None, band: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, value_range: Optional[Tuple[float, float]] = None,
+              input_field: Optional[str] = None, input_range: Optional[Tuple[float, float]] = None) -> int:
+        """Количество записей, подходящих под фильтры query."""
+        where, params = self._filters(metric_id, band, start, end, value_range, input_field, input_range)
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM calculations c{where}", params).fetchone()[0]
+
+    def get(self, calc_id: int) -> Optional[HistoryRecord]:
+        """Возвращает запись по идентификатору."""
+        records = self.query(before_id=calc_id + 1, limit=1)
+        return records[0] if records and records[0].id == calc_id else None
+
+    def metric_series(self, metric_id: str, start: Optional[float] = None,
+                      end: Optional[float] = None) -> List[Tuple[float, float]]:
+        """Значения метрики во времени (время, значение) для отчётов."""
+        where, params = self._filters(None, None, start, end, None, None, None)
+        where += (" AND " if where else " WHERE ") + "m.calc_id = c.id AND m.metric_id = ?"
+        with self._lock:
+            return self._connection.execute(
+                f"SELECT c.ts, m.value FROM calculations c, metrics m{where} ORDER BY c.ts",
+                params + [metric_id]).fetchall()
+
+    def migrate_json(self, json_path: str) -> int:
+        """
+        Переносит записи из прежнего history.json и переименовывает файл в *.migrated.
+
+        У старых записей нет времени, поэтому им назначается время изменения файла с сохранением порядка.
+
+        Returns:
+            int: Количество перенесённых записей.
+        """
+        if not os.path.exists(json_path) or os.path.getsize(json_path) == 0:
+            return 0
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.error(f"Failed to migrate history from {json_path}: {e}")
+            return 0
+        base_time = os.path.getmtime(json_path) - len(records)
+        for i, record in enumerate(records):
+            self.append(record.get("entries", {}), record.get("results", ""), timestamp=base_time + i)
+        os.replace(json_path, json_path + ".migrated")
+        logging.info(f"Migrated {len(records)} history records from {json_path}")
+        return len(records)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class HistoryPager:
+    """
+    Постраничное чтение истории с фиксированными фильтрами.
+
+    Хранит только курсор (id последней выданной записи), поэтому память не зависит от размера истории.
+    """
+
+    def __init__(self, store: HistoryStore, page_size: int = 50, **filters):
+        self.store = store
+        self.page_size = page_size
+        self.filters = filters
+        self._cursor: Optional[int] = None
+        self.exhausted = False
+
+    def next_page(self) -> List[HistoryRecord]:
+        """Возвращает следующую страницу (от новых записей к старым) или пустой список в конце."""
+        if self.exhausted:
+            return []
+        records = self.store.query(before_id=self._cursor, limit=self.page_size, **self.filters)
+        if len(records) < self.page_size:
+            self.exhausted = True
+        if records:
+            self._cursor = records[-1].id
+        return records
+
+    def total(self) -> int:
+        """Количество записей под фильтрами."""
+        return self.store.count(**self.filters)
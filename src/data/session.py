@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+from typing import Dict, Optional
+from src.data.state_writer import atomic_write_json
+
+SESSION_VERSION = 1
+SESSION_FILE = "session.json"
+# Прежние отдельные файлы, из которых собирается первый снимок сессии
+LEGACY_UI_STATE_FILE = "ui_state.json"
+LEGACY_COLLAPSED_STATE_FILE = "collapsed_state.json"
+LEGACY_AUTOSAVE_FILE = "autosave.json"
+
+
+def default_session() -> Dict:
+    """
+    Пустой снимок сессии.
+
+    ui — тема, язык, размер и положение окна; collapsed — свёрнутые секции формул;
+    lang, inputs, results — последние введённые данные и текст результатов;
+    history_cursor — id записи, выбранной в окне истории: окно открывается на ней.
+    """
+    return {
+        "version": SESSION_VERSION,
+        "ui": {},
+        "collapsed": {},
+        "lang": "ru",
+        "inputs": {},
+        "results": "",
+        "history_cursor": None,
+    }
+
+
+def _read_json(path: str) -> Optional[object]:
+    # Одно открытие файла без предварительных exists/getsize: на сетевом диске каждый вызов — отдельный запрос
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logging.error(f"Failed to read {path}: {e}")
+        return None
+    if not text.strip():
+        return None
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        logging.error(f"Failed to read {path}: {e}")
+        return None
+
+
+def migrate_legacy(base_path: str) -> Optional[Dict]:
+    """
+    Собирает снимок из ui_state.json, collapsed_state.json и autosave.json.
+
+    Returns:
+        Optional[Dict]: Снимок или None, если ни одного прежнего файла нет.
+    """
+    ui_state = _read_json(os.path.join(base_path, LEGACY_UI_STATE_FILE))
+    collapsed = _read_json(os.path.join(base_path, LEGACY_COLLAPSED_STATE_FILE))
+    autosave = _read_json(os.path.join(base_path, LEGACY_AUTOSAVE_FILE))
+    if ui_state is None and collapsed is None and autosave is None:
+        return None
+    session = default_session()
+    if isinstance(ui_state, dict):
+        ui_state = dict(ui_state)
+        # Раньше свёрнутые секции дублировались в ui_state; отдельный файл приоритетнее
+        session["collapsed"] = ui_state.pop("collapsed_state", {}) or {}
+        session["ui"] = ui_state
+    if isinstance(collapsed, dict):
+        session["collapsed"] = collapsed
+    if isinstance(autosave, dict):
+        session["lang"] = autosave.get("lang", "ru")
+        session["inputs"] = autosave.get("entries", {})
+        session["results"] = autosave.get("results", "")
+    logging.info(f"Migrated session state from legacy files in {base_path}")
+    return session
+
+
+def upgrade_session(data: Dict) -> Dict:
+    """Приводит прочитанный снимок к текущей версии; неизвестные ключи сохраняются, недостающие дополняются."""
+    version = data.get("version", 0)
+    if version > SESSION_VERSION:
+        logging.warning(f"Session version {version} is newer than supported {SESSION_VERSION}")
+    session = default_session()
+    session.update(data)
+    session["version"] = SESSION_VERSION
+    return session
+
+
+def retire_legacy(base_path: str):
+    """Переименовывает перенесённые файлы в *.migrated, чтобы они больше не читались при запуске."""
+    for name in (LEGACY_UI_STATE_FILE, LEGACY_COLLAPSED_STATE_FILE, LEGACY_AUTOSAVE_FILE):
+        path = os.path.join(base_path, name)
+        if os.path.exists(path):
+            try:
+                os.replace(path, path + ".migrated")
+            except OSError as e:
+                logging.error(f"Failed to retire {path}: {e}")
+
+
+def save_session(base_path: str, session: Dict):
+    atomic_write_json(os.path.join(base_path, SESSION_FILE), session, indent=None)
+
+
+def load_session(base_path: str) -> Dict:
+    """
+    Читает снимок сессии одним обращением к файлу.
+
+    Если снимка ещё нет, он собирается из прежних файлов, записывается, а прежние файлы
+    переименовываются — перенос выполняется один раз.
+
+    Returns:
+        Dict: Снимок сессии (см. default_session).
+    """
+    data = _read_json(os.path.join(base_path, SESSION_FILE))
+    if isinstance(data, dict):
+        return upgrade_session(data)
+    session = migrate_legacy(base_path)
+    if session is None:
+        return default_session()
+    try:
+        save_session(base_path, session)
+        retire_legacy(base_path)
+    except OSError as e:
+        logging.error(f"Failed to save migrated session: {e}")
+    return session
@@ -0,0 +1,122 @@
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+DEFAULT_DELAY = 0.5  # Секунд от первого изменения до записи: серия изменений сливается в одну запись
+
+
+def atomic_write_text(path: str, text: str):
+    """
+    Записывает файл через временный файл в том же каталоге и os.replace.
+
+    Прерванная запись оставляет прежнюю версию файла целой, а не усечённой.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: str, data: object, indent: Optional[int] = 4):
+    atomic_write_text(path, json.dumps(data, indent=indent, ensure_ascii=False))
+
+
+class StateWriter:
+    """
+    Отложенная запись файлов состояния в фоновом потоке.
+
+    put только запоминает новое содержимое файла; поток записывает накопленные изменения через
+    delay секунд после первого из них, так что серия изменений (перетаскивание окна, переключения)
+    даёт одну запись на файл. close (и выход интерпретатора) дописывает всё оставшееся.
+    """
+
+    def __init__(self, delay: float = DEFAULT_DELAY):
+        self.delay = delay
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Удерживается от снятия накопленного до конца записи: запись с более старым снимком файла
+        # из другого потока (flush из фоновой задачи и поток писателя) не может закончиться позже новой
+        self._write_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.close)
+
+    def put(self, path: str, data: object, indent: Optional[int] = 4):
+        """
+        Ставит файл в очередь на запись; более ранняя незаписанная версия того же файла отбрасывается.
+
+        Данные сериализуются сразу, поэтому вызывающий код может дальше изменять свои словари.
+        """
+        text = json.dumps(data, indent=indent, ensure_ascii=False)
+        with self._lock:
+            if self._closed.is_set():
+                write_now = True
+            else:
+                write_now = False
+                self._pending[path] = text
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="StateWriter", daemon=True)
+                    self._thread.start()
+        if write_now:
+            with self._write_lock:
+                self._write(path, text)
+        else:
+            self._dirty.set()
+
+    def pending(self) -> Dict[str, str]:
+        """Незаписанные файлы и их содержимое."""
+        with self._lock:
+            return dict(self._pending)
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._dirty.wait()
+            # Ожидание прерывается только закрытием; изменения за это время сливаются
+            self._closed.wait(self.delay)
+            self.flush()
+
+    def flush(self) -> bool:
+        """Записывает все накопленные изменения в текущем потоке; False, если какая-то запись не удалась."""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._dirty.clear()
+            return all([self._write(path, text) for path, text in pending.items()])
+
+    @staticmethod
+    def _write(path: str, text: str) -> bool:
+        try:
+            atomic_write_text(path, text)
+            logging.debug(f"Wrote state file {path}")
+            return True
+        except Exception as e:
+            logging.error(f"Failed to write state file {path}: {e}")
+            return False
+
+    def close(self):
+        """Останавливает поток и записывает оставшиеся изменения; последующие put пишут сразу."""
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            thread = self._thread
+        self._dirty.set()
+        if thread is not None:
+            thread.join()
+        self.flush()
+        atexit.unregister(self.close)
@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from src.ui.app_ui import AppUI
 import tkinter as tk
 import logging
@@ -14,4 +15,5 @@ def main():
         sys.exit(0)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Процессы фоновых задач в собранном приложении
     main()
\ No newline at end of file
@@ -4,26 +4,36 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import logging
 from src.ui.tooltip import ToolTip
+import pickle
 import matplotlib.pyplot as plt
 import pyperclip
-from typing import Dict, Callable
-from src.core.calculations import calculate_metrics
-from src.core.formulas import FORMULAS
+from typing import Dict, Callable, List
+from src.core.calculations import calculate_metrics, format_result
+from src.core.engine import IncrementalEvaluator, ResultDiff
+from src.core.formulas import METRICS, localized_formulas, metric_title
+from src.core.validation import ValidationModel, is_valid_value
 from src.data.data_manager import DataManager
 from src.utils.helpers import validate_number
-from src.visualization.charts import show_chart  # Импортируем новую функцию
-import re
+from src.utils.tasks import Task, TaskRunner
+from src.visualization.charts import export_figure, show_chart  # Импортируем новую функцию
+from src.ui.planner import PlannerWindow
+from src.ui.history_view import HistoryWindow
+from src.ui.formula_section import FieldValue, FormulaSection
+from src.ui.section_list import SectionList
+
+LIVE_DELAY_MS = 300  # Пауза после последнего нажатия клавиши до пересчёта результатов
 
 
 class AppUI:
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title("Digital Marketing Metrics")
-        self.entries: Dict[str, ttk.Entry] = {}
-        self.formula_indicators: Dict[str, ttk.Label] = {}
-        self.formula_progress: Dict[str, ttk.Label] = {}
-        self.collapse_buttons: Dict[str, ttk.Button] = {}
-        self.separators: Dict[str, ttk.Separator] = {}  # Словарь для хранения разделителей
+        self.entries: Dict[str, FieldValue] = {}  # Значения полей всех формул, независимо от показанных секций
+        self.formula_ids = list(METRICS)  # Порядок секций формул
+        self.formula_index = {metric_id: index for index, metric_id in enumerate(self.formula_ids)}
+        self.localized = []  # localized_formulas на текущем языке
+        self.section_titles: Dict[str, str] = {}  # Название формулы на текущем языке по идентификатору метрики
+        self.section_layout = None  # (шрифт заголовка, шрифт текста, ширина обёртки), применённые к секциям
         self.current_theme = "solar"
         self.current_lang = "ru"
         self.last_width = 0
@@ -33,6 +43,10 @@ class AppUI:
         self.is_single_column = False
         self.after_id = None
         self.last_results = []
+        self.evaluator = IncrementalEvaluator()  # Живой пересчёт результатов по мере ввода
+        self.live_changes = set()  # Поля, изменённые с последнего живого пересчёта
+        self.live_after_id = None
+        self.results_live = False  # Строки result_text соответствуют evaluator и размечены тегами метрик
         self.chart_canvas = None
         self.chart_fig = None
         self.chart_window = None
@@ -45,10 +59,19 @@ class AppUI:
         )
 
         self.style = ttk.Style(self.current_theme)
+        # Ввод-вывод и расчёты выполняются в фоне; результаты возвращаются в поток Tk через root.after
+        self.tasks = TaskRunner(self.root.after, on_change=self._show_tasks)
+        self.tasks_status = None  # Последний выведенный текст о выполняющихся задачах
         self.data_manager = DataManager(self._get_base_path())
         self.vcmd = (self.root.register(validate_number), "%d", "%P", "%S", "%s")
 
         self._load_ui_state()
+        self.entries = {name: FieldValue(self.root) for metric_id in self.formula_ids for name in METRICS[metric_id].inputs}
+        self.validation = ValidationModel({metric_id: METRICS[metric_id].inputs for metric_id in self.formula_ids})
+        for name, value in self.entries.items():
+            value.var.trace_add("write", lambda *args, name=name: self._on_value_change(name))
+        self.localized = localized_formulas(self.current_lang)
+        self.section_titles = {metric_id: formula_title for metric_id, formula_title, _, _ in self.localized}
         self._setup_ui()
         self.collapsed_state = self.data_manager.load_collapsed_state(self.current_lang)
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
@@ -116,6 +139,8 @@ class AppUI:
         self.lang_menu.pack(side="left", padx=5)
         ttk.Button(self.top_frame, text="История" if self.current_lang == "ru" else "History",
                    command=self._show_history, bootstyle="secondary").pack(side="right", padx=5)
+        ttk.Button(self.top_frame, text="Планировщик" if self.current_lang == "ru" else "Planner",
+                   command=self._show_planner, bootstyle="secondary").pack(side="right", padx=5)
 
     def _create_input_area(self):
         self.main_frame = ttk.Frame(self.center_frame, padding=5)
@@ -123,17 +148,22 @@ class AppUI:
         self.canvas = tk.Canvas(self.main_frame, highlightthickness=0, bg=self.style.colors.bg)
         self.v_scrollbar = ttk.Scrollbar(self.main_frame, orient="vertical", command=self.canvas.yview,
                                          bootstyle="round-primary")
-        self.canvas.configure(yscrollcommand=self.v_scrollbar.set)
         self.v_scrollbar.pack(side="right", fill="y")
         self.canvas.pack(side="left", fill="both", expand=True)
-        self.input_frame = ttk.Frame(self.canvas, padding=5)
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.input_frame, anchor="nw")
+        # Секции формул создаются только для видимой части холста и переиспользуются при прокрутке
+        self.section_list = SectionList(self.canvas, len(self.formula_ids), self._create_section,
+                                        self._bind_section, self._estimate_section_height)
+        self.canvas.configure(yscrollcommand=self._on_canvas_scroll)
 
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
         self.canvas.bind_all("<Button-4>", self._on_mousewheel)
         self.canvas.bind_all("<Button-5>", self._on_mousewheel)
-        self.input_frame.bind("<Configure>", self._update_scrollregion)
-        self.input_frame.bind("<Enter>", lambda e: self.canvas.focus_set())
+        self.canvas.bind("<Configure>", self._update_scrollregion)
+        self.canvas.bind("<Enter>", lambda e: self.canvas.focus_set())
+
+    def _on_canvas_scroll(self, first, last):
+        self.v_scrollbar.set(first, last)
+        self.section_list.on_scroll(first, last)
 
     def _on_mousewheel(self, event):
         if self.canvas.yview() == (0.0, 1.0):
@@ -143,9 +173,7 @@ class AppUI:
         return "break"
 
     def _update_scrollregion(self, event=None):
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        self.canvas.itemconfig(self.canvas_window, width=self.canvas.winfo_width())
-        self.canvas.update_idletasks()
+        self.section_list.schedule()
 
     def _create_buttons(self):
         self.button_frame = ttk.Frame(self.center_frame, padding=5)
@@ -172,6 +200,10 @@ class AppUI:
                                    bg=self.style.colors.inputbg, fg=self.style.colors.inputfg, borderwidth=1, relief="flat")
         self.status_text.pack(side="right", padx=5, fill="x", expand=True)
         self.status_text.configure(state="disabled")
+        # Показывается рядом со строкой статуса, пока выполняются фоновые задачи
+        self.cancel_button = ttk.Button(self.result_header_frame, text="✕", width=2,
+                                        command=self._cancel_tasks, bootstyle="danger")
+        self.cancel_tooltip = ToolTip(self.cancel_button, "Отменить операцию" if self.current_lang == "ru" else "Cancel operation")
         self.result_text = scrolledtext.ScrolledText(self.result_frame, height=10, wrap=tk.WORD,
                                                      font=("Roboto", 10), bg=self.style.colors.inputbg,
                                                      fg=self.style.colors.inputfg, borderwidth=1, relief="flat")
@@ -195,206 +227,67 @@ class AppUI:
         self._update_footer_layout()
 
     def _validate_entry(self, value: str) -> bool:
-        if not value or value.endswith("."):
-            return False
-        pattern = r'^(0\.\d{1,2}|[1-9]\d*(\.\d{1,2})?)$'
-        if not re.match(pattern, value):
-            return False
-        try:
-            num = float(value)
-            if num <= 0:
-                return False
-            return True
-        except ValueError:
-            return False
-
-    def _update_entry_style(self, entry: ttk.Entry, value: str):
-        entry.configure(bootstyle="info" if self._validate_entry(value) else "danger")
+        return is_valid_value(value)
 
     def _get_field_names(self, fields: list) -> list:
         return [field[0].rstrip(':') for field in fields]
 
-    def _calculate_example(self, formula_title: str, fields: list) -> str:
-        field_names = self._get_field_names(fields)
-        num_fields = len(field_names)
-        translations = {
-            "ru": {
-                "CTR (Кликабельность)": f"CTR = ({field_names[1]} / {field_names[0]}) × 100%" if num_fields >= 2 else "Формула не применима",
-                "CPC (Стоимость за клик)": f"CPC = {field_names[0]} / {field_names[1]}" if num_fields >= 2 else "Формула не применима",
-                "CPA (Стоимость за действие)": f"CPA = {field_names[0]} / {field_names[1]}" if num_fields >= 2 else "Формула не применима",
-                "ROAS (Возврат затрат)": f"ROAS = {field_names[0]} / {field_names[1]}" if num_fields >= 2 else "Формула не применима",
-                "CR (Конверсия)": f"CR = ({field_names[1]} / {field_names[0]}) × 100%" if num_fields >= 2 else "Формула не применима",
-                "LTV (Пожизненная ценность клиента)": f"LTV = {field_names[0]} × {field_names[1]} × {field_names[2]}" if num_fields >= 3 else "Формула не применима",
-                "CPL (Стоимость за лид)": f"CPL = {field_names[0]} / {field_names[1]}" if num_fields >= 2 else "Формула не применима",
-                "RPM (Доход на тысячу показов)": f"RPM = ({field_names[0]} / {field_names[1]}) × 1000" if num_fields >= 2 else "Формула не применима"
-            },
-            "en": {
-                "CTR (Click-Through Rate)": f"CTR = ({field_names[1]} / {field_names[0]}) × 100%" if num_fields >= 2 else "Formula not applicable",
-                "CPC (Cost Per Click)": f"CPC = {field_names[0]} / {field_names[1]}" if num_fields >= 2 else "Formula not applicable",
-                "CPA (Cost Per Action)": f"CPA = {field_names[0]} / {field_names[1]}" if num_fields >= 2 else "Formula not applicable",
-                "ROAS (Return on Ad Spend)": f"ROAS = {field_names[0]} / {field_names[1]}" if num_fields >= 2 else "Formula not applicable",
-                "CR (Conversion Rate)": f"CR = ({field_names[1]} / {field_names[0]}) × 100%" if num_fields >= 2 else "Formula not applicable",
-                "LTV (Lifetime Value)": f"LTV = {field_names[0]} × {field_names[1]} × {field_names[2]}" if num_fields >= 3 else "Formula not applicable",
-                "CPL (Cost Per Lead)": f"CPL = {field_names[0]} / {field_names[1]}" if num_fields >= 2 else "Formula not applicable",
-                "RPM (Revenue Per Mille)": f"RPM = ({field_names[0]} / {field_names[1]}) × 1000" if num_fields >= 2 else "Formula not applicable"
-            }
-        }
-        return translations[self.current_lang].get(formula_title, "Формула не определена" if self.current_lang == "ru" else "Formula not defined")
+    def _calculate_example(self, metric_id: str, fields: list) -> str:
+        return METRICS[metric_id].example.format(*self._get_field_names(fields))
 
     def _get_font_size(self, base_size: int) -> int:
         window_width = self.root.winfo_width()
         scale_factor = window_width / 600
         return max(11, min(12, int(base_size * scale_factor)))
 
+    def _create_section(self) -> FormulaSection:
+        return FormulaSection(self.canvas, self.vcmd, self._toggle_collapse)
+
+    def _estimate_section_height(self, index: int) -> int:
+        # Оценка для ещё не показанных секций: заголовок и пример, при развёрнутой секции — описание и строки полей
+        if self.collapsed_state.get(self.section_titles[self.formula_ids[index]], False):
+            return 80
+        fields = len(METRICS[self.formula_ids[index]].inputs)
+        rows = fields if self.is_single_column else (fields + 1) // 2
+        return 110 + 36 * rows
+
+    def _bind_section(self, section: FormulaSection, index: int):
+        """Подключает секцию из пула к формуле index и приводит её к текущему языку, раскладке и заполнению."""
+        metric_id, formula_title, formula_desc, fields = self.localized[index]
+        section.bind(metric_id, [(name, self.entries[name]) for _, name, _ in fields])
+        section.set_texts(formula_title, formula_desc, self._calculate_example(metric_id, fields), fields,
+                          self.current_lang)
+        section.set_collapsed(self.collapsed_state.get(formula_title, False))
+        section.set_single_column(self.is_single_column)
+        if self.section_layout:
+            section.set_fonts(self.section_layout[0], self.section_layout[1])
+            section.set_wraplength(self.section_layout[2])
+        self._update_section_progress(section)
+
+    def _retext_sections(self):
+        """Тексты формул на текущем языке; состояние сворачивания хранится по названию формулы."""
+        self.localized = localized_formulas(self.current_lang)
+        self.section_titles = {metric_id: formula_title for metric_id, formula_title, _, _ in self.localized}
+        for index, section in self.section_list.active.items():
+            self._bind_section(section, index)
+        self.section_list.invalidate()
+
     def update_layout(self, force_update=False):
         window_width = self.root.winfo_width()
         window_height = self.root.winfo_height()
         new_is_single_column = window_width <= 480
 
-        if not self.entries or self.is_single_column != new_is_single_column or force_update:
-            current_values = {name: entry.get() for name, entry in self.entries.items() if isinstance(entry, ttk.Entry)}
-            self.entries.clear()
-            self.formula_indicators.clear()
-            self.formula_progress.clear()
-            self.collapse_buttons.clear()
-            # Очищаем старые разделители
-            for sep in self.separators.values():
-                sep.destroy()
-            self.separators.clear()
-            for widget in self.input_frame.winfo_children():
-                widget.destroy()
-
-            row = 0
-            for formula_title, formula_desc, fields in FORMULAS[self.current_lang]:
-                # Начало формулы
-                title_frame = ttk.Frame(self.input_frame)
-                title_frame.grid(row=row, column=0, columnspan=4, pady=(5, 2), sticky="ew")
-                # Используем grid для точного размещения
-                collapse_button = ttk.Button(title_frame,
-                                             text="▲" if self.collapsed_state.get(formula_title, False) else "▼",
-                                             width=2, command=lambda ft=formula_title: self._toggle_collapse(ft))
-                collapse_button.grid(row=0, column=0, padx=(0, 2), sticky="w")
-                self.collapse_buttons[formula_title] = collapse_button
-                title_label = ttk.Label(title_frame, text=formula_title,
-                                        font=("Roboto", self._get_font_size(14), "bold"), bootstyle="primary-bold")
-                title_label.grid(row=0, column=1, padx=(2, 2), sticky="w")  # Заголовок идёт после кнопки
-                indicator = ttk.Label(title_frame, text="*" if self.current_lang == "ru" else "*",
-                                      font=("Roboto", self._get_font_size(14)), bootstyle="warning")
-                indicator.grid(row=0, column=2, padx=(2, 2), sticky="w")  # Индикатор сразу после заголовка
-                self.formula_indicators[formula_title] = indicator
-                progress = ttk.Label(title_frame, text=f"0/{len(fields)}", font=("Roboto", self._get_font_size(12)))
-                progress.grid(row=0, column=3, padx=(0, 2), sticky="w")  # Прогресс сразу после индикатора
-                self.formula_progress[formula_title] = progress
-                # Убираем растяжение заголовка
-                title_frame.grid_columnconfigure(1, weight=0)  # Отключаем растяжение для заголовка
-                title_frame.grid_columnconfigure(2, weight=0)  # Отключаем растяжение для индикатора
-                title_frame.grid_columnconfigure(3, weight=0)  # Отключаем растяжение для прогресса
-                row += 1
-
-                example = self._calculate_example(formula_title, fields)
-                example_label = ttk.Label(self.input_frame, text=example,
-                                          font=("Roboto", self._get_font_size(12), "italic"),
-                                          bootstyle="secondary", wraplength=window_width - 50)  # Адаптивная обертка
-                example_label.grid(row=row, column=0, columnspan=4, pady=(0, 5), sticky="ew")
-                row += 1
-
-                # Если формула развёрнута, добавляем описание и поля ввода
-                if not self.collapsed_state.get(formula_title, False):
-                    desc_label = ttk.Label(self.input_frame, text=formula_desc,
-                                           font=("Roboto", self._get_font_size(12), "italic"),
-                                           bootstyle="secondary", wraplength=window_width - 50)  # Адаптивная обертка
-                    desc_label.grid(row=row, column=0, columnspan=4, pady=2, sticky="ew")
-                    row += 1
-
-                    if new_is_single_column:
-                        # В узком режиме каждое поле на отдельной строке
-                        for label_text, entry_name, tooltip in fields:
-                            ttk.Label(self.input_frame, text=label_text, font=("Roboto", self._get_font_size(12))).grid(
-                                row=row, column=0, padx=5, pady=2, sticky="w")
-                            entry = ttk.Entry(self.input_frame, bootstyle="info")
-                            entry.grid(row=row, column=1, columnspan=3, padx=5, pady=2, sticky="ew")  # Растягиваем поле
-                            if entry_name in current_values:
-                                entry.insert(0, current_values[entry_name])
-                            entry.configure(validate="key", validatecommand=self.vcmd)
-                            new_tooltip = f"{tooltip}\nФормат: Число > 0 (например, 0.1 или 5.5)" if self.current_lang == "ru" else f"{tooltip}\nFormat: Number > 0 (e.g., 0.1 or 5.5)"
-                            ToolTip(entry, new_tooltip)
-                            print(f"Применён ToolTip для {entry_name} с текстом: {new_tooltip}")  # Отладочный вывод
-                            self.entries[entry_name] = entry
-                            entry.bind("<KeyRelease>", lambda event, e=entry: self._on_entry_change(event, e))
-                            entry.bind("<FocusOut>", lambda event, e=entry: self._on_entry_change(event, e))
-                            row += 1
-                    else:
-                        # В широком режиме первые два поля на одной строке
-                        field_row = row
-                        ttk.Label(self.input_frame, text=fields[0][0], font=("Roboto", self._get_font_size(12))).grid(
-                            row=field_row, column=0, padx=5, pady=2, sticky="w")
-                        entry1 = ttk.Entry(self.input_frame, bootstyle="info")
-                        entry1.grid(row=field_row, column=1, padx=5, pady=2, sticky="ew")  # Растягиваем поле
-                        if fields[0][1] in current_values:
-                            entry1.insert(0, current_values[fields[0][1]])
-                        entry1.configure(validate="key", validatecommand=self.vcmd)
-                        new_tooltip = f"{fields[0][2]}\nФормат: Число > 0 (например, 0.1 или 5.5)" if self.current_lang == "ru" else f"{fields[0][2]}\nFormat: Number > 0 (e.g., 0.1 or 5.5)"
-                        ToolTip(entry1, new_tooltip)
-                        print(f"Применён ToolTip для {fields[0][1]} с текстом: {new_tooltip}")  # Отладочный вывод
-                        self.entries[fields[0][1]] = entry1
-                        entry1.bind("<KeyRelease>", lambda event, e=entry1: self._on_entry_change(event, e))
-                        entry1.bind("<FocusOut>", lambda event, e=entry1: self._on_entry_change(event, e))
-
-                        ttk.Label(self.input_frame, text=fields[1][0], font=("Roboto", self._get_font_size(12))).grid(
-                            row=field_row, column=2, padx=5, pady=2, sticky="w")
-                        entry2 = ttk.Entry(self.input_frame, bootstyle="info")
-                        entry2.grid(row=field_row, column=3, padx=5, pady=2, sticky="ew")
-                        if fields[1][1] in current_values:
-                            entry2.insert(0, current_values[fields[1][1]])
-                        entry2.configure(validate="key", validatecommand=self.vcmd)
-                        new_tooltip = f"{fields[1][2]}\nФормат: Число > 0 (например, 0.1 или 5.5)" if self.current_lang == "ru" else f"{fields[1][2]}\nFormat: Number > 0 (e.g., 0.1 or 5.5)"
-                        ToolTip(entry2, new_tooltip)
-                        print(f"Применён ToolTip для {fields[1][1]} с текстом: {new_tooltip}")  # Отладочный вывод
-                        self.entries[fields[1][1]] = entry2
-                        entry2.bind("<KeyRelease>", lambda event, e=entry2: self._on_entry_change(event, e))
-                        entry2.bind("<FocusOut>", lambda event, e=entry2: self._on_entry_change(event, e))
-
-                        # Если есть третье поле, добавляем его на следующей строке
-                        if len(fields) > 2:
-                            field_row += 1
-                            ttk.Label(self.input_frame, text=fields[2][0],
-                                      font=("Roboto", self._get_font_size(12))).grid(row=field_row, column=0, padx=5,
-                                                                                     pady=2, sticky="w")
-                            entry3 = ttk.Entry(self.input_frame, bootstyle="info")
-                            entry3.grid(row=field_row, column=1, columnspan=3, padx=5, pady=2, sticky="ew")
-                            if fields[2][1] in current_values:
-                                entry3.insert(0, current_values[fields[2][1]])
-                            entry3.configure(validate="key", validatecommand=self.vcmd)
-                            new_tooltip = f"{fields[2][2]}\nФормат: Число > 0 (например, 0.1 или 5.5)" if self.current_lang == "ru" else f"{fields[2][2]}\nFormat: Number > 0 (e.g., 0.1 or 5.5)"
-                            ToolTip(entry3, new_tooltip)
-                            print(f"Применён ToolTip для {fields[2][1]} с текстом: {new_tooltip}")  # Отладочный вывод
-                            self.entries[fields[2][1]] = entry3
-                            entry3.bind("<KeyRelease>", lambda event, e=entry3: self._on_entry_change(event, e))
-                            entry3.bind("<FocusOut>", lambda event, e=entry3: self._on_entry_change(event, e))
-
-                        # Обновляем row на основе последней строки полей
-                        row = field_row + 1
-
-                # Добавляем разделитель после всей формулы
-                separator = ttk.Separator(self.input_frame, orient="horizontal")
-                separator.grid(row=row, column=0, columnspan=4, sticky="ew", pady=5)
-                self.separators[formula_title] = separator
-                row += 1  # Увеличиваем row после разделителя
-
+        if force_update:
+            self._retext_sections()
+        layout = (self._get_font_size(14), self._get_font_size(12), window_width - 50)  # Адаптивная обёртка
+        if self.is_single_column != new_is_single_column or layout != self.section_layout:
             self.is_single_column = new_is_single_column
-
-        # Настраиваем веса колонок для адаптивности
-        for child in self.input_frame.winfo_children():
-            if isinstance(child, ttk.Entry):
-                child.grid_configure(sticky="ew")
-            elif isinstance(child, ttk.Label) and not isinstance(child, ttk.Separator):
-                child.grid_configure(sticky="w")
-            elif isinstance(child, ttk.Separator) or isinstance(child, ttk.Frame):
-                child.grid_configure(sticky="ew")
-        self.input_frame.grid_columnconfigure(0, weight=0)
-        self.input_frame.grid_columnconfigure(1, weight=1)  # Растяжение первого поля
-        self.input_frame.grid_columnconfigure(2, weight=0)
-        self.input_frame.grid_columnconfigure(3, weight=1)  # Растяжение второго поля
+            self.section_layout = layout
+            for section in self.section_list.active.values():
+                section.set_single_column(new_is_single_column)
+                section.set_fonts(layout[0], layout[1])
+                section.set_wraplength(layout[2])
+            self.section_list.invalidate()
         self._update_scrollregion()
         self._check_fields()
 
@@ -417,10 +310,19 @@ class AppUI:
         for i in range(col):
             self.bottom_frame.grid_columnconfigure(i, weight=1)
 
-    def _on_entry_change(self, event, entry: ttk.Entry):
-        value = entry.get().strip()
-        self._update_entry_style(entry, value)
-        self._check_fields()
+    def _on_value_change(self, name: str):
+        # Правка одного поля: пересчитываются только оно и его формулы, виджеты — только при смене состояния
+        self._schedule_live_update(name)
+        change = self.validation.update(name, self.entries[name].get())
+        if change is None:
+            return
+        for metric_id, filled in change.formulas:
+            section = self.section_list.section(self.formula_index[metric_id])
+            if section is not None:
+                section.set_field_valid(name, change.valid)
+                section.set_progress(filled)
+        if change.complete_changed:
+            self.calculate_button.configure(state="normal" if self.validation.any_complete else "disabled")
 
     def _switch_theme(self, event=None):
         self.current_theme = self.theme_var.get()
@@ -431,41 +333,82 @@ class AppUI:
         self.status_text.configure(bg=self.style.colors.inputbg, fg=self.style.colors.inputfg)
         self._save_ui_state()
 
+    def _schedule_live_update(self, name: str):
+        # Серия нажатий откладывает пересчёт: один расчёт на паузу во вводе
+        self.live_changes.add(name)
+        if self.live_after_id is not None:
+            self.root.after_cancel(self.live_after_id)
+        self.live_after_id = self.root.after(LIVE_DELAY_MS, self._live_update)
+
+    def _live_update(self):
+        self.live_after_id = None
+        # Некорректные и нулевые значения считаются незаполненными
+        changes = {name: float(self.entries[name].get().strip()) if self.validation.valid(name) else None
+                   for name in self.live_changes}
+        self.live_changes.clear()
+        diff = self.evaluator.update(changes)
+        self.last_results = self.evaluator.result_list()
+        if not self.results_live:
+            self._render_live_results()
+        elif diff.changed or diff.removed:
+            self._patch_results(diff)
+
+    def _insert_result_line(self, index, result):
+        tag = f"metric_{result.metric_id}"
+        self.result_text.insert(index, f"{metric_title(result.metric_id, self.current_lang)}: ", ("default", tag),
+                                f"{format_result(result, self.current_lang)}\n", (result.band, tag))
+
+    def _render_live_results(self):
+        self.result_text.configure(state="normal")
+        self.result_text.delete(1.0, tk.END)
+        for result in self.last_results:
+            self._insert_result_line(tk.END, result)
+        self.result_text.configure(state="disabled")
+        self.results_live = True
+
+    def _patch_results(self, diff: ResultDiff):
+        """Заменяет, добавляет и удаляет только строки изменившихся метрик."""
+        self.result_text.configure(state="normal")
+        for metric_id in diff.removed:
+            ranges = self.result_text.tag_ranges(f"metric_{metric_id}")
+            if ranges:
+                self.result_text.delete(ranges[0], ranges[-1])
+        for result in diff.changed:
+            ranges = self.result_text.tag_ranges(f"metric_{result.metric_id}")
+            if ranges:
+                index = self.result_text.index(ranges[0])
+                self.result_text.delete(ranges[0], ranges[-1])
+            else:
+                index = self._result_line_index(result.metric_id)
+            self._insert_result_line(index, result)
+        self.result_text.configure(state="disabled")
+
+    def _result_line_index(self, metric_id: str):
+        # Новая строка встаёт перед первой показанной метрикой, идущей после неё в порядке формул
+        for next_id in self.formula_ids[self.formula_index[metric_id] + 1:]:
+            ranges = self.result_text.tag_ranges(f"metric_{next_id}")
+            if ranges:
+                return self.result_text.index(ranges[0])
+        return tk.END
+
     def _switch_language(self, event):
         self.current_lang = self.lang_var.get()
         self._update_texts()
         self.update_layout(force_update=True)
+        if self.results_live:
+            self._render_live_results()
         self._save_ui_state()
 
-    def _check_fields(self, *args):
-        if not self.entries:
-            self.calculate_button.configure(state="disabled")
-            return
+    def _update_section_progress(self, section: FormulaSection):
+        for name in section.entries:
+            section.set_field_valid(name, self.validation.valid(name))
+        section.set_progress(self.validation.filled(section.metric_id))
 
-        fully_filled_formulas = []
-        for formula_title, _, fields in FORMULAS[self.current_lang]:
-            filled_fields = 0
-            total_fields = len(fields)
-            for _, entry_name, _ in fields:
-                if entry_name in self.entries and isinstance(self.entries[entry_name], ttk.Entry):
-                    value = self.entries[entry_name].get().strip()
-                    if value and self._validate_entry(value):
-                        filled_fields += 1
-                    self._update_entry_style(self.entries[entry_name], value)
-            if filled_fields == total_fields:
-                fully_filled_formulas.append(formula_title)
-            indicator = self.formula_indicators.get(formula_title)
-            progress = self.formula_progress.get(formula_title)
-            if indicator and progress:
-                filled = filled_fields == total_fields
-                indicator.configure(text="✓" if self.current_lang == "ru" else "✓" if filled else "*" if self.current_lang == "ru" else "*",
-                                    bootstyle="success" if filled else "warning")
-                progress.configure(text=f"{filled_fields}/{total_fields}")
-                title_label = indicator.master.winfo_children()[1]
-                title_label.configure(bootstyle="success-bold" if filled else "primary-bold")
-
-        self.calculate_button.configure(state="normal" if fully_filled_formulas else "disabled")
-        logging.debug(f"Fully filled formulas: {fully_filled_formulas}")
+    def _check_fields(self, *args):
+        # Состояние полей поддерживает ValidationModel; здесь показанные секции и кнопка приводятся к нему
+        for section in self.section_list.active.values():
+            self._update_section_progress(section)
+        self.calculate_button.configure(state="normal" if self.validation.any_complete else "disabled")
 
     def _on_configure(self, event):
         if event.widget == self.root and (abs(event.width - self.last_width) > 10 or abs(event.height - self.last_height) > 10):
@@ -481,9 +424,12 @@ class AppUI:
         self.update_pending = False
         self._save_ui_state()
 
-    def _toggle_collapse(self, formula_title: str):
+    def _toggle_collapse(self, metric_id: str):
+        formula_title = self.section_titles[metric_id]
         self.collapsed_state[formula_title] = not self.collapsed_state.get(formula_title, False)
-        self.update_layout(force_update=True)
+        index = self.formula_index[metric_id]
+        self.section_list.section(index).set_collapsed(self.collapsed_state[formula_title])
+        self.section_list.invalidate(index)
         self._save_ui_state()
         self.data_manager.save_collapsed_state(self.collapsed_state)
 
@@ -499,8 +445,6 @@ class AppUI:
         invalid_fields = []
         zero_fields = []
         for entry_name, entry in self.entries.items():
-            if not isinstance(entry, ttk.Entry):
-                continue
             value = entry.get().strip()
             if value:
                 try:
@@ -526,22 +470,32 @@ class AppUI:
             self.status_text.configure(state="disabled")
             return
 
-        results, notifications = calculate_metrics(self.entries, self.current_lang)
+        # Значения снимаются в потоке Tk: фоновая задача не обращается к переменным виджетов
+        values = {name: entry.get().strip() for name, entry in self.entries.items()}
+        lang = self.current_lang
+        self.tasks.submit(calculate_metrics, values, lang, label="Расчёт" if lang == "ru" else "Calculation",
+                          on_done=lambda outcome: self._on_calculated(values, lang, outcome),
+                          on_error=self._on_task_error)
+
+    def _on_calculated(self, values: Dict[str, str], lang: str, outcome):
+        results, notifications = outcome
         self.last_results = results
         self._display_results(results, notifications)
-        self.data_manager.add_to_history(self.entries, self.result_text.get(1.0, tk.END).strip())
-        self.data_manager.save_history()
+        # Без подписи: запись в историю не заменяет в строке статуса итог расчёта
+        self.tasks.submit(self.data_manager.add_to_history, values, self.result_text.get(1.0, tk.END).strip(),
+                          [(r.metric_id, r.value, r.band) for r in results], lang, on_error=self._on_task_error,
+                          writes=True)
 
     def _display_results(self, results, notifications):
         self.result_text.configure(state="normal")
         self.result_text.delete(1.0, tk.END)
         if results:
-            for title, value, tag in results:
-                self.result_text.insert(tk.END, f"{title}: ", "default")
-                self.result_text.insert(tk.END, f"{value}\n", tag)
+            for result in results:
+                self._insert_result_line(tk.END, result)
         else:
             self.result_text.insert(tk.END, "Нет рассчитанных метрик" if self.current_lang == "ru" else "No calculated metrics", "warning")
         self.result_text.configure(state="disabled")
+        self.results_live = bool(results)
 
         self.status_text.configure(state="normal")
         self.status_text.delete(1.0, tk.END)
@@ -587,9 +541,10 @@ class AppUI:
         self.checkbox_frame.pack(side="left", fill="x", expand=True)
 
         self.metric_vars = {}
-        for title, _, _ in self.last_results:
-            self.metric_vars[title] = tk.IntVar(value=1)
-            ttk.Checkbutton(self.checkbox_frame, text=title, variable=self.metric_vars[title]).pack(side="left", padx=2)
+        for result in self.last_results:
+            self.metric_vars[result.metric_id] = tk.IntVar(value=1)
+            ttk.Checkbutton(self.checkbox_frame, text=metric_title(result.metric_id, self.current_lang),
+                            variable=self.metric_vars[result.metric_id]).pack(side="left", padx=2)
 
         update_button = ttk.Button(control_frame,
                                    text="Обновить график" if self.current_lang == "ru" else "Update Chart",
@@ -613,7 +568,8 @@ class AppUI:
             plt.close(self.chart_fig)
             self.chart_fig = None
 
-        selected_metrics = [title for title, _, _ in self.last_results if self.metric_vars[title].get() == 1]
+        selected_metrics = [result.metric_id for result in self.last_results
+                            if self.metric_vars[result.metric_id].get() == 1]
         logging.debug(f"Selected metrics: {selected_metrics}")
         if not selected_metrics:
             self.status_text.configure(state="normal")
@@ -650,18 +606,21 @@ class AppUI:
             filetypes=[("PNG files", "*.png"), ("PDF files", "*.pdf"), ("SVG files", "*.svg"), ("All files", "*.*")],
             title="Сохранить график как" if self.current_lang == "ru" else "Save Chart As"
         )
-        if file_path:
-            if self.chart_fig:
-                if file_path.endswith('.pdf'):
-                    self.chart_fig.savefig(file_path, format='pdf', dpi=300, bbox_inches='tight')
-                elif file_path.endswith('.svg'):
-                    self.chart_fig.savefig(file_path, format='svg', bbox_inches='tight')
-                else:
-                    self.chart_fig.savefig(file_path, dpi=300, bbox_inches='tight')
-                self.status_text.configure(state="normal")
-                self.status_text.delete(1.0, tk.END)
-                self.status_text.insert(tk.END, "График сохранён как {}\n".format(file_path) if self.current_lang == "ru" else "Chart saved as {}\n".format(file_path), "success")
-                self.status_text.configure(state="disabled")
+        if file_path and self.chart_fig:
+            # Растеризация в 300 dpi — счётная работа: фигура копируется pickle и сохраняется в отдельном процессе
+            try:
+                data = pickle.dumps(self.chart_fig)
+            except Exception as e:
+                logging.error(f"Failed to serialize chart: {e}")
+                self._on_task_error(e)
+                return
+            self.tasks.submit_cpu(export_figure, data, file_path,
+                                  label="Сохранение графика" if self.current_lang == "ru" else "Saving chart",
+                                  on_done=self._on_chart_saved, on_error=self._on_task_error, writes=True)
+
+    def _on_chart_saved(self, file_path: str):
+        self._set_status("График сохранён как {}\n".format(file_path) if self.current_lang == "ru"
+                         else "Chart saved as {}\n".format(file_path), "success")
 
     def copy_results(self):
         try:
@@ -684,12 +643,11 @@ class AppUI:
 
     def clear(self):
         for entry in self.entries.values():
-            if isinstance(entry, ttk.Entry):
-                entry.delete(0, tk.END)
-                self._update_entry_style(entry, "")
+            entry.delete(0, tk.END)
         self.result_text.configure(state="normal")
         self.result_text.delete(1.0, tk.END)
         self.result_text.configure(state="disabled")
+        self.results_live = False
         self.status_text.configure(state="normal")
         self.status_text.delete(1.0, tk.END)
         self.status_text.insert(tk.END, "Все поля очищены" if self.current_lang == "ru" else "All fields cleared")
@@ -697,25 +655,33 @@ class AppUI:
         self._check_fields()
 
     def save(self):
-        try:
-            logging.debug(f"Entries before save: {self.entries}")
-            entries_data = {name: entry.get().strip() for name, entry in self.entries.items() if isinstance(entry, ttk.Entry)}
-            logging.debug(f"Filtered entries_data for save: {entries_data}")
-            status = self.data_manager.save(entries_data, self.result_text.get(1.0, tk.END).strip(), self.current_lang)
-            self.status_text.configure(state="normal")
-            self.status_text.delete(1.0, tk.END)
-            self.status_text.insert(tk.END, status, "success" if "успешно" in status or "successfully" in status else "warning")
-        except IOError as e:
-            self.status_text.configure(state="normal")
-            self.status_text.delete(1.0, tk.END)
-            self.status_text.insert(tk.END, f"Ошибка сохранения: {e}\n" if self.current_lang == "ru" else f"Save error: {e}\n", "danger")
-        finally:
-            self.status_text.configure(state="disabled")
+        logging.debug(f"Entries before save: {self.entries}")
+        entries_data = {name: entry.get().strip() for name, entry in self.entries.items()}
+        logging.debug(f"Filtered entries_data for save: {entries_data}")
+        self.tasks.submit(self._save_worker, entries_data, self.result_text.get(1.0, tk.END).strip(),
+                          self.current_lang, label="Сохранение" if self.current_lang == "ru" else "Saving",
+                          on_done=self._on_saved, on_error=self._on_save_error, with_task=True, writes=True)
+
+    def _save_worker(self, task: Task, entries_data: Dict[str, str], result_text: str, lang: str) -> str:
+        # Выполняется в фоне; после commit файл пишется целиком и отмена больше не принимается
+        task.commit()
+        return self.data_manager.save(entries_data, result_text, lang)
+
+    def _on_saved(self, status: str):
+        self._set_status(status, "success" if "успешно" in status or "successfully" in status else "warning")
+
+    def _on_save_error(self, e: BaseException):
+        self._set_status(f"Ошибка сохранения: {e}\n" if self.current_lang == "ru" else f"Save error: {e}\n", "danger")
 
     def load(self):
+        logging.debug("Starting load operation")
+        self.tasks.submit(self.data_manager.load, self.current_lang,
+                          label="Загрузка" if self.current_lang == "ru" else "Loading",
+                          on_done=self._on_loaded, on_error=self._on_load_error)
+
+    def _on_loaded(self, outcome):
+        loaded_data, results, status = outcome
         try:
-            logging.debug("Starting load operation")
-            loaded_data, status = self.data_manager.load(self.entries, self.result_text, self.current_lang)
             logging.debug(f"Loaded data: {loaded_data}, Status: {status}")
             if not loaded_data and not status:
                 raise ValueError("Файл пуст или содержит некорректные данные")
@@ -728,9 +694,15 @@ class AppUI:
                 self.status_text.delete(1.0, tk.END)
                 self.status_text.insert(tk.END, status + "\n", "danger")
             else:
+                if loaded_data or results:
+                    self.result_text.configure(state="normal")
+                    self.result_text.delete(1.0, tk.END)
+                    self.result_text.insert(tk.END, results)
+                    self.result_text.configure(state="disabled")
+                    self.results_live = False
                 logging.debug(f"Entries before update: {self.entries}")
                 for entry_name, value in loaded_data.items():
-                    if entry_name in self.entries and isinstance(self.entries[entry_name], ttk.Entry):
+                    if entry_name in self.entries:
                         self.entries[entry_name].delete(0, tk.END)
                         self.entries[entry_name].insert(0, value)
                 logging.debug(f"Entries after update: {self.entries}")
@@ -738,23 +710,85 @@ class AppUI:
                 self.status_text.configure(state="normal")
                 self.status_text.delete(1.0, tk.END)
                 self.status_text.insert(tk.END, status, "success")
-        except FileNotFoundError as e:
-            self.status_text.configure(state="normal")
-            self.status_text.delete(1.0, tk.END)
-            self.status_text.insert(tk.END, f"Файл не найден: {e}\n" if self.current_lang == "ru" else f"File not found: {e}\n", "danger")
-        except IOError as e:
-            self.status_text.configure(state="normal")
-            self.status_text.delete(1.0, tk.END)
-            self.status_text.insert(tk.END, f"Ошибка ввода-вывода: {e}\n" if self.current_lang == "ru" else f"IO error: {e}\n", "danger")
         except ValueError as e:
-            self.status_text.configure(state="normal")
-            self.status_text.delete(1.0, tk.END)
-            self.status_text.insert(tk.END, f"Ошибка данных: {e}\n" if self.current_lang == "ru" else f"Data error: {e}\n", "danger")
+            self._on_load_error(e)
         finally:
             self.status_text.configure(state="disabled")
 
+    def _on_load_error(self, e: BaseException):
+        if isinstance(e, FileNotFoundError):
+            msg = f"Файл не найден: {e}\n" if self.current_lang == "ru" else f"File not found: {e}\n"
+        elif isinstance(e, IOError):
+            msg = f"Ошибка ввода-вывода: {e}\n" if self.current_lang == "ru" else f"IO error: {e}\n"
+        else:
+            msg = f"Ошибка данных: {e}\n" if self.current_lang == "ru" else f"Data error: {e}\n"
+        self._set_status(msg, "danger")
+
+    def _set_status(self, text: str, tag: str = ""):
+        self.status_text.configure(state="normal")
+        self.status_text.delete(1.0, tk.END)
+        self.status_text.insert(tk.END, text, tag)
+        self.status_text.configure(state="disabled")
+        self.tasks_status = None
+
+    def _on_task_error(self, e: BaseException):
+        self._set_status(f"Ошибка: {e}\n" if self.current_lang == "ru" else f"Error: {e}\n", "danger")
+
+    def _show_tasks(self, tasks: List[Task]):
+        """Выводит выполняющиеся фоновые задачи в строку статуса и показывает кнопку отмены."""
+        tasks = self._visible_tasks(tasks)
+        if not tasks:
+            self.cancel_button.pack_forget()
+            self.tasks_status = None
+            return
+        parts = []
+        for task in tasks:
+            if task.progress:
+                done, total = task.progress
+                parts.append(f"{task.label}… {done * 100 // max(total, 1)}%")
+            else:
+                parts.append(f"{task.label}… {int(task.elapsed())} {'с' if self.current_lang == 'ru' else 's'}")
+        text = " | ".join(parts)
+        if text != self.tasks_status:  # Опрос идёт часто, текст меняется раз в секунду
+            self._set_status(text + "\n", "warning")
+            self.tasks_status = text
+        # Кнопка доступна, только пока отмена ничего не оставит после себя: не для начатой записи файла
+        if not any(task.cancellable for task in tasks):
+            self.cancel_button.pack_forget()
+        elif not self.cancel_button.winfo_ismapped():
+            self.cancel_button.pack(side="right", before=self.status_text)
+
+    @staticmethod
+    def _visible_tasks(tasks: List[Task]) -> List[Task]:
+        # Задачи без подписи служебные (запись в историю, чтение окна истории): пользователь их не видит
+        # и не отменяет; отменённые уже отмечены в статусе
+        return [task for task in tasks if task.label and not task.cancelled]
+
+    def _cancel_tasks(self):
+        cancelled = sum(task.cancel() for task in self._visible_tasks(self.tasks.active))
+        if cancelled:
+            self._set_status("Операция отменена\n" if self.current_lang == "ru" else "Operation cancelled\n", "warning")
+
     def _show_history(self):
-        self.data_manager.show_history(self.root, self.entries, self.result_text, self.current_lang, self._check_fields)
+        HistoryWindow(self.root, self.data_manager.history_store, self.current_lang, self._apply_history_record,
+                      self.tasks, cursor=self.data_manager.load_history_cursor(),
+                      on_select=self.data_manager.save_history_cursor)
+
+    def _apply_history_record(self, record):
+        for name, entry in self.entries.items():
+            entry.delete(0, tk.END)
+            value = record.entries.get(name, "")
+            if value:
+                entry.insert(0, value)
+        self.result_text.configure(state="normal")
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.insert(tk.END, record.results)
+        self.result_text.configure(state="disabled")
+        self.results_live = False  # Текст записи без разметки: живой пересчёт перерисует его целиком
+        self._check_fields()
+
+    def _show_planner(self):
+        PlannerWindow(self.root, self.current_lang)
 
     def _update_texts(self):
         self.lang_menu.configure(text="ru" if self.current_lang == "ru" else "en")
@@ -769,17 +803,22 @@ class AppUI:
         ]):
             self.footer_items[i].configure(text=text)
         self.top_frame.winfo_children()[2].configure(text="История" if self.current_lang == "ru" else "History")
+        self.top_frame.winfo_children()[3].configure(text="Планировщик" if self.current_lang == "ru" else "Planner")
         self.result_header_frame.winfo_children()[0].configure(text="Результаты:" if self.current_lang == "ru" else "Results:")
+        self.cancel_tooltip.text = "Отменить операцию" if self.current_lang == "ru" else "Cancel operation"
 
     def _on_closing(self):
         if self.after_id is not None:
             self.root.after_cancel(self.after_id)
+        # Задачи чтения отменяются; запись в историю, сохранение и экспорт графика, даже ещё не начатые,
+        # выполняются до конца
+        self.tasks.shutdown(wait=True)
         for widget in self.root.winfo_children():
             if isinstance(widget, tk.Toplevel):
                 widget.destroy()
         self.data_manager.save_collapsed_state(self.collapsed_state)
-        self.data_manager.save_history()
         self._save_ui_state()
+        self.data_manager.close()
         self.root.destroy()
         import sys
         sys.exit(0)
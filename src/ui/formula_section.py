@@ -0,0 +1,191 @@
+import tkinter as tk
+import ttkbootstrap as ttk
+from typing import Callable, Dict, List, Optional, Tuple
+from src.ui.tooltip import ToolTip
+
+FIELDS_ROW = 3  # Строки секции: 0 — заголовок, 1 — пример, 2 — описание, далее поля и разделитель
+
+
+def format_tooltip(tooltip: str, lang: str) -> str:
+    return (f"{tooltip}\nФормат: Число > 0 (например, 0.1 или 5.5)" if lang == "ru"
+            else f"{tooltip}\nFormat: Number > 0 (e.g., 0.1 or 5.5)")
+
+
+class FieldValue:
+    """
+    Значение поля ввода, не зависящее от виджета.
+
+    Повторяет часть интерфейса ttk.Entry (get, delete, insert), поэтому расчёт, сохранение и история
+    работают с ним как с полем ввода; виджет секции подключается к нему через textvariable,
+    пока секция показана.
+    """
+
+    def __init__(self, master: tk.Misc):
+        self.var = tk.StringVar(master)
+        self.widget: Optional[ttk.Entry] = None  # Поле ввода, к которому значение сейчас подключено
+
+    def get(self) -> str:
+        return self.var.get()
+
+    def set(self, value: str):
+        self.var.set(value)
+
+    def delete(self, first, last=None):
+        text = self.var.get()
+        first = int(first)
+        last = first + 1 if last is None else len(text) if last == tk.END else int(last)
+        self.var.set(text[:first] + text[last:])
+
+    def insert(self, index, value: str):
+        text = self.var.get()
+        index = len(text) if index == tk.END else int(index)
+        self.var.set(text[:index] + value + text[index:])
+
+
+class FormulaSection:
+    """
+    Секция формулы в области ввода: заголовок с кнопкой сворачивания, индикатором и прогрессом,
+    пример, описание, поля ввода и разделитель.
+
+    Секция не привязана к формуле навсегда: bind подключает её к другой формуле, переиспользуя
+    виджеты полей, поэтому при прокрутке большого каталога создаются только видимые секции.
+    Смена языка, сворачивание и переход между одной и двумя колонками меняют только тексты
+    и размещение виджетов секции.
+    """
+
+    def __init__(self, parent: tk.Widget, vcmd: Tuple, on_toggle: Callable[[str], None]):
+        self.metric_id: Optional[str] = None
+        self.entries: Dict[str, ttk.Entry] = {}
+        self._values: List[Tuple[str, FieldValue]] = []
+        self.collapsed = False
+        self.single_column = False
+        self._vcmd = vcmd
+        # Последние применённые состояния: виджеты перенастраиваются только при их изменении
+        self._valid: Dict[str, bool] = {}
+        self._progress: Optional[int] = None
+        self.frame = ttk.Frame(parent, padding=(5, 0))
+        for column, weight in enumerate((0, 1, 0, 1)):  # Растягиваются только поля ввода
+            self.frame.grid_columnconfigure(column, weight=weight)
+
+        title_frame = ttk.Frame(self.frame)
+        title_frame.grid(row=0, column=0, columnspan=4, pady=(5, 2), sticky="ew")
+        self.collapse_button = ttk.Button(title_frame, text="▼", width=2, command=lambda: on_toggle(self.metric_id))
+        self.collapse_button.grid(row=0, column=0, padx=(0, 2), sticky="w")
+        self.title_label = ttk.Label(title_frame, bootstyle="primary-bold")
+        self.title_label.grid(row=0, column=1, padx=(2, 2), sticky="w")
+        self.indicator = ttk.Label(title_frame, text="*", bootstyle="warning")
+        self.indicator.grid(row=0, column=2, padx=(2, 2), sticky="w")
+        self.progress = ttk.Label(title_frame)
+        self.progress.grid(row=0, column=3, padx=(0, 2), sticky="w")
+
+        self.example_label = ttk.Label(self.frame, bootstyle="secondary")
+        self.example_label.grid(row=1, column=0, columnspan=4, pady=(0, 5), sticky="ew")
+        self.desc_label = ttk.Label(self.frame, bootstyle="secondary")
+        self.separator = ttk.Separator(self.frame, orient="horizontal")
+        # Виджеты полей (подпись, поле ввода, подсказка); лишние после bind скрыты и ждут формулы с большим числом полей
+        self._field_widgets: List[Tuple[ttk.Label, ttk.Entry, ToolTip]] = []
+        self._font: Optional[Tuple[int, int]] = None
+
+    def bind(self, metric_id: str, values: List[Tuple[str, FieldValue]]):
+        """Подключает секцию к формуле: поля ввода связываются со значениями, старые значения отключаются."""
+        self.release()
+        self.metric_id = metric_id
+        self._values = list(values)
+        while len(self._field_widgets) < len(values):
+            label = ttk.Label(self.frame)
+            entry = ttk.Entry(self.frame, bootstyle="info", validate="key", validatecommand=self._vcmd)
+            if self._font:
+                label.configure(font=("Roboto", self._font[1]))
+            self._field_widgets.append((label, entry, ToolTip(entry, "")))
+        self.entries = {}
+        for (name, value), (_, entry, _) in zip(values, self._field_widgets):
+            entry.configure(textvariable=value.var)
+            value.widget = entry
+            self.entries[name] = entry
+        for label, entry, _ in self._field_widgets[len(values):]:
+            label.grid_remove()
+            entry.grid_remove()
+        self.separator.grid(row=FIELDS_ROW + len(values), column=0, columnspan=4, sticky="ew", pady=5)
+        self._grid_fields()
+
+    def release(self):
+        """Отключает секцию от формулы перед возвратом в пул."""
+        for _, value in self._values:
+            value.widget = None
+        self._values = []
+        self.metric_id = None
+        self._valid.clear()
+        self._progress = None
+
+    def set_texts(self, title: str, description: str, example: str, fields: List[Tuple[str, str, str]], lang: str):
+        """Обновляет тексты секции; fields — (подпись, имя поля, подсказка) в порядке полей bind."""
+        self.title_label.configure(text=title)
+        self.example_label.configure(text=example)
+        self.desc_label.configure(text=description)
+        for (label, _, tooltip), (label_text, _, tooltip_text) in zip(self._field_widgets, fields):
+            label.configure(text=label_text)
+            tooltip.text = format_tooltip(tooltip_text, lang)
+
+    def set_fonts(self, title_size: int, text_size: int):
+        if self._font == (title_size, text_size):
+            return
+        self._font = (title_size, text_size)
+        self.title_label.configure(font=("Roboto", title_size, "bold"))
+        self.indicator.configure(font=("Roboto", title_size))
+        self.progress.configure(font=("Roboto", text_size))
+        self.example_label.configure(font=("Roboto", text_size, "italic"))
+        self.desc_label.configure(font=("Roboto", text_size, "italic"))
+        for label, _, _ in self._field_widgets:
+            label.configure(font=("Roboto", text_size))
+
+    def set_wraplength(self, width: int):
+        self.example_label.configure(wraplength=width)
+        self.desc_label.configure(wraplength=width)
+
+    def set_collapsed(self, collapsed: bool):
+        """Скрывает или показывает описание и поля, сохраняя виджеты и введённые значения."""
+        self.collapse_button.configure(text="▲" if collapsed else "▼")
+        if collapsed != self.collapsed:
+            self.collapsed = collapsed
+            self._grid_fields()
+
+    def set_single_column(self, single_column: bool):
+        if single_column != self.single_column:
+            self.single_column = single_column
+            self._grid_fields()
+
+    def set_field_valid(self, name: str, valid: bool):
+        if self._valid.get(name) != valid:
+            self._valid[name] = valid
+            self.entries[name].configure(bootstyle="info" if valid else "danger")
+
+    def set_progress(self, filled: int):
+        if filled == self._progress:
+            return
+        self._progress = filled
+        total = len(self.entries)
+        done = filled == total
+        self.indicator.configure(text="✓" if done else "*", bootstyle="success" if done else "warning")
+        self.progress.configure(text=f"{filled}/{total}")
+        self.title_label.configure(bootstyle="success-bold" if done else "primary-bold")
+
+    def _grid_fields(self):
+        widgets = self._field_widgets[:len(self.entries)]
+        if self.collapsed:
+            self.desc_label.grid_remove()
+            for label, entry, _ in widgets:
+                label.grid_remove()
+                entry.grid_remove()
+            return
+        self.desc_label.grid(row=2, column=0, columnspan=4, pady=2, sticky="ew")
+        last = len(widgets) - 1
+        for i, (label, entry, _) in enumerate(widgets):
+            if self.single_column:
+                # В узком режиме каждое поле на отдельной строке
+                row, column, span = FIELDS_ROW + i, 0, 3
+            else:
+                # В широком режиме по два поля в строке; непарное последнее поле растягивается на всю строку
+                row, column = FIELDS_ROW + i // 2, (i % 2) * 2
+                span = 3 if i == last and i % 2 == 0 else 1
+            label.grid(row=row, column=column, padx=5, pady=2, sticky="w")
+            entry.grid(row=row, column=column + 1, columnspan=span, padx=5, pady=2, sticky="ew")
@@ -0,0 +1,226 @@
+import tkinter as tk
+import logging
+import ttkbootstrap as ttk
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from src.core.bands import BANDS
+from src.core.calculations import BAND_LABELS
+from src.core.formulas import METRICS, metric_title
+from src.data.history_store import HistoryPager, HistoryRecord, HistoryStore
+from src.utils.tasks import TaskRunner
+
+PAGE_SIZE = 50
+PREFETCH_FRACTION = 0.9  # Следующая страница подгружается, когда прокрутка дошла до этой доли списка
+RESTORE_PAGES = 20  # Сколько страниц окно дочитывает при открытии, чтобы выделить запомненную запись
+DATE_FORMAT = "%d.%m.%Y"
+
+
+def parse_date(text: str, end: bool = False) -> Optional[float]:
+    """
+    Преобразует дату ДД.ММ.ГГГГ в Unix-время начала дня (или начала следующего дня при end=True,
+    чтобы конечная дата входила в интервал). Пустая строка — без ограничения.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    day = datetime.strptime(text, DATE_FORMAT)
+    return (day + timedelta(days=1) if end else day).timestamp()
+
+
+class HistoryWindow:
+    """
+    Окно истории: фильтры по метрике, датам и диапазону значений, список с подгрузкой страниц
+    при прокрутке и предпросмотр выбранной записи.
+
+    В списке хранятся только идентификаторы и краткие подписи загруженных страниц; полная запись
+    читается из HistoryStore при выборе. Запросы к базе выполняются фоновыми задачами TaskRunner,
+    окно обновляется по их завершении.
+
+    cursor — id записи, выбранной в прошлый раз: при открытии окно подгружает страницы до неё
+    (не больше RESTORE_PAGES) и выделяет её. on_select получает id каждой выбранной записи.
+    """
+
+    def __init__(self, root: tk.Tk, store: HistoryStore, lang: str, on_load: Callable[[HistoryRecord], None],
+                 tasks: TaskRunner, cursor: Optional[int] = None, on_select: Optional[Callable[[int], None]] = None):
+        self.store = store
+        self.tasks = tasks
+        self.lang = lang
+        self.on_load = on_load
+        self.on_select = on_select
+        self.pager: Optional[HistoryPager] = None
+        self._loading = False
+        self._restore: Optional[int] = None
+        self.window = tk.Toplevel(root)
+        self.window.title("История" if lang == "ru" else "History")
+        self.window.geometry("800x600")
+
+        filter_frame = ttk.Frame(self.window, padding=5)
+        filter_frame.pack(fill="x")
+        any_label = "Все" if lang == "ru" else "All"
+        self.metric_names = {metric_title(metric_id, lang): metric_id for metric_id in METRICS}
+        self.band_names = {name: band for band, name in BAND_LABELS[lang].items()}
+        self.metric_var = tk.StringVar(value=any_label)
+        self.band_var = tk.StringVar(value=any_label)
+        self.start_var = tk.StringVar()
+        self.end_var = tk.StringVar()
+        ttk.Label(filter_frame, text="Метрика:" if lang == "ru" else "Metric:").pack(side="left", padx=2)
+        ttk.Combobox(filter_frame, textvariable=self.metric_var, state="readonly", width=18,
+                     values=[any_label] + list(self.metric_names)).pack(side="left", padx=2)
+        ttk.Label(filter_frame, text="Диапазон:" if lang == "ru" else "Band:").pack(side="left", padx=2)
+        ttk.Combobox(filter_frame, textvariable=self.band_var, state="readonly", width=13,
+                     values=[any_label] + [BAND_LABELS[lang][band] for band in BANDS]).pack(side="left", padx=2)
+        ttk.Label(filter_frame, text="С:" if lang == "ru" else "From:").pack(side="left", padx=2)
+        ttk.Entry(filter_frame, textvariable=self.start_var, width=11).pack(side="left", padx=2)
+        ttk.Label(filter_frame, text="По:" if lang == "ru" else "To:").pack(side="left", padx=2)
+        ttk.Entry(filter_frame, textvariable=self.end_var, width=11).pack(side="left", padx=2)
+        ttk.Button(filter_frame, text="Найти" if lang == "ru" else "Search",
+                   command=self.refresh, bootstyle="primary").pack(side="left", padx=5)
+        self.status_label = ttk.Label(self.window, text="", bootstyle="secondary")
+        self.status_label.pack(fill="x", padx=10)
+
+        paned = ttk.PanedWindow(self.window, orient="vertical")
+        paned.pack(fill="both", expand=True, padx=5, pady=5)
+        list_frame = ttk.Frame(paned)
+        self.tree = ttk.Treeview(list_frame, columns=("time", "fields", "metrics"), show="headings",
+                                 selectmode="browse")
+        for column, text_ru, text_en, width in [("time", "Время", "Time", 130), ("fields", "Полей", "Fields", 60),
+                                                ("metrics", "Метрики", "Metrics", 560)]:
+            self.tree.heading(column, text=text_ru if lang == "ru" else text_en)
+            self.tree.column(column, width=width, stretch=column == "metrics")
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=lambda first, last: self._on_scroll(scrollbar, first, last))
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        paned.add(list_frame, weight=3)
+
+        preview_frame = ttk.Frame(paned)
+        self.preview = tk.Text(preview_frame, height=10, wrap="word", state="disabled")
+        self.preview.pack(fill="both", expand=True)
+        ttk.Button(preview_frame, text="Загрузить" if lang == "ru" else "Load",
+                   command=self._load_selected, bootstyle="success").pack(anchor="e", pady=2)
+        paned.add(preview_frame, weight=2)
+
+        self.tree.bind("<<TreeviewSelect>>", lambda event: self._show_preview())
+        self.tree.bind("<Double-1>", lambda event: self._load_selected())
+        self.refresh(restore=cursor)
+
+    def _filters(self) -> Dict[str, object]:
+        return {
+            "metric_id": self.metric_names.get(self.metric_var.get()),
+            "band": self.band_names.get(self.band_var.get()),
+            "start": parse_date(self.start_var.get()),
+            "end": parse_date(self.end_var.get(), end=True),
+        }
+
+    def refresh(self, restore: Optional[int] = None):
+        """Сбрасывает список и загружает первую страницу под текущими фильтрами; restore — id записи для выделения."""
+        try:
+            filters = self._filters()
+        except ValueError:
+            self.status_label.configure(text="Дата в формате ДД.ММ.ГГГГ" if self.lang == "ru"
+                                        else "Date format is DD.MM.YYYY", bootstyle="danger")
+            return
+        self.tree.delete(*self.tree.get_children())
+        self._set_preview("")
+        pager = HistoryPager(self.store, PAGE_SIZE, **filters)
+        self.pager = pager
+        self._loading = False  # Страница прежнего поиска, если ещё читается, будет отброшена
+        self._restore = restore
+        self.status_label.configure(text="Поиск…" if self.lang == "ru" else "Searching…", bootstyle="secondary")
+        self.tasks.submit(pager.total, on_done=lambda total: self._show_total(pager, total))
+        self._load_page()
+
+    def _alive(self) -> bool:
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def _show_total(self, pager: HistoryPager, total: int):
+        if pager is self.pager and self._alive():
+            self.status_label.configure(text=f"Найдено записей: {total}" if self.lang == "ru"
+                                        else f"Records found: {total}", bootstyle="secondary")
+
+    def _load_page(self):
+        if self.pager is None or self.pager.exhausted or self._loading:
+            return
+        self._loading = True
+        pager = self.pager
+        self.tasks.submit(pager.next_page, on_done=lambda records: self._add_page(pager, records),
+                          on_error=lambda e: self._page_failed(pager, e))
+
+    def _add_page(self, pager: HistoryPager, records: List[HistoryRecord]):
+        # Ответ на устаревший поиск или для закрытого окна не показывается
+        if pager is not self.pager or not self._alive():
+            return
+        self._loading = False
+        for record in records:
+            self.tree.insert("", "end", iid=str(record.id), values=(
+                datetime.fromtimestamp(record.timestamp).strftime(f"{DATE_FORMAT} %H:%M"),
+                len(record.entries), self._summary(record)))
+        if self._restore is not None:
+            self._restore_selection(pager, records)
+
+    def _restore_selection(self, pager: HistoryPager, records: List[HistoryRecord]):
+        # Страницы идут от новых записей к старым: если последняя загруженная ещё новее искомой,
+        # запись может быть на следующей странице
+        iid = str(self._restore)
+        if self.tree.exists(iid):
+            self._restore = None
+            self.tree.selection_set(iid)
+            self.tree.see(iid)
+        elif (records and records[-1].id > self._restore and not pager.exhausted
+              and len(self.tree.get_children()) < RESTORE_PAGES * PAGE_SIZE):
+            self._load_page()
+        else:
+            self._restore = None  # Запись удалена, не проходит фильтры или слишком далеко
+
+    def _page_failed(self, pager: HistoryPager, e: BaseException):
+        logging.error(f"Failed to load history page: {e}")
+        if pager is self.pager:
+            self._loading = False
+
+    def _summary(self, record: HistoryRecord) -> str:
+        parts = []
+        for metric_id, value, _ in record.metrics:
+            title = metric_title(metric_id, self.lang) if metric_id in METRICS else metric_id
+            parts.append(f"{title}: {value:.2f}")
+        return "; ".join(parts)
+
+    def _on_scroll(self, scrollbar: ttk.Scrollbar, first: str, last: str):
+        scrollbar.set(first, last)
+        if float(last) >= PREFETCH_FRACTION and self.pager is not None and not self.pager.exhausted:
+            self.window.after_idle(self._load_page)
+
+    def _fetch_selected(self, callback: Callable[[HistoryRecord], None]):
+        """Читает выбранную запись в фоне; callback вызывается, только если выбор за это время не изменился."""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        calc_id = int(selection[0])
+
+        def deliver(record: Optional[HistoryRecord]):
+            if record is not None and self._alive() and self.tree.selection() == selection:
+                callback(record)
+
+        self.tasks.submit(self.store.get, calc_id, on_done=deliver,
+                          on_error=lambda e: logging.error(f"Failed to read history record {calc_id}: {e}"))
+
+    def _set_preview(self, text: str):
+        self.preview.configure(state="normal")
+        self.preview.delete(1.0, tk.END)
+        self.preview.insert(tk.END, text)
+        self.preview.configure(state="disabled")
+
+    def _show_preview(self):
+        selection = self.tree.selection()
+        if selection and self.on_select:
+            self.on_select(int(selection[0]))
+        self._fetch_selected(self._preview_record)
+
+    def _preview_record(self, record: HistoryRecord):
+        lines = [f"{name}: {value}" for name, value in record.entries.items()]
+        self._set_preview("\n".join(lines) + "\n\n" + record.results)
+
+    def _load_selected(self):
+        self._fetch_selected(self.on_load)
@@ -0,0 +1,131 @@
+import tkinter as tk
+import logging
+import ttkbootstrap as ttk
+import matplotlib.pyplot as plt
+from typing import Dict, Optional, Tuple
+from src.core.formulas import TITLES
+from src.core.scenarios import ScenarioGrid, axis_range
+from src.visualization.charts import show_heatmap
+
+# Оси планировщика: (вход, подпись ru, подпись en, от, до, шагов)
+PLANNER_AXES = [
+    ("spend", "Бюджет ($)", "Budget ($)", 1000.0, 10000.0, 10),
+    ("cpc", "CPC ($)", "CPC ($)", 0.5, 3.0, 10),
+    ("cr", "CR (%)", "CR (%)", 1.0, 10.0, 10),
+    ("aov", "Средний чек ($)", "Average Order Value ($)", 50.0, 150.0, 10),
+    ("purchases", "Покупок на клиента", "Purchases per Customer", 1.0, 1.0, 1),
+    ("period", "Период (лет)", "Period (years)", 1.0, 1.0, 1),
+]
+PLANNER_METRICS = ["cpa", "roas", "ltv", "profit", "roi", "ltv_cac"]
+
+
+class PlannerWindow:
+    """
+    Окно планировщика: диапазоны допущений, выбор двух осей и тепловая карта метрики.
+
+    Остальные оси с несколькими значениями показываются срезом: значение каждой выбирается в столбце «Срез».
+    """
+
+    def __init__(self, root: tk.Tk, lang: str):
+        self.lang = lang
+        self.canvas = None
+        self.fig = None
+        self.window = tk.Toplevel(root)
+        self.window.title("Планировщик сценариев" if lang == "ru" else "Scenario Planner")
+        self.window.geometry("900x700")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        ranges_frame = ttk.Frame(self.window, padding=5)
+        ranges_frame.pack(fill="x")
+        headers = ["", "От", "До", "Шагов", "Срез"] if lang == "ru" else ["", "From", "To", "Steps", "Slice"]
+        for column, text in enumerate(headers):
+            ttk.Label(ranges_frame, text=text).grid(row=0, column=column, padx=5, sticky="w")
+        self.range_vars: Dict[str, Tuple[tk.StringVar, tk.StringVar, tk.StringVar]] = {}
+        # Значение оси, при котором строится тепловая карта, если ось не выбрана как X или Y
+        self.slice_vars: Dict[str, tk.StringVar] = {}
+        self.slice_boxes: Dict[str, ttk.Combobox] = {}
+        for row, (name, label_ru, label_en, start, stop, steps) in enumerate(PLANNER_AXES, start=1):
+            ttk.Label(ranges_frame, text=label_ru if lang == "ru" else label_en).grid(row=row, column=0, padx=5,
+                                                                                     sticky="w")
+            variables = (tk.StringVar(value=str(start)), tk.StringVar(value=str(stop)), tk.StringVar(value=str(steps)))
+            for column, variable in enumerate(variables, start=1):
+                ttk.Entry(ranges_frame, textvariable=variable, width=10).grid(row=row, column=column, padx=5, pady=1)
+            self.range_vars[name] = variables
+            self.slice_vars[name] = tk.StringVar()
+            self.slice_boxes[name] = ttk.Combobox(ranges_frame, textvariable=self.slice_vars[name], state="disabled",
+                                                  width=10)
+            self.slice_boxes[name].grid(row=row, column=4, padx=5, pady=1)
+
+        control_frame = ttk.Frame(self.window, padding=5)
+        control_frame.pack(fill="x")
+        axis_names = [name for name, *_ in PLANNER_AXES]
+        self.x_var = tk.StringVar(value="cpc")
+        self.y_var = tk.StringVar(value="cr")
+        self.metric_var = tk.StringVar(value="cpa")
+        for text, variable, options in [("X:", self.x_var, axis_names), ("Y:", self.y_var, axis_names),
+                                        ("Метрика:" if lang == "ru" else "Metric:", self.metric_var, PLANNER_METRICS)]:
+            ttk.Label(control_frame, text=text).pack(side="left", padx=5)
+            ttk.OptionMenu(control_frame, variable, variable.get(), *options).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Построить" if lang == "ru" else "Render",
+                   command=self.render, bootstyle="success").pack(side="right", padx=5)
+        self.status_label = ttk.Label(self.window, text="", bootstyle="warning")
+        self.status_label.pack(fill="x", padx=10)
+
+        self.chart_frame = ttk.Frame(self.window)
+        self.chart_frame.pack(fill="both", expand=True)
+
+    def _grid(self) -> Optional[ScenarioGrid]:
+        axes, fixed = {}, {}
+        try:
+            for name, (start, stop, steps) in self.range_vars.items():
+                values = axis_range(float(start.get()), float(stop.get()), int(steps.get()))
+                if len(values) > 1 or name in (self.x_var.get(), self.y_var.get()):
+                    axes[name] = values
+                else:
+                    fixed[name] = float(values[0])
+            return ScenarioGrid(axes, fixed, [self.metric_var.get()])
+        except ValueError as e:
+            logging.error(f"Invalid scenario ranges: {e}")
+            self.status_label.configure(text=f"Ошибка данных: {e}" if self.lang == "ru" else f"Data error: {e}")
+            return None
+
+    def _slices(self, grid: ScenarioGrid) -> Dict[str, int]:
+        """
+        Обновляет списки срезов по текущим диапазонам и возвращает индексы выбранных значений
+        для осей, не выбранных как X и Y.
+        """
+        at = {}
+        for name, box in self.slice_boxes.items():
+            if name not in grid.axes or name in (self.x_var.get(), self.y_var.get()):
+                box.configure(values=[], state="disabled")
+                self.slice_vars[name].set("")
+                continue
+            options = [f"{value:g}" for value in grid.axes[name]]
+            box.configure(values=options, state="readonly")
+            if self.slice_vars[name].get() not in options:
+                self.slice_vars[name].set(options[0])  # Диапазон изменился: срез по первому значению
+            at[name] = options.index(self.slice_vars[name].get())
+        return at
+
+    def render(self):
+        if self.x_var.get() == self.y_var.get():
+            self.status_label.configure(text="Выберите разные оси" if self.lang == "ru" else "Select different axes")
+            return
+        grid = self._grid()
+        if grid is None:
+            return
+        at = self._slices(grid)
+        labels = {name: label_ru if self.lang == "ru" else label_en for name, label_ru, label_en, *_ in PLANNER_AXES}
+        self.status_label.configure(text=", ".join(f"{labels[name]} = {self.slice_vars[name].get()}" for name in at))
+        metric_id = self.metric_var.get()
+        x_values, y_values, values = grid.heatmap(self.x_var.get(), self.y_var.get(), metric_id, at)
+        title = TITLES[self.lang][metric_id][0] if metric_id in TITLES[self.lang] else metric_id.upper()
+        if self.fig:
+            plt.close(self.fig)
+        self.canvas, self.fig = show_heatmap(self.chart_frame, x_values, y_values, values,
+                                             labels[self.x_var.get()], labels[self.y_var.get()], title)
+
+    def close(self):
+        if self.fig:
+            plt.close(self.fig)
+        self.window.destroy()
@@ -0,0 +1,138 @@
+import tkinter as tk
+import logging
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional
+from src.ui.formula_section import FormulaSection
+
+OVERSCAN = 1.0  # Запас над и под видимой областью, в высотах окна: секции готовы до того, как попадут в кадр
+
+
+class SectionList:
+    """
+    Виртуальный список секций формул на холсте с прокруткой.
+
+    Создаются только секции в видимой области и запасе вокруг неё; остальные представлены местом
+    нужной высоты в области прокрутки (измеренной, если секция уже показывалась, иначе оценённой).
+    Ушедшие из области секции возвращаются в пул и подключаются к другим формулам, поэтому число
+    виджетов зависит от высоты окна, а не от размера каталога.
+    """
+
+    def __init__(self, canvas: tk.Canvas, count: int, create: Callable[[], FormulaSection],
+                 bind: Callable[[FormulaSection, int], None], estimate: Callable[[int], int],
+                 overscan: float = OVERSCAN):
+        self.canvas = canvas
+        self.count = count
+        self.create = create
+        self.bind = bind
+        self.estimate = estimate
+        self.overscan = overscan
+        self.active: Dict[int, FormulaSection] = {}
+        self._windows: Dict[int, int] = {}  # id(секции) -> элемент холста
+        self._pool: List[FormulaSection] = []
+        self._measured: Dict[int, int] = {}
+        self._offsets: Optional[List[int]] = None
+        self._pending = False
+        self._view = None  # Последнее положение прокрутки (first, last)
+        self._region = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def offsets(self) -> List[int]:
+        """Верхние границы секций и полная высота в конце."""
+        if self._offsets is None:
+            heights = (self._measured.get(i) or self.estimate(i) for i in range(self.count))
+            self._offsets = [0] + list(accumulate(heights))
+        return self._offsets
+
+    def index_at(self, y: float) -> int:
+        return max(0, min(self.count - 1, bisect_right(self.offsets(), y) - 1))
+
+    def section(self, index: int) -> Optional[FormulaSection]:
+        return self.active.get(index)
+
+    def invalidate(self, index: Optional[int] = None):
+        """Сбрасывает измеренную высоту секции (или всех секций) после изменения её содержимого."""
+        if index is None:
+            self._measured.clear()
+        else:
+            self._measured.pop(index, None)
+        self._offsets = None
+        self.schedule()
+
+    def schedule(self):
+        """Обновляет список при ближайшем простое; повторные вызовы до этого сливаются."""
+        if not self._pending:
+            self._pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def on_scroll(self, first: str, last: str):
+        """Обработчик yscrollcommand холста: обновление только при реальном сдвиге области."""
+        if (first, last) != self._view:
+            self._view = (first, last)
+            self.schedule()
+
+    def refresh(self):
+        """Подключает секции, попавшие в видимую область, освобождает ушедшие и расставляет их по высотам."""
+        # Флаг снимается в конце: update_idletasks внутри не должен запустить refresh повторно
+        try:
+            remeasure = self._refresh()
+        finally:
+            self._pending = False
+        if remeasure:
+            # Фактические высоты отличаются от оценки: в области могли оказаться другие секции
+            self.schedule()
+
+    def _refresh(self) -> bool:
+        if self.count == 0:
+            return False
+        height = max(self.canvas.winfo_height(), 1)
+        top = self.canvas.canvasy(0)
+        first = self.index_at(top - height * self.overscan)
+        last = self.index_at(top + height * (1 + self.overscan))
+        for index in [index for index in self.active if not first <= index <= last]:
+            section = self.active.pop(index)
+            section.release()
+            self.canvas.itemconfigure(self._windows[id(section)], state="hidden")
+            self._pool.append(section)
+        added = []
+        for index in range(first, last + 1):
+            if index not in self.active:
+                section = self._pool.pop() if self._pool else self._new_section()
+                self.bind(section, index)
+                self.active[index] = section
+                added.append(index)
+        if added:
+            logging.debug(f"Materialized sections {added}, {len(self.active) + len(self._pool)} widgets in use")
+        changed = self._measure()
+        self._place()
+        return changed and bool(added)
+
+    def _new_section(self) -> FormulaSection:
+        section = self.create()
+        self._windows[id(section)] = self.canvas.create_window(0, 0, window=section.frame, anchor="nw")
+        return section
+
+    def _measure(self) -> bool:
+        self.canvas.update_idletasks()
+        changed = False
+        for index, section in self.active.items():
+            height = section.frame.winfo_reqheight()
+            if self._measured.get(index) != height:
+                self._measured[index] = height
+                self._offsets = None
+                changed = True
+        return changed
+
+    def _place(self):
+        offsets = self.offsets()
+        width = self.canvas.winfo_width()
+        for index, section in self.active.items():
+            window = self._windows[id(section)]
+            self.canvas.coords(window, 0, offsets[index])
+            self.canvas.itemconfigure(window, width=width, state="normal")
+        region = (0, 0, width, offsets[-1])
+        if region != self._region:
+            self._region = region
+            self.canvas.configure(scrollregion=region)
@@ -1,7 +1,6 @@
 # src/utils/helpers.py
 import tkinter as tk
 import ttkbootstrap as ttk
-import logging
 
 class ToolTip:
     def __init__(self, widget: tk.Widget, text: str):
@@ -30,8 +29,7 @@ class ToolTip:
 
 def validate_number(action: str, value_if_allowed: str, text: str, prior_value: str) -> bool:
     """Валидация ввода чисел: только положительные десятичные числа с максимум 2 знаками после точки."""
-    logging.debug(f"Validating: action={action}, value={value_if_allowed}, text={text}, prior={prior_value}")
-
+    # Вызывается на каждое нажатие клавиши, поэтому без логирования
     if action != "1":
         return True
 
@@ -41,16 +39,13 @@ def validate_number(action: str, value_if_allowed: str, text: str, prior_value:
     if text in "0123456789.":
         if text == ".":
             if "." in prior_value:
-                logging.debug("Validation failed: Second dot")
                 return False
             return True
         new_value = value_if_allowed
         if "." in new_value:
             decimal_part = new_value.split(".")[1]
             if len(decimal_part) > 2:
-                logging.debug("Validation failed: Too many decimal places (max 2)")
                 return False
         return (new_value.count(".") <= 1 and
                 all(c in "0123456789." for c in new_value))
-    logging.debug(f"Validation failed: Invalid character '{text}'")
     return False
\ No newline at end of file
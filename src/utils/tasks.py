@@ -0,0 +1,221 @@
+# src/utils/tasks.py
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+POLL_MS = 50  # Период, с которым поток интерфейса забирает завершённые задачи
+THREAD_WORKERS = 4  # Потоки для ввода-вывода: файлы, SQLite
+PROCESS_WORKERS = 2  # Процессы для счётной работы, не отпускающей GIL
+
+
+class TaskCancelled(Exception):
+    """Задача отменена; выбрасывается Task.check внутри рабочей функции."""
+
+
+class Task:
+    """
+    Задача, отправленная в TaskRunner.
+
+    Рабочая функция, получившая задачу первым аргументом, сообщает через неё прогресс (report)
+    и проверяет отмену (check); поток интерфейса читает это состояние для строки статуса.
+
+    Отмена отбрасывает результат, поэтому честна для задач без побочных эффектов. Задача, которая
+    что-то меняет (пишет файл), вызывает commit перед необратимым шагом: после него отмена
+    не принимается. Начатую в процессе задачу отменить нельзя.
+
+    writes — задача с побочными эффектами (запись в историю, сохранение, экспорт): при остановке
+    TaskRunner она не отменяется, а выполняется до конца.
+    """
+
+    def __init__(self, label: str, on_done: Optional[Callable[[Any], None]],
+                 on_error: Optional[Callable[[BaseException], None]], cpu: bool = False, writes: bool = False):
+        self.label = label
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cpu = cpu
+        self.writes = writes
+        self.future: Optional[Future] = None
+        self.progress: Optional[Tuple[int, int]] = None  # (сделано, всего), если объём работы известен
+        self.started = time.monotonic()
+        self._cancelled = threading.Event()
+        self._committed = False
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def cancellable(self) -> bool:
+        """Можно ли ещё отменить задачу так, чтобы она ничего не изменила."""
+        future = self.future
+        if self._committed or self._cancelled.is_set() or future is None or future.done():
+            return False
+        return not (self.cpu and future.running())
+
+    def cancel(self) -> bool:
+        """
+        Отменяет задачу: ещё не начатая не запустится, у начатой результат будет отброшен.
+
+        Returns:
+            bool: False, если задача уже завершена, прошла commit или выполняется в процессе.
+        """
+        with self._lock:
+            if not self.cancellable:
+                return False
+            if self.cpu and not self.future.cancel():
+                return False
+            self._cancelled.set()
+            self.future.cancel()
+            return True
+
+    def commit(self):
+        """Отмечает начало необратимого шага; если отмена уже запрошена, выбрасывает TaskCancelled."""
+        with self._lock:
+            self.check()
+            self._committed = True
+
+    def report(self, done: int, total: int):
+        self.progress = (done, total)
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise TaskCancelled(self.label)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+class TaskRunner:
+    """
+    Исполнитель фоновых задач для оконного приложения.
+
+    Ввод-вывод выполняется в пуле потоков, счётная работа — в пуле процессов (создаётся при первой
+    такой задаче). Рабочие потоки не обращаются к виджетам: завершённые задачи складываются в очередь,
+    которую поток интерфейса опрашивает через schedule (root.after), и обработчики on_done/on_error
+    вызываются уже в нём. on_change получает список выполняющихся задач на каждом опросе.
+    """
+
+    def __init__(self, schedule: Callable[[int, Callable[[], None]], Any], threads: int = THREAD_WORKERS,
+                 processes: int = PROCESS_WORKERS, poll_ms: int = POLL_MS,
+                 on_change: Optional[Callable[[List[Task]], None]] = None):
+        self.schedule = schedule
+        self.poll_ms = poll_ms
+        self.on_change = on_change
+        self.active: List[Task] = []
+        self._threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="task")
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._process_workers = processes
+        self._finished: "queue.SimpleQueue[Task]" = queue.SimpleQueue()
+        self._polling = False
+
+    def submit(self, fn: Callable, *args, label: str = "", on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None, with_task: bool = False,
+               writes: bool = False) -> Task:
+        """
+        Выполняет fn(*args) в пуле потоков.
+
+        Args:
+            fn (Callable): Рабочая функция; не должна обращаться к виджетам.
+            label (str): Подпись задачи в строке статуса.
+            on_done (Optional[Callable]): Получает результат в потоке интерфейса.
+            on_error (Optional[Callable]): Получает исключение в потоке интерфейса.
+            with_task (bool): Передать задачу первым аргументом для прогресса и проверки отмены.
+            writes (bool): Задача что-то записывает; shutdown дожидается её, а не отменяет.
+
+        Returns:
+            Task: Задача для отмены и отображения.
+        """
+        task = Task(label, on_done, on_error, writes=writes)
+        return self._start(task, self._threads, fn, (task,) + args if with_task else args)
+
+    def submit_cpu(self, fn: Callable, *args, label: str = "", on_done: Optional[Callable[[Any], None]] = None,
+                   on_error: Optional[Callable[[BaseException], None]] = None, writes: bool = False) -> Task:
+        """
+        Выполняет fn(*args) в пуле процессов; fn и аргументы должны сериализоваться pickle.
+
+        Начатую задачу отменить нельзя: процесс не прерывается, и её побочные эффекты (запись файла) остаются.
+        """
+        if self._processes is None:
+            # spawn, а не fork: дочерний процесс не наследует состояние Tk из процесса интерфейса
+            self._processes = ProcessPoolExecutor(max_workers=self._process_workers,
+                                                  mp_context=multiprocessing.get_context("spawn"))
+        return self._start(Task(label, on_done, on_error, cpu=True, writes=writes), self._processes, fn, args)
+
+    def _start(self, task: Task, executor: Executor, fn: Callable, args: tuple) -> Task:
+        task.future = executor.submit(fn, *args)
+        self.active.append(task)
+        # Обратный вызов выполняется в рабочем потоке: только кладёт задачу в очередь
+        task.future.add_done_callback(lambda future: self._finished.put(task))
+        logging.debug(f"Started task '{task.label}' ({'process' if task.cpu else 'thread'})")
+        self._notify()
+        self._schedule_poll()
+        return task
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.schedule(self.poll_ms, self.poll)
+
+    def poll(self):
+        """Вызывает обработчики завершённых задач; пока есть активные задачи, планирует следующий опрос."""
+        self._polling = False
+        while True:
+            try:
+                task = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            if task in self.active:
+                self.active.remove(task)
+                self._deliver(task)
+        self._notify()
+        if self.active:
+            self._schedule_poll()
+
+    def _deliver(self, task: Task):
+        future = task.future
+        if task.cancelled or future.cancelled():
+            logging.info(f"Task '{task.label}' cancelled")
+            return
+        error = future.exception()
+        if isinstance(error, TaskCancelled):
+            logging.info(f"Task '{task.label}' cancelled")
+            return
+        try:
+            if error is not None:
+                logging.error(f"Task '{task.label}' failed: {error}")
+                if task.on_error:
+                    task.on_error(error)
+            elif task.on_done:
+                task.on_done(future.result())
+        except Exception as e:
+            logging.exception(f"Task '{task.label}' handler failed: {e}")
+
+    def _notify(self):
+        if self.on_change:
+            self.on_change(list(self.active))
+
+    def cancel_all(self) -> int:
+        """Отменяет все активные задачи, которые ещё можно отменить; возвращает их количество."""
+        return sum(task.cancel() for task in list(self.active))
+
+    def shutdown(self, wait: bool = True):
+        """
+        Останавливает пулы при закрытии приложения.
+
+        Отменяются только задачи чтения; задачи с writes=True, в том числе ещё не начатые, выполняются
+        до конца, чтобы последняя запись истории или сохранение не потерялись. При wait=True метод
+        дожидается их завершения.
+        """
+        cancelled = sum(task.cancel() for task in list(self.active) if not task.writes)
+        pending = sum(task.writes for task in self.active)
+        logging.debug(f"Shutting down tasks: {cancelled} cancelled, {pending} writes pending")
+        # Отменённые futures уже не запустятся; cancel_futures=False оставляет в очереди задачи записи
+        self._threads.shutdown(wait=wait)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait)
+        self.active.clear()
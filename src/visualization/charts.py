@@ -1,13 +1,18 @@
 # src/visualization/charts.py
+import pickle
+import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import ttkbootstrap as ttk
 from typing import Dict, List, Tuple, Optional
 import logging
+import math
+from src.core.engine import MetricResult
+from src.core.formulas import metric_title
 
 def show_chart(
     parent: ttk.Frame,
-    results: List[Tuple[str, str, str]],
+    results: List[MetricResult],
     chart_type: str,
     selected_metrics: List[str],
     lang: str,
@@ -20,9 +25,9 @@ def show_chart(
 
     Args:
         parent (ttk.Frame): Родительский фрейм для отображения графика.
-        results (List[Tuple[str, str, str]]): Список результатов (название, значение, тег стиля).
+        results (List[MetricResult]): Результаты расчёта с числовыми значениями.
         chart_type (str): Тип графика ('bar', 'line', 'pie', 'histogram').
-        selected_metrics (List[str]): Список выбранных метрик для отображения.
+        selected_metrics (List[str]): Идентификаторы метрик для отображения.
         lang (str): Язык интерфейса ('ru' или 'en').
         custom_colors (Optional[List[str]]): Список пользовательских цветов для графика.
         font_size (int): Размер шрифта для текста на графике.
@@ -39,25 +44,16 @@ def show_chart(
         logging.warning("No metrics selected for chart.")
         return None, None
 
-    # Фильтрация значений для выбранных метрик
-    metric_values = {title: value for title, value, _ in results if title in selected_metrics}
-    values = [metric_values[title] for title in selected_metrics]
-    logging.debug(f"Values for chart: {values}")
-
-    # Извлечение числовых значений
-    numeric_values = []
-    for value in values:
-        try:
-            numeric_part = value.replace("%", "").replace("$", "").strip().split()[0]
-            numeric_values.append(float(numeric_part))
-        except (ValueError, IndexError):
-            numeric_values.append(0)
-
-    logging.debug(f"Numeric values: {numeric_values}")
-
-    if len(selected_metrics) != len(numeric_values):
-        logging.error("Chart data synchronization error.")
+    # Значения берутся из результатов напрямую, без разбора отформатированного текста
+    metric_values = {result.metric_id: result.value for result in results}
+    missing = [metric_id for metric_id in selected_metrics
+               if metric_id not in metric_values or math.isnan(metric_values[metric_id])]
+    if missing:
+        logging.error(f"No chart values for metrics: {missing}")
         return None, None
+    numeric_values = [float(metric_values[metric_id]) for metric_id in selected_metrics]
+    labels = [metric_title(metric_id, lang) for metric_id in selected_metrics]
+    logging.debug(f"Numeric values: {numeric_values}")
 
     # Нормализация значений (для столбчатых и линейных графиков)
     max_value = max(numeric_values) if numeric_values else 1
@@ -74,7 +70,7 @@ def show_chart(
     # Выбор типа графика
     if chart_type == "bar":
         bars = ax.bar(
-            selected_metrics,
+            labels,
             normalized_values,
             color=[default_colors[i % len(default_colors)] for i in range(len(selected_metrics))]
         )
@@ -87,7 +83,7 @@ def show_chart(
 
     elif chart_type == "line":
         ax.plot(
-            selected_metrics,
+            labels,
             normalized_values,
             marker='o',
             color=default_colors[0],
@@ -95,7 +91,7 @@ def show_chart(
             linestyle='--',
             linewidth=2
         )
-        for i, (x, y) in enumerate(zip(selected_metrics, normalized_values)):
+        for i, (x, y) in enumerate(zip(labels, normalized_values)):
             ax.text(x, y, f'{numeric_values[i]:.2f}', ha='center', va='bottom')
         ax.legend()
         ax.set_ylim(0, 110)
@@ -104,7 +100,7 @@ def show_chart(
     elif chart_type == "pie":
         ax.pie(
             numeric_values,
-            labels=selected_metrics,
+            labels=labels,
             colors=[default_colors[i % len(default_colors)] for i in range(len(selected_metrics))],
             autopct='%1.1f%%',
             startangle=140
@@ -141,4 +137,85 @@ def show_chart(
     # Корректировка компоновки
     plt.tight_layout()
 
-    return canvas, fig
\ No newline at end of file
+    return canvas, fig
+
+def show_heatmap(
+    parent: ttk.Frame,
+    x_values: List[float],
+    y_values: List[float],
+    values,
+    x_label: str,
+    y_label: str,
+    title: str,
+    font_size: int = 10,
+    figsize: Tuple[int, int] = (8, 6)
+) -> Tuple[Optional[FigureCanvasTkAgg], Optional[plt.Figure]]:
+    """
+    Отображает тепловую карту метрики по двум осям сценариев.
+
+    Args:
+        parent (ttk.Frame): Родительский фрейм для отображения графика.
+        x_values (List[float]): Значения оси X.
+        y_values (List[float]): Значения оси Y.
+        values: Матрица значений формы (len(y_values), len(x_values)); замаскированные ячейки не закрашиваются.
+        x_label (str): Подпись оси X.
+        y_label (str): Подпись оси Y.
+        title (str): Заголовок графика.
+        font_size (int): Размер шрифта для текста на графике.
+        figsize (Tuple[int, int]): Размер фигуры (ширина, высота).
+
+    Returns:
+        Tuple[Optional[FigureCanvasTkAgg], Optional[plt.Figure]]: Кортеж из канваса и фигуры matplotlib.
+    """
+    for widget in parent.winfo_children():
+        widget.destroy()
+
+    if len(x_values) == 0 or len(y_values) == 0:
+        logging.warning("Empty scenario axes for heatmap.")
+        return None, None
+
+    plt.rcParams.update({'font.size': font_size})
+    fig, ax = plt.subplots(figsize=figsize)
+    mesh = ax.pcolormesh(x_values, y_values, values, shading="nearest", cmap="viridis")
+    fig.colorbar(mesh, ax=ax)
+    ax.set_xlabel(x_label)
+    ax.set_ylabel(y_label)
+    ax.set_title(title)
+
+    canvas = FigureCanvasTkAgg(fig, master=parent)
+    canvas.draw()
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    toolbar = NavigationToolbar2Tk(canvas, parent)
+    toolbar.update()
+    plt.tight_layout()
+
+    return canvas, fig
+
+
+def export_figure(data: bytes, file_path: str) -> str:
+    """
+    Сохраняет график в файл; формат определяется расширением (PDF, SVG, иначе PNG).
+
+    Выполняется в отдельном процессе, поэтому фигура передаётся сериализованной pickle.
+
+    Args:
+        data (bytes): Фигура matplotlib, сериализованная pickle.dumps.
+        file_path (str): Путь к файлу.
+
+    Returns:
+        str: Путь к сохранённому файлу.
+    """
+    # Восстановленная фигура регистрируется в pyplot: без окон, иначе бэкенд Tk откроет её в этом процессе
+    matplotlib.use("Agg")
+    fig = pickle.loads(data)
+    try:
+        if file_path.endswith('.pdf'):
+            fig.savefig(file_path, format='pdf', dpi=300, bbox_inches='tight')
+        elif file_path.endswith('.svg'):
+            fig.savefig(file_path, format='svg', bbox_inches='tight')
+        else:
+            fig.savefig(file_path, dpi=300, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    logging.info(f"Chart exported to {file_path}")
+    return file_path
@@ -0,0 +1,71 @@
+# tests/test_anomaly.py
+import unittest
+import numpy as np
+from src.core.anomaly import AnomalyDetector, AnomalyMonitor
+from src.core.engine import evaluate
+
+
+class TestAnomalyDetector(unittest.TestCase):
+    def test_ctr_drop_is_danger(self):
+        rng = np.random.default_rng(0)
+        detector = AnomalyDetector("ctr", warmup=20)
+        for day, value in enumerate(5 + rng.normal(0, 0.1, 60)):
+            self.assertIsNone(detector.update("campaign", value, day))
+        anomaly = detector.update("campaign", 2.0, 60)
+        self.assertEqual(anomaly.direction, "drop")
+        self.assertEqual(anomaly.severity, "danger")
+        self.assertAlmostEqual(anomaly.expected, 5.0, delta=0.1)
+
+    def test_cpc_spike_is_bad_and_drop_is_good(self):
+        rng = np.random.default_rng(1)
+        detector = AnomalyDetector("cpc", threshold=3.0)
+        for value in 1 + rng.normal(0, 0.05, 50):
+            detector.update("a", value)
+            detector.update("b", value)
+        self.assertIn(detector.update("a", 1.25).severity, ("warning", "danger"))
+        self.assertIn(detector.update("b", 0.75).severity, ("success", "very_good"))
+        self.assertEqual(len(detector), 2)
+
+    def test_warmup_and_missing_values(self):
+        detector = AnomalyDetector("ctr", warmup=5)
+        for value in [1.0, 1.0, None, float("nan"), 100.0]:
+            self.assertIsNone(detector.update("a", value))
+
+    def test_seasonal_baseline(self):
+        detector = AnomalyDetector("roas", season_length=7, warmup=3)
+        weekly = [1, 1, 1, 1, 1, 5, 5]  # Выходные с высоким ROAS — норма
+        for day in range(70):
+            self.assertIsNone(detector.update("a", weekly[day % 7] * (1 + 0.01 * (day % 3)), day, season=day % 7))
+        self.assertIsNone(detector.update("a", 5.0, 70, season=5))
+        self.assertIsNotNone(detector.update("a", 5.0, 71, season=0))
+
+    def test_default_season_is_observation_number(self):
+        detector = AnomalyDetector("roas", season_length=2, warmup=3)
+        for day in range(20):
+            self.assertIsNone(detector.update("a", [1.0, 5.0][day % 2] * (1 + 0.01 * (day % 3)), day))
+        self.assertIsNone(detector.update("a", None, 20))  # Пропуск не сдвигает фазу
+        self.assertIsNone(detector.update("a", 1.0, 20))
+        self.assertIsNotNone(detector.update("a", 1.0, 21))
+
+    def test_monitor_consumes_engine_results(self):
+        monitor = AnomalyMonitor(["ctr"], warmup=5)
+        for day in range(10):
+            results, _ = evaluate({"ctr_impressions": 1000.0, "ctr_clicks": 50.0 + day % 2})
+            self.assertEqual(monitor.observe("a", results, day), [])
+        results, _ = evaluate({"ctr_impressions": 1000.0, "ctr_clicks": 10.0})
+        anomalies = monitor.observe("a", results, 10)
+        self.assertEqual([(a.metric_id, a.direction) for a in anomalies], [("ctr", "drop")])
+
+    def test_monitor_converts_micros(self):
+        monitor = AnomalyMonitor(["cpc"], warmup=5)
+        for day in range(10):
+            currency = "micros" if day % 2 else "float"
+            results, _ = evaluate({"cpc_total_cost": 100.0 + day % 3, "cpc_clicks": 50.0}, currency=currency)
+            self.assertEqual(monitor.observe("a", results, day), [])
+        self.assertAlmostEqual(monitor.detectors["cpc"]._series["a"].mean, 2.0, delta=0.05)
+        results, _ = evaluate({"cpc_total_cost": 200.0, "cpc_clicks": 50.0}, currency="micros")
+        self.assertEqual([a.value for a in monitor.observe("a", results, 10)], [4.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
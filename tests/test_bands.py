@@ -0,0 +1,38 @@
+# tests/test_bands.py
+import unittest
+import numpy as np
+from src.core.bands import BANDS, classify, classify_codes, classify_value, load_band_config, verticals
+
+
+class TestBands(unittest.TestCase):
+    def test_scalar_and_vector_agree(self):
+        values = np.array([0.5, 1.0, 2.0, 4.99, 5.0, 7.0])
+        for metric_id in ("cpc", "ctr", "roas"):
+            labels = classify(metric_id, values)
+            self.assertEqual(labels.tolist(), [classify_value(metric_id, value) for value in values])
+
+    def test_directions(self):
+        # CPC: меньше — лучше; CTR: больше — лучше
+        self.assertEqual(classify("cpc", np.array([0.5, 2.0, 7.0])).tolist(), ["very_good", "warning", "danger"])
+        self.assertEqual(classify("ctr", np.array([10.0, 5.0, 1.0])).tolist(), ["very_good", "success", "danger"])
+
+    def test_missing_values(self):
+        values = np.ma.MaskedArray([1.0, np.nan, 3.0], mask=[False, False, True])
+        self.assertEqual(classify_codes("ctr", values).tolist(), [BANDS.index("danger"), -1, -1])
+
+    def test_vertical_override(self):
+        self.assertIn("b2b", verticals())
+        self.assertEqual(classify_value("cpl", 40), "danger")
+        self.assertEqual(classify_value("cpl", 40, vertical="b2b"), "very_good")
+        with self.assertRaises(ValueError):
+            classify_value("cpl", 40, vertical="unknown")
+
+    def test_config_validation(self):
+        config = load_band_config()
+        config["default"]["ctr"]["direction"] = "sideways"
+        with self.assertRaises(ValueError):
+            classify_value("ctr", 1.0, config=config)
+
+
+if __name__ == "__main__":
+    unittest.main()
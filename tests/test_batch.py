@@ -0,0 +1,50 @@
+# tests/test_batch.py
+import unittest
+import numpy as np
+from src.core.batch import calculate_batch, to_records
+from src.core.engine import evaluate
+
+
+class TestCalculateBatch(unittest.TestCase):
+    def test_matches_engine(self):
+        columns = {"cpc_total_cost": [100.0, 30.0], "cpc_clicks": [50.0, 7.0],
+                   "ltv_avg_revenue": [50.0, 10.0], "ltv_purchases": [3.0, 2.0], "ltv_period": [2.0, 1.5]}
+        results = calculate_batch(columns)
+        for row in range(2):
+            expected, _ = evaluate({name: values[row] for name, values in columns.items()})
+            for result in expected:
+                self.assertAlmostEqual(results[result.metric_id][row], result.value)
+
+    def test_zero_and_missing_masked(self):
+        results = calculate_batch(ctr_impressions=np.array([1000.0, 0.0, np.nan]),
+                                  ctr_clicks=np.array([10.0, 5.0, 5.0]))
+        self.assertEqual(results["ctr"].mask.tolist(), [False, True, True])
+        self.assertAlmostEqual(results["ctr"][0], 1.0)
+        self.assertTrue(results["rpm"].mask.all())
+
+    def test_selected_metrics(self):
+        results = calculate_batch({"roas_revenue": [10.0], "roas_total_cost": [5.0]}, metrics=["roas"])
+        self.assertEqual(list(results), ["roas"])
+
+    def test_records(self):
+        results = calculate_batch({"ctr_impressions": [1000.0, 1000.0], "ctr_clicks": [100.0, 0.0],
+                                   "cpc_total_cost": [100.0, 100.0], "cpc_clicks": [50.0, 50.0]},
+                                  metrics=["ctr", "cpc"])
+        records = to_records(results)
+        self.assertEqual(records.dtype.names, ("ctr", "ctr_band", "cpc", "cpc_band"))
+        self.assertEqual(records["ctr"][0], 10.0)
+        self.assertTrue(np.isnan(records["ctr"][1]))
+        self.assertEqual(records["ctr_band"].tolist(), [0, -1])
+        self.assertEqual(records["cpc_band"].tolist(), [2, 2])
+        micros = to_records(calculate_batch({"cpc_total_cost": [100.0], "cpc_clicks": [50.0]}, metrics=["cpc"],
+                                            currency="micros"))
+        self.assertEqual(micros["cpc"][0], 2_000_000)
+        self.assertEqual(micros["cpc_band"][0], 2)
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            calculate_batch(ctr_impressions=[1.0, 2.0], ctr_clicks=[1.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
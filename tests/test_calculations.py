@@ -1,8 +1,8 @@
 # tests/test_calculations.py
 import unittest
 import ttkbootstrap as ttk
-from src.core.calculations import calculate_metrics
-from src.core.formulas import FORMULAS
+from src.core.calculations import calculate_metrics, format_result
+from src.core.formulas import FORMULAS, metric_title
 import logging
 from io import StringIO
 from contextlib import redirect_stderr
@@ -47,49 +47,67 @@ class TestCalculateMetrics(unittest.TestCase):
             self.entries[key].delete(0, ttk.END)
             self.entries[key].insert(0, str(value))
 
+    def formatted(self, results: list) -> list:
+        """Представление результатов, как в интерфейсе: (название, текст, тег)."""
+        return [(metric_title(r.metric_id, "ru"), format_result(r, "ru"), r.band) for r in results]
+
     def test_calculate_ctr(self):
         self.set_entry_values({"ctr_impressions": 1000, "ctr_clicks": 100})
         results, notifications = calculate_metrics(self.entries, "ru")
+        results = self.formatted(results)
         self.assertTrue(any(r[0] == "CTR (Кликабельность)" and "10.00%" in r[1] and "Очень хорошо" in r[1] for r in results))
 
     def test_calculate_cpc(self):
         self.set_entry_values({"cpc_total_cost": 100, "cpc_clicks": 50})
         results, notifications = calculate_metrics(self.entries, "ru")
+        results = self.formatted(results)
         self.assertTrue(any(r[0] == "CPC (Стоимость за клик)" and "2.00" in r[1] and "Нормально" in r[1] for r in results))
 
     def test_calculate_cpa(self):
         self.set_entry_values({"cpa_total_cost": 200, "cpa_actions": 10})
         results, notifications = calculate_metrics(self.entries, "ru")
+        results = self.formatted(results)
         self.assertTrue(any(r[0] == "CPA (Стоимость за действие)" and "20.00" in r[1] and "Нормально" in r[1] for r in results))
 
     def test_calculate_roas(self):
         self.set_entry_values({"roas_revenue": 500, "roas_total_cost": 100})
         results, notifications = calculate_metrics(self.entries, "ru")
+        results = self.formatted(results)
         self.assertTrue(any(r[0] == "ROAS (Возврат затрат)" and "5.00" in r[1] and "Очень хорошо" in r[1] for r in results))
 
     def test_calculate_cr(self):
         self.set_entry_values({"cr_clicks": 100, "cr_conversions": 20})
         results, notifications = calculate_metrics(self.entries, "ru")
+        results = self.formatted(results)
         self.assertTrue(any(r[0] == "CR (Конверсия)" and "20.00%" in r[1] and "Очень хорошо" in r[1] for r in results))
 
     def test_calculate_ltv(self):
         self.set_entry_values({"ltv_avg_revenue": 50, "ltv_purchases": 3, "ltv_period": 2})
         results, notifications = calculate_metrics(self.entries, "ru")
+        results = self.formatted(results)
         self.assertTrue(any(r[0] == "LTV (Пожизненная ценность клиента)" and "300.00" in r[1] and "Нормально" in r[1] for r in results))
 
     def test_calculate_cpl(self):
         self.set_entry_values({"cpl_total_cost": 100, "cpl_leads": 20})
         results, notifications = calculate_metrics(self.entries, "ru")
+        results = self.formatted(results)
         self.assertTrue(any(r[0] == "CPL (Стоимость за лид)" and "5.00" in r[1] and "Хорошо" in r[1] for r in results))
 
     def test_calculate_rpm(self):
         self.set_entry_values({"rpm_revenue": 100, "rpm_impressions": 10000})
         results, notifications = calculate_metrics(self.entries, "ru")
+        results = self.formatted(results)
         self.assertTrue(any(r[0] == "RPM (Доход на тысячу показов)" and "10.00" in r[1] and "Нормально" in r[1] for r in results))
 
+    def test_structured_result(self):
+        self.set_entry_values({"cpc_total_cost": 100, "cpc_clicks": 50})
+        results, notifications = calculate_metrics(self.entries, "ru")
+        self.assertEqual([(r.metric_id, r.value, r.band, r.unit) for r in results], [("cpc", 2.0, "warning", "currency")])
+
     def test_missing_fields(self):
         self.set_entry_values({"ctr_impressions": 1000})
         results, notifications = calculate_metrics(self.entries, "ru")
+        results = self.formatted(results)
         self.assertTrue(any("Незаполненные поля для CTR (Кликабельность)" in n[0] for n in notifications))
 
     def test_invalid_input(self):
@@ -0,0 +1,66 @@
+# tests/test_csv_batch.py
+import csv
+import io
+import os
+import tempfile
+import unittest
+from src.core.csv_batch import process_csv, process_csv_parallel, process_stream, shard_ranges
+
+
+class TestCsvBatch(unittest.TestCase):
+    def test_stream_in_chunks(self):
+        source = io.StringIO("campaign,ctr_impressions,ctr_clicks,cpc_total_cost\n"
+                             "a,1000,50,10\n"
+                             "b,0,5,\n"
+                             "c,200,,7\n")
+        target = io.StringIO()
+        self.assertEqual(process_stream(source, target, chunk_size=2), 3)
+        rows = list(csv.reader(io.StringIO(target.getvalue())))
+        # CPC не рассчитывается: в заголовке нет cpc_clicks
+        self.assertEqual(rows[0], ["campaign", "ctr_impressions", "ctr_clicks", "cpc_total_cost", "ctr"])
+        self.assertAlmostEqual(float(rows[1][4]), 5.0)
+        self.assertEqual(rows[2][4], "")
+        self.assertEqual(rows[3][4], "")
+
+    def test_process_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = os.path.join(tmp, "in.csv")
+            output_path = os.path.join(tmp, "out.csv")
+            with open(input_path, "w", newline="", encoding="utf-8") as f:
+                f.write("roas_revenue;roas_total_cost\n500;100\nbad;1\n")
+            self.assertEqual(process_csv(input_path, output_path, delimiter=";"), 2)
+            with open(output_path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f, delimiter=";"))
+            self.assertEqual(rows[1][-1], "5.0")
+            self.assertEqual(rows[2][-1], "")
+
+    def test_parallel_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = os.path.join(tmp, "in.csv")
+            with open(input_path, "w", newline="", encoding="utf-8") as f:
+                f.write("ctr_impressions,ctr_clicks,cpl_total_cost,cpl_leads\r\n")
+                for i in range(1, 200):
+                    f.write(f"{i * 10},{i},{i * 3},{i % 7}\r\n")
+            serial_path = os.path.join(tmp, "serial.csv")
+            parallel_path = os.path.join(tmp, "parallel.csv")
+            process_csv(input_path, serial_path)
+            self.assertEqual(process_csv_parallel(input_path, parallel_path, workers=2, shards=5, chunk_size=16), 199)
+            with open(serial_path, encoding="utf-8") as a, open(parallel_path, encoding="utf-8") as b:
+                self.assertEqual(a.read(), b.read())
+            self.assertEqual(sorted(os.listdir(tmp)), ["in.csv", "parallel.csv", "serial.csv"])
+
+    def test_shard_ranges_cover_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = os.path.join(tmp, "in.csv")
+            with open(input_path, "w", encoding="utf-8") as f:
+                f.write("a\n1\n22\n333\n")
+            header, ranges = shard_ranges(input_path, 8)
+            self.assertEqual(header, b"a\n")
+            self.assertEqual(ranges[0][0], 2)
+            self.assertEqual(ranges[-1][1], os.path.getsize(input_path))
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, start)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# tests/test_engine.py
+import subprocess
+import sys
+import unittest
+from src.core.engine import IncrementalEvaluator, MetricResult, evaluate
+
+
+class TestEngine(unittest.TestCase):
+    def test_evaluate_ctr(self):
+        results, incomplete = evaluate({"ctr_impressions": 1000.0, "ctr_clicks": 100.0})
+        self.assertEqual(results, [MetricResult("ctr", 10.0, "very_good", "percent")])
+        self.assertEqual(incomplete, [])
+
+    def test_lower_is_better(self):
+        # Для CPC, CPA и CPL меньшее значение лучше
+        results, _ = evaluate({"cpc_total_cost": 100.0, "cpc_clicks": 50.0, "cpl_total_cost": 100.0, "cpl_leads": 20.0})
+        self.assertEqual([result.band for result in results], ["warning", "success"])
+
+    def test_vertical(self):
+        results, _ = evaluate({"cpl_total_cost": 400.0, "cpl_leads": 10.0}, vertical="b2b")
+        self.assertEqual(results[0].band, "very_good")
+
+    def test_incomplete_and_zero(self):
+        results, incomplete = evaluate({"ctr_impressions": 1000.0, "cpc_total_cost": 10.0, "cpc_clicks": 0.0})
+        self.assertEqual(results, [])
+        self.assertEqual(incomplete, ["ctr"])
+
+    def test_incremental(self):
+        evaluator = IncrementalEvaluator()
+        diff = evaluator.update({"ctr_impressions": 1000.0})
+        self.assertEqual((diff.changed, diff.removed, diff.incomplete_changed), ([], [], True))
+        diff = evaluator.update({"ctr_clicks": 100.0, "cpc_total_cost": 100.0, "cpc_clicks": 50.0})
+        self.assertEqual([result.metric_id for result in diff.changed], ["ctr", "cpc"])
+        self.assertTrue(diff.incomplete_changed)
+        # Повтор тех же значений ничего не пересчитывает
+        self.assertEqual(evaluator.update({"ctr_clicks": 100.0}), ([], [], False))
+        diff = evaluator.update({"cpc_clicks": 25.0})
+        self.assertEqual(diff.changed, [MetricResult("cpc", 4.0, "warning", "currency")])
+        diff = evaluator.update({"ctr_clicks": None})
+        self.assertEqual(diff.removed, ["ctr"])
+        self.assertEqual(evaluator.incomplete, {"ctr"})
+
+        values = dict(evaluator.values)
+        results, incomplete = evaluate(values)
+        self.assertEqual(evaluator.result_list(), results)
+        self.assertEqual(sorted(evaluator.incomplete), sorted(incomplete))
+
+    def test_import_without_tk(self):
+        # Ядро должно импортироваться без tkinter, ttkbootstrap и matplotlib
+        code = ("import sys, src.core.engine, src.core.calculations; "
+                "print(any(m in sys.modules for m in ('tkinter', 'ttkbootstrap', 'matplotlib')))")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
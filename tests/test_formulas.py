@@ -0,0 +1,21 @@
+# tests/test_formulas.py
+import unittest
+from src.core.formulas import FORMULAS, METRICS, localized_formulas, metric_title
+
+
+class TestFormulaRegistry(unittest.TestCase):
+    def test_compiled_expressions(self):
+        self.assertAlmostEqual(METRICS["ctr"].compute(1000, 50), 5.0)
+        self.assertAlmostEqual(METRICS["ltv"].compute(50, 3, 2), 300.0)
+
+    def test_languages_share_registry(self):
+        for lang in FORMULAS:
+            ids = [metric_id for metric_id, _, _, _ in localized_formulas(lang)]
+            self.assertEqual(ids, list(METRICS))
+            for (title, _, fields), metric_id in zip(FORMULAS[lang], METRICS):
+                self.assertEqual(title, metric_title(metric_id, lang))
+                self.assertEqual(tuple(name for _, name, _ in fields), METRICS[metric_id].inputs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+# tests/test_graph.py
+import unittest
+import numpy as np
+from src.core.engine import evaluate
+from src.core.graph import DEFAULT_GRAPH, LEGACY_INPUTS, MetricGraph, from_legacy_inputs
+
+
+class TestMetricGraph(unittest.TestCase):
+    def test_plan_only_needed_nodes(self):
+        self.assertEqual(DEFAULT_GRAPH.plan(["ltv_cac"]), ["ltv", "cac", "ltv_cac"])
+        self.assertEqual(DEFAULT_GRAPH.required_inputs(["roi"]), ["spend", "revenue"])
+        self.assertEqual(DEFAULT_GRAPH.downstream(["customers"]), ["cac", "ltv_cac"])
+
+    def test_scalar_evaluation(self):
+        result = DEFAULT_GRAPH.evaluate({"spend": 200.0, "revenue": 500.0, "customers": 0.0,
+                                         "avg_revenue": 50.0, "purchases": 3.0, "period": 2.0},
+                                        targets=["roi", "ltv_cac", "ltv"])
+        self.assertEqual(result, {"roi": 150.0, "ltv": 300.0, "ltv_cac": None})
+
+    def test_each_node_evaluated_once(self):
+        calls = []
+        graph = MetricGraph(("a", "b"), {"s": "a + b", "x": "s * 2", "y": "s * 3"})
+        compiled = graph._compiled["s"]
+        graph._compiled["s"] = lambda a, b: calls.append(1) or compiled(a, b)
+        result = graph.evaluate({"a": np.array([1.0, 2.0]), "b": np.array([3.0, np.nan])}, targets=["x", "y"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(result["x"].tolist(), [8.0, None])
+        self.assertNotIn("s", result)
+
+    def test_base_metrics_match_engine(self):
+        # Метрики графа берутся из METRICS: те же значения и те же пропуски при нулевом аргументе
+        base = {"impressions": 1000.0, "clicks": 0.0, "spend": 200.0, "conversions": 10.0, "revenue": 500.0,
+                "avg_revenue": 50.0, "purchases": 3.0, "period": 2.0, "leads": 20.0}
+        results, _ = evaluate({field: base[name] for field, name in LEGACY_INPUTS.items()})
+        expected = {result.metric_id: result.value for result in results}
+        graph = DEFAULT_GRAPH.evaluate(base, targets=["ctr", "cpc", "cpa", "roas", "ltv", "rpm"])
+        self.assertIsNone(graph["ctr"])  # Нулевой числитель: метрика пропускается, а не равна 0
+        self.assertNotIn("ctr", expected)
+        for metric_id in ("cpa", "roas", "ltv", "rpm"):
+            self.assertAlmostEqual(graph[metric_id], expected[metric_id])
+
+    def test_cycle_detected(self):
+        with self.assertRaises(ValueError):
+            MetricGraph(("a",), {"x": "y + a", "y": "x * 2"})
+
+    def test_legacy_inputs(self):
+        base = from_legacy_inputs({"cpc_total_cost": 100.0, "cpa_total_cost": 100.0, "cpc_clicks": 50.0})
+        self.assertEqual(base, {"spend": 100.0, "clicks": 50.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# tests/test_history_store.py
+import json
+import os
+import tempfile
+import unittest
+from src.data.history_store import HistoryPager, HistoryStore
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = HistoryStore(os.path.join(self.directory.name, "history.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_append_and_pages(self):
+        for i in range(25):
+            self.store.append({"ctr_impressions": "1000", "ctr_clicks": str(i + 1), "cpc_clicks": ""},
+                              f"CTR: {i}", [("ctr", (i + 1) / 10, "danger" if i < 10 else "success")],
+                              timestamp=1000.0 + i)
+        self.assertEqual(self.store.count(), 25)
+        first = self.store.query(limit=10)
+        self.assertEqual([record.id for record in first], list(range(25, 15, -1)))
+        second = self.store.query(before_id=first[-1].id, limit=10)
+        self.assertEqual(second[0].id, 15)
+        self.assertEqual(first[0].entries, {"ctr_impressions": "1000", "ctr_clicks": "25"})
+        self.assertEqual(first[0].metrics, [("ctr", 2.5, "success")])
+
+    def test_non_finite_metrics_skipped(self):
+        record_id = self.store.append({"cpc_total_cost": "100", "cpc_clicks": "nan"}, "CPC: Ошибка",
+                                      [("cpc", float("nan"), "danger"), ("ctr", 5.0, "success")])
+        record = self.store.get(record_id)
+        self.assertEqual(record.results, "CPC: Ошибка")
+        self.assertEqual(record.metrics, [("ctr", 5.0, "success")])
+        self.assertEqual(self.store.count(metric_id="ctr"), 1)
+
+    def test_indexed_filters(self):
+        for i in range(30):
+            self.store.append({"cpc_total_cost": str(100 + i), "cpc_clicks": "50"}, "",
+                              [("cpc", (100 + i) / 50, "warning" if i % 2 else "success")], timestamp=float(i))
+        self.assertEqual(self.store.count(band="success"), 15)
+        self.assertEqual(self.store.count(start=10.0, end=20.0), 10)
+        self.assertEqual(self.store.count(metric_id="cpc", value_range=(2.0, 2.1)), 6)
+        self.assertEqual(self.store.count(input_field="cpc_total_cost", input_range=(125, 200)), 5)
+        self.assertEqual(self.store.count(metric_id="ctr"), 0)
+        self.assertEqual(len(self.store.metric_series("cpc", start=25.0)), 5)
+        self.assertEqual(self.store.get(3).entries["cpc_total_cost"], "102")
+        self.assertIsNone(self.store.get(999))
+
+    def test_pager(self):
+        for i in range(7):
+            self.store.append({}, str(i), [("roas", 1.0, "danger" if i % 2 else "success")])
+        pager = HistoryPager(self.store, page_size=2, band="success")
+        self.assertEqual(pager.total(), 4)
+        pages = []
+        while not pager.exhausted:
+            pages.append([record.results for record in pager.next_page()])
+        self.assertEqual(pages, [["6", "4"], ["2", "0"], []])
+        self.assertEqual(pager.next_page(), [])
+
+    def test_migrate_json(self):
+        path = os.path.join(self.directory.name, "history.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([{"entries": {"ctr_clicks": "5"}, "results": "old"}, {"entries": {}, "results": "new"}], f)
+        self.assertEqual(self.store.migrate_json(path), 2)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual([record.results for record in self.store.query()], ["new", "old"])
+        self.assertEqual(self.store.migrate_json(path), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
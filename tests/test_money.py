@@ -0,0 +1,75 @@
+# tests/test_money.py
+import io
+import unittest
+import numpy as np
+from src.core.batch import calculate_batch
+from src.core.csv_batch import process_stream
+from src.core.engine import evaluate
+from src.core.money import format_micros, from_micros, round_micros, to_micros
+from src.core.rollup import rollup
+
+
+class TestMoney(unittest.TestCase):
+    def test_rounding_modes(self):
+        values = np.array([2.5, 3.5, -2.5, 2.4])
+        self.assertEqual(round_micros(values, "half_even").tolist(), [2, 4, -2, 2])
+        self.assertEqual(round_micros(values, "half_up").tolist(), [3, 4, -3, 2])
+        self.assertEqual(round_micros(values, "down").tolist(), [2, 3, -2, 2])
+        self.assertEqual(round_micros(values, "floor").tolist(), [2, 3, -3, 2])
+        self.assertEqual(round_micros(values, "ceiling").tolist(), [3, 4, -2, 3])
+        with self.assertRaises(ValueError):
+            round_micros(values, "nearest")
+
+    def test_conversion_and_format(self):
+        self.assertEqual(to_micros(0.1), 100_000)
+        self.assertEqual(to_micros(np.array([5, 7])).tolist(), [5, 7])
+        # Скаляры всегда в единицах валюты, целые так же, как дробные
+        self.assertEqual(to_micros(100), 100_000_000)
+        self.assertEqual(to_micros(np.int64(3)), 3_000_000)
+        self.assertEqual(from_micros(12_500_000), 12.5)
+        self.assertEqual(format_micros(12_500_000, 2), "12.50")
+        self.assertEqual(format_micros(-1_234_567, 2), "-1.234567")
+        self.assertEqual(format_micros(np.array([3_000_000]), 0), ["3"])
+
+    def test_batch_micros(self):
+        result = calculate_batch({"cpc_total_cost": np.array([10.0, 1.0, np.nan]),
+                                  "cpc_clicks": np.array([3.0, 0.0, 1.0])}, metrics=["cpc"], currency="micros")
+        self.assertEqual(result["cpc"].dtype, np.int64)
+        self.assertEqual(result["cpc"][0], 3_333_333)
+        self.assertEqual(np.ma.getmaskarray(result["cpc"]).tolist(), [False, True, True])
+        # Целые столбцы уже в микроединицах
+        result = calculate_batch({"roas_revenue": np.array([30_000_000]), "roas_total_cost": np.array([10_000_000])},
+                                 metrics=["roas"], currency="micros")
+        self.assertAlmostEqual(result["roas"][0], 3.0)
+
+    def test_engine_micros(self):
+        results, _ = evaluate({"cpc_total_cost": 100.0, "cpc_clicks": 50.0, "ctr_impressions": 1000.0,
+                               "ctr_clicks": 50.0}, currency="micros")
+        by_id = {result.metric_id: result for result in results}
+        self.assertEqual(by_id["cpc"].value, 2_000_000)
+        self.assertEqual(by_id["cpc"].band, "warning")  # Диапазон считается по значению в единицах валюты
+        self.assertAlmostEqual(by_id["ctr"].value, 5.0)
+        results, _ = evaluate({"cpc_total_cost": 100, "cpc_clicks": 50}, currency="micros")
+        self.assertEqual(results[0].value, 2_000_000)
+
+    def test_rollup_sums_exactly(self):
+        size = 1_000_000
+        columns = {
+            "campaign": np.zeros(size, dtype=np.int64),
+            "cpa_total_cost": np.full(size, 0.1),
+            "cpa_actions": np.ones(size),
+        }
+        exact = rollup(columns, ["campaign"], metrics=["cpa"], currency="micros")
+        self.assertEqual(int(exact["cpa_total_cost"][0]), 100_000 * size)
+        self.assertEqual(int(exact["cpa"][0]), 100_000)
+
+    def test_csv_micros(self):
+        source = io.StringIO("cpc_total_cost,cpc_clicks\n0.30,3\n1,0\n")
+        target = io.StringIO()
+        process_stream(source, target, metrics=["cpc"], currency="micros")
+        self.assertEqual(target.getvalue().splitlines(), ["cpc_total_cost,cpc_clicks,cpc",
+                                                          "0.30,3,0.100000", "1,0,"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# tests/test_montecarlo.py
+import pickle
+import unittest
+import numpy as np
+from src.core.graph import DEFAULT_GRAPH
+from src.core.montecarlo import (beta, beta_from_counts, fixed, lognormal, parse_distribution, simulate,
+                                 simulate_campaigns)
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def setUp(self):
+        self.inputs = {"spend": 10000, "cpc": lognormal(1.2, 0.2), "cr": beta(3, 500, 100),
+                       "aov": lognormal(80, 0.3), "purchases": 3, "period": {"kind": "lognormal", "mean": 2, "sigma": 0.2}}
+
+    def test_reproducible_with_seed(self):
+        first = simulate(self.inputs, draws=20000, seed=42)
+        second = simulate(self.inputs, draws=20000, seed=42)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first["roas"], simulate(self.inputs, draws=20000, seed=43)["roas"])
+
+    def test_percentiles_and_means(self):
+        forecast = simulate(self.inputs, draws=200000, seed=1)
+        ltv = forecast["ltv"]
+        # LTV = aov × purchases × period: среднее произведения независимых величин — произведение средних
+        self.assertAlmostEqual(ltv.mean, 80 * 3 * 2, delta=3)
+        self.assertLess(ltv.percentiles[5.0], ltv.percentiles[50.0])
+        self.assertLess(ltv.percentiles[50.0], ltv.percentiles[95.0])
+        self.assertEqual(ltv.valid, 1.0)
+
+    def test_fixed_inputs_and_graph(self):
+        forecast = simulate({"spend": fixed(1000), "conversions": 50, "revenue": 4000}, targets=["cpa", "roas"],
+                            draws=10, graph=DEFAULT_GRAPH)
+        self.assertEqual(forecast["cpa"].percentiles[50.0], 20.0)
+        self.assertEqual(forecast["roas"].std, 0.0)
+
+    def test_campaigns_independent_of_workers(self):
+        campaigns = [self.inputs, dict(self.inputs, spend=5000)]
+        serial = simulate_campaigns(campaigns, draws=5000, seed=7, workers=1)
+        parallel = simulate_campaigns(campaigns, draws=5000, seed=7, workers=2)
+        self.assertEqual(serial, parallel)
+        self.assertIsNotNone(pickle.loads(pickle.dumps(DEFAULT_GRAPH)).order)
+
+    def test_parse_distribution(self):
+        self.assertEqual(parse_distribution(5).kind, "fixed")
+        posterior = parse_distribution({"kind": "beta", "successes": 8, "trials": 98, "scale": 100})
+        self.assertEqual(posterior, beta_from_counts(8, 98, 100))
+        self.assertAlmostEqual(posterior.first, 9.0)
+        with self.assertRaises(ValueError):
+            parse_distribution({"kind": "gamma"})
+        with self.assertRaises(ValueError):
+            parse_distribution(lognormal(-1, 0.2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+# tests/test_rollup.py
+import csv
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.core.rollup import GroupAggregator, rollup, rollup_csv, week_start
+
+
+class TestRollup(unittest.TestCase):
+    def test_ratio_of_sums(self):
+        columns = {
+            "campaign": np.array(["a", "a", "b"]),
+            "ctr_impressions": np.array([100.0, 900.0, 50.0]),
+            "ctr_clicks": np.array([50.0, 10.0, 5.0]),
+        }
+        result = rollup(columns, ["campaign"], metrics=["ctr", "ltv"])
+        self.assertEqual(result["campaign"].tolist(), ["a", "b"])
+        self.assertEqual(result["rows"].tolist(), [2.0, 1.0])
+        # sum(clicks) / sum(impressions), а не среднее долей (27.5%)
+        self.assertAlmostEqual(result["ctr"][0], 6.0)
+        self.assertNotIn("ltv", result)
+
+    def test_spill_matches_in_memory(self):
+        rng = np.random.default_rng(1)
+        size = 5000
+        columns = {
+            "campaign": rng.integers(0, 700, size).astype(str),
+            "channel": rng.choice(["search", "social"], size),
+            "cpc_total_cost": rng.random(size) * 100,
+            "cpc_clicks": rng.integers(0, 20, size).astype(float),
+        }
+        expected = rollup(columns, ["campaign", "channel"], metrics=["cpc"])
+        aggregator = GroupAggregator(["campaign", "channel"], metrics=["cpc"], max_groups=100, partitions=4)
+        for start in range(0, size, 500):
+            aggregator.add({name: values[start:start + 500] for name, values in columns.items()})
+        blocks = list(aggregator.results())
+        self.assertGreater(len(blocks), 1)
+        got = {}
+        for block in blocks:
+            for campaign, channel, clicks in zip(block["campaign"], block["channel"], block["cpc_clicks"]):
+                got[(campaign, channel)] = clicks
+        self.assertEqual(len(got), len(expected["campaign"]))
+        for campaign, channel, clicks in zip(expected["campaign"], expected["channel"], expected["cpc_clicks"]):
+            self.assertAlmostEqual(got[(campaign, channel)], clicks)
+
+    def test_micros_with_partial_columns(self):
+        columns = {
+            "campaign": np.array(["a", "a", "b"]),
+            "ctr_impressions": np.array([100.0, 900.0, 50.0]),
+            "ctr_clicks": np.array([50.0, 10.0, 5.0]),
+        }
+        result = rollup(columns, ["campaign"], currency="micros")
+        self.assertAlmostEqual(result["ctr"][0], 6.0)
+        self.assertEqual(result["cpc_total_cost"].tolist(), [0, 0])
+        self.assertTrue(np.ma.getmaskarray(result["cpc"]).all())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = os.path.join(tmp, "in.csv")
+            output_path = os.path.join(tmp, "out.csv")
+            with open(input_path, "w", newline="", encoding="utf-8") as f:
+                f.write("campaign,roas_revenue,roas_total_cost\na,100.5,50\na,,10\n")
+            self.assertEqual(rollup_csv(input_path, output_path, ["campaign"], currency="micros"), 1)
+            with open(output_path, newline="", encoding="utf-8") as f:
+                row = next(csv.DictReader(f))
+            self.assertEqual(row["roas_total_cost"], "50.000000")
+            self.assertEqual(float(row["roas"]), 2.01)
+
+    def test_week_start(self):
+        self.assertEqual(week_start(np.array(["2025-03-08", "2025-03-10"])).tolist(), ["2025-03-03", "2025-03-10"])
+
+    def test_rollup_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = os.path.join(tmp, "in.csv")
+            output_path = os.path.join(tmp, "out.csv")
+            with open(input_path, "w", newline="", encoding="utf-8") as f:
+                f.write("date,roas_revenue,roas_total_cost\n2025-03-04,100,50\n2025-03-06,,10\n2025-03-11,30,10\n")
+            self.assertEqual(rollup_csv(input_path, output_path, ["date:week"], chunk_size=2), 2)
+            with open(output_path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(rows[0]["date:week"], "2025-03-03")
+            self.assertEqual(float(rows[0]["roas"]), 2.0)
+            self.assertEqual(float(rows[1]["roas"]), 3.0)
+            # Метрики без входных полей в заголовке не попадают в результат
+            self.assertEqual(list(rows[0]), ["date:week", "rows", "roas_revenue", "roas_total_cost", "roas"])
+
+
+if __name__ == "__main__":
+    unittest.main()
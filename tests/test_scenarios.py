@@ -0,0 +1,53 @@
+# tests/test_scenarios.py
+import unittest
+import numpy as np
+from src.core.scenarios import ScenarioGrid, axis_range, scenario_grid
+
+
+class TestScenarios(unittest.TestCase):
+    def setUp(self):
+        self.axes = {
+            "spend": axis_range(1000, 5000, 9),
+            "cpc": axis_range(0.5, 3.0, 6),
+            "cr": axis_range(1, 10, 5),
+            "aov": np.array([40.0, 80.0]),
+        }
+
+    def test_matches_pointwise(self):
+        result = scenario_grid(self.axes, fixed={"purchases": 2, "period": 3})
+        self.assertEqual(result.values["cpa"].shape, (9, 6, 5, 2))
+        spend, cpc, cr, aov = 1500.0, self.axes["cpc"][2], self.axes["cr"][3], 80.0
+        conversions = spend / cpc * cr / 100
+        self.assertAlmostEqual(result.values["cpa"][1, 2, 3, 1], spend / conversions)
+        self.assertAlmostEqual(result.values["roas"][1, 2, 3, 1], conversions * aov / spend)
+        self.assertAlmostEqual(result.values["ltv"][1, 2, 3, 1], aov * 2 * 3)
+
+    def test_blocks_match_in_memory(self):
+        grid = ScenarioGrid(self.axes, targets=["cpa", "roi"])
+        full = grid.evaluate()
+        chunked = grid.evaluate(max_cells=7)
+        for metric_id in ("cpa", "roi"):
+            np.testing.assert_allclose(full.values[metric_id], chunked.values[metric_id])
+        cells = sum(block["cpa"].size for _, block in grid.blocks(max_cells=7))
+        self.assertEqual(cells, grid.size)
+
+    def test_best_and_heatmap(self):
+        grid = ScenarioGrid(self.axes, targets=["cpa"])
+        value, point = grid.best("cpa", maximize=False, max_cells=5)
+        self.assertAlmostEqual(value, grid.evaluate().values["cpa"].min())
+        self.assertEqual(point["cpc"], 0.5)
+        self.assertEqual(point["cr"], 10.0)
+        x, y, values = grid.heatmap("cpc", "cr", "cpa", at={"spend": 4})
+        self.assertEqual(values.shape, (len(y), len(x)))
+        np.testing.assert_allclose(values, grid.evaluate().values["cpa"][4, :, :, 0].T)
+
+    def test_missing_input_masks(self):
+        result = scenario_grid({"spend": [100.0, 200.0]}, targets=["cpa"])
+        self.assertTrue(np.ma.getmaskarray(result.values["cpa"]).all())
+        with self.assertRaises(KeyError):
+            ScenarioGrid({"clicks": [1.0]})
+        self.assertEqual(result.select(spend=1).values["cpa"].shape, ())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# tests/test_session.py
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from src.data.data_manager import DataManager
+from src.data.session import SESSION_FILE, SESSION_VERSION, load_session
+
+
+class TestSession(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def read(self, name):
+        with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_empty(self):
+        session = load_session(self.directory)
+        self.assertEqual(session["version"], SESSION_VERSION)
+        self.assertEqual(session["ui"], {})
+        self.assertFalse(os.listdir(self.directory))
+
+    def test_migrates_legacy_files(self):
+        self.write("ui_state.json", {"theme": "darkly", "language": "en", "collapsed_state": {"CPA": False}})
+        self.write("collapsed_state.json", {"CPA": True})
+        self.write("autosave.json", {"lang": "en", "entries": {"cpc_clicks": "10"}, "results": "CPC: 2.00"})
+        session = load_session(self.directory)
+        self.assertEqual(session["ui"], {"theme": "darkly", "language": "en"})
+        self.assertEqual(session["collapsed"], {"CPA": True})
+        self.assertEqual(session["inputs"], {"cpc_clicks": "10"})
+        self.assertEqual(session["results"], "CPC: 2.00")
+        self.assertEqual(self.read(SESSION_FILE), session)
+        self.assertIn("ui_state.json.migrated", os.listdir(self.directory))
+        self.assertNotIn("autosave.json", os.listdir(self.directory))
+        self.assertEqual(load_session(self.directory), session)
+
+    def test_upgrades_missing_keys(self):
+        self.write(SESSION_FILE, {"version": 0, "ui": {"theme": "solar"}, "extra": 1})
+        session = load_session(self.directory)
+        self.assertEqual(session["version"], SESSION_VERSION)
+        self.assertEqual(session["ui"], {"theme": "solar"})
+        self.assertEqual(session["extra"], 1)
+        self.assertIsNone(session["history_cursor"])
+
+    def test_data_manager_round_trip(self):
+        manager = DataManager(self.directory)
+        manager.save_ui_state({"theme": "flatly", "language": "ru", "collapsed_state": {"ROAS": True}})
+        manager.save_collapsed_state({"ROAS": False})
+        manager.history_store.append({"cpc_clicks": "10"}, "CPC: 2.00")
+        manager.add_to_history({}, "CPC: 3.00")
+        manager.save_history_cursor(1)
+        manager.close()
+        session = self.read(SESSION_FILE)
+        self.assertEqual(session["ui"], {"theme": "flatly", "language": "ru"})
+        self.assertEqual(session["collapsed"], {"ROAS": False})
+        self.assertEqual(session["history_cursor"], 1)
+
+        manager = DataManager(self.directory)
+        self.assertEqual(len(manager.history_store.query()), 2)
+        self.assertEqual(manager.load_history_cursor(), 1)
+        self.assertEqual(manager.load_ui_state()["collapsed_state"], {"ROAS": False})
+        self.assertEqual(manager.load_collapsed_state("ru"), {"ROAS": False})
+        self.assertEqual(manager.save({"cpc_clicks": "5"}, "CPC: 1.00", "en"), "Saved successfully")
+        self.assertEqual(self.read(SESSION_FILE)["inputs"], {"cpc_clicks": "5"})
+        self.assertEqual(manager.load("en"), ({"cpc_clicks": "5"}, "CPC: 1.00", "Loaded successfully"))
+        manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+# tests/test_solver.py
+import unittest
+import numpy as np
+from src.core.graph import DEFAULT_GRAPH
+from src.core.solver import solve
+
+
+class TestSolver(unittest.TestCase):
+    def test_closed_form_registry(self):
+        self.assertAlmostEqual(float(solve("cpa", 20, "cpa_actions", {"cpa_total_cost": 1000})), 50.0)
+        result = solve("roas", 4, "roas_revenue", {"roas_total_cost": np.array([100.0, 250.0, 0.0])})
+        self.assertEqual(result[:2].tolist(), [400.0, 1000.0])
+        self.assertTrue(result.mask[2])
+        self.assertAlmostEqual(float(solve("ltv", 600, "ltv_period", {"ltv_avg_revenue": 50, "ltv_purchases": 4})), 3.0)
+        self.assertAlmostEqual(float(solve("ctr", 5, "ctr_impressions", {"ctr_clicks": 50})), 1000.0)
+
+    def test_graph_closed_form(self):
+        result = solve("ltv_cac", 3, "spend", {"avg_revenue": 50, "purchases": 4, "period": 2, "customers": 10})
+        self.assertAlmostEqual(float(result), 4000 / 3)
+        targets = np.array([10.0, 20.0, 40.0])
+        np.testing.assert_allclose(solve("cpa", targets, "conversions", {"spend": 1000.0}), [100.0, 50.0, 25.0])
+
+    def test_root_finder(self):
+        targets = np.array([50.0, 150.0, -20.0])
+        revenue = solve("roi", targets, "revenue", {"spend": 1000.0})
+        np.testing.assert_allclose(revenue, [1500.0, 2500.0, 800.0], rtol=1e-8)
+        check = DEFAULT_GRAPH.evaluate({"revenue": revenue.data, "spend": np.full(3, 1000.0)}, ["roi"])["roi"]
+        np.testing.assert_allclose(check, targets, rtol=1e-6)
+        self.assertAlmostEqual(float(solve("roi", 50, "spend", {"revenue": 1500})), 1000.0, places=4)
+
+    def test_unreachable_is_masked(self):
+        # ROI не бывает ниже −100% при положительной выручке
+        self.assertTrue(np.ma.getmaskarray(solve("roi", -150, "revenue", {"spend": 1000.0})).all())
+        with self.assertRaises(KeyError):
+            solve("cpa", 20, "impressions", {})
+
+
+if __name__ == "__main__":
+    unittest.main()
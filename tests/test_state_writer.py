@@ -0,0 +1,97 @@
+# tests/test_state_writer.py
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from src.data import state_writer
+from src.data.state_writer import StateWriter, atomic_write_json
+
+
+class TestStateWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "ui_state.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_atomic_write(self):
+        atomic_write_json(self.path, {"theme": "solar"})
+        self.assertEqual(self.read(), {"theme": "solar"})
+        self.assertEqual(os.listdir(self.directory), ["ui_state.json"])
+
+    def test_failed_write_keeps_old_file(self):
+        atomic_write_json(self.path, {"theme": "solar"})
+        with mock.patch.object(state_writer.os, "replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                atomic_write_json(self.path, {"theme": "darkly"})
+        self.assertEqual(self.read(), {"theme": "solar"})
+        self.assertEqual(os.listdir(self.directory), ["ui_state.json"])
+
+    def test_coalesces_until_close(self):
+        writer = StateWriter(delay=60)
+        state = {"geometry": "600x700"}
+        with mock.patch.object(state_writer, "atomic_write_text", wraps=state_writer.atomic_write_text) as write:
+            for width in range(600, 700):
+                state["geometry"] = f"{width}x700"
+                writer.put(self.path, state)
+            state["geometry"] = "changed after put"
+            self.assertFalse(os.path.exists(self.path))
+            self.assertEqual(len(writer.pending()), 1)
+            writer.close()
+            self.assertEqual(write.call_count, 1)
+        self.assertEqual(self.read(), {"geometry": "699x700"})
+
+    def test_background_flush(self):
+        writer = StateWriter(delay=0.01)
+        writer.put(self.path, {"language": "en"})
+        for _ in range(200):
+            if not writer.pending() and os.path.exists(self.path):
+                break
+            writer._closed.wait(0.01)
+        self.assertEqual(self.read(), {"language": "en"})
+        writer.close()
+
+    def test_concurrent_flushes_keep_newest(self):
+        writer = StateWriter(delay=60)
+        started, release = threading.Event(), threading.Event()
+        write_text = state_writer.atomic_write_text
+
+        def slow_write(path, text):
+            # Запись старого снимка задерживается, пока другой поток сбрасывает новый
+            if "old" in text:
+                started.set()
+                release.wait(5)
+            write_text(path, text)
+
+        with mock.patch.object(state_writer, "atomic_write_text", side_effect=slow_write):
+            writer.put(self.path, {"value": "old"})
+            first = threading.Thread(target=writer.flush)
+            first.start()
+            self.assertTrue(started.wait(5))
+            writer.put(self.path, {"value": "new"})
+            second = threading.Thread(target=writer.flush)
+            second.start()
+            second.join(0.1)
+            release.set()
+            first.join(5)
+            second.join(5)
+        self.assertEqual(self.read(), {"value": "new"})
+        writer.close()
+
+    def test_put_after_close_writes_immediately(self):
+        writer = StateWriter()
+        writer.close()
+        writer.put(self.path, {"theme": "flatly"})
+        self.assertEqual(self.read(), {"theme": "flatly"})
+
+
+if __name__ == "__main__":
+    unittest.main()
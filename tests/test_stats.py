@@ -0,0 +1,72 @@
+# tests/test_stats.py
+import math
+import unittest
+import numpy as np
+from src.core.stats import (count_ratio_interval, normal_sf, proportion_interval, rate_interval, ratio_interval,
+                            significant, two_proportion_test, z_value)
+
+
+class TestStats(unittest.TestCase):
+    def test_normal_sf(self):
+        z = np.array([-2.0, 0.0, 1.96, 5.0])
+        expected = [0.5 * math.erfc(value / math.sqrt(2)) for value in z]
+        np.testing.assert_allclose(normal_sf(z), expected, rtol=1e-6)
+        self.assertAlmostEqual(z_value(0.95), 1.959964, places=5)
+
+    def test_wilson_known_values(self):
+        interval = proportion_interval([3, 0, 5], [60, 10, 0])
+        # Известные значения интервала Уилсона для 3 из 60
+        self.assertAlmostEqual(interval.low[0], 0.01715, places=4)
+        self.assertAlmostEqual(interval.high[0], 0.13701, places=4)
+        self.assertAlmostEqual(interval.low[1], 0.0)
+        self.assertGreater(interval.high[1], 0.0)
+        self.assertTrue(interval.estimate.mask[2])
+
+    def test_rate_interval_in_percent(self):
+        columns = {"ctr_clicks": np.array([50.0]), "ctr_impressions": np.array([1000.0])}
+        for method in ("wilson", "agresti_coull"):
+            interval = rate_interval("ctr", columns, method=method)
+            self.assertAlmostEqual(interval.estimate[0], 5.0)
+            self.assertLess(interval.low[0], 5.0)
+            self.assertGreater(interval.high[0], 5.0)
+        with self.assertRaises(ValueError):
+            rate_interval("cpa", columns)
+
+    def test_count_ratio_interval(self):
+        interval = count_ratio_interval("cpa", {"cpa_total_cost": np.array([400.0, 1.0]),
+                                                "cpa_actions": np.array([16.0, 0.0])})
+        self.assertAlmostEqual(interval.estimate[0], 25.0)
+        self.assertAlmostEqual(interval.high[0] - 25.0, z_value() * 25.0 / 4)
+        self.assertTrue(interval.estimate.mask[1])
+
+    def test_ratio_interval_groups(self):
+        rng = np.random.default_rng(3)
+        cost = rng.random(2000) * 10 + 1
+        revenue = cost * 4 + rng.normal(0, 1, 2000)
+        groups = np.repeat(["a", "b"], 1000)
+        interval = ratio_interval(revenue, cost, groups)
+        self.assertEqual(len(interval.estimate), 2)
+        for i, name in enumerate(["a", "b"]):
+            selected = groups == name
+            self.assertAlmostEqual(interval.estimate[i], revenue[selected].sum() / cost[selected].sum())
+            self.assertLess(interval.low[i], 4.0 + 0.05)
+            self.assertGreater(interval.high[i], 4.0 - 0.05)
+
+    def test_two_proportion_test(self):
+        result = two_proportion_test([100, 10, 0], [1000, 1000, 0], [150, 11, 5], [1000, 1000, 10])
+        self.assertAlmostEqual(result.difference[0], 0.05)
+        self.assertLess(result.p_value[0], 0.01)
+        self.assertGreater(result.p_value[1], 0.5)
+        self.assertTrue(result.p_value.mask[2])
+        flags = significant(result.p_value)
+        self.assertEqual(flags.tolist(), [True, False, False])
+
+    def test_significant_corrections(self):
+        p = np.array([0.001, 0.02, 0.03, 0.5])
+        self.assertEqual(significant(p, correction=None).tolist(), [True, True, True, False])
+        self.assertEqual(significant(p, correction="bonferroni").tolist(), [True, False, False, False])
+        self.assertEqual(significant(p, correction="fdr").tolist(), [True, True, True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
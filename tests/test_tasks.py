@@ -0,0 +1,150 @@
+# tests/test_tasks.py
+import os
+import tempfile
+import threading
+import time
+import unittest
+from src.data.history_store import HistoryStore
+from src.utils.tasks import TaskCancelled, TaskRunner
+
+
+class FakeScheduler:
+    """Заменяет root.after: отложенные вызовы выполняются по pump в текущем потоке."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, delay, callback):
+        self.calls.append(callback)
+
+    def pump(self, runner, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while self.calls and time.monotonic() < deadline:
+            callbacks, self.calls = self.calls, []
+            for callback in callbacks:
+                callback()
+            if runner.active:
+                time.sleep(0.01)
+
+
+def square(x):
+    return x * x
+
+
+class TestTaskRunner(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = FakeScheduler()
+        self.changes = []
+        self.runner = TaskRunner(self.scheduler, threads=1, processes=1, on_change=self.changes.append)
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_result_delivered_on_polling_thread(self):
+        delivered = []
+        task = self.runner.submit(square, 4, label="square",
+                                  on_done=lambda result: delivered.append((result, threading.current_thread())))
+        self.assertEqual(self.runner.active, [task])
+        self.assertEqual(delivered, [])
+        self.scheduler.pump(self.runner)
+        self.assertEqual(delivered, [(16, threading.current_thread())])
+        self.assertEqual(self.runner.active, [])
+        self.assertEqual(self.changes[0], [task])
+        self.assertEqual(self.changes[-1], [])
+
+    def test_error_delivered(self):
+        errors = []
+        self.runner.submit(square, None, on_done=self.fail, on_error=errors.append)
+        self.scheduler.pump(self.runner)
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], TypeError)
+
+    def test_cancel(self):
+        release = threading.Event()
+        delivered = []
+        first = self.runner.submit(release.wait, 5, on_done=delivered.append)
+        queued = self.runner.submit(square, 3, on_done=delivered.append)
+        self.assertEqual(self.runner.cancel_all(), 2)
+        release.set()
+        self.scheduler.pump(self.runner)
+        self.assertTrue(first.cancelled and queued.cancelled)
+        self.assertTrue(queued.future.cancelled())
+        self.assertEqual(delivered, [])
+        self.assertEqual(self.runner.active, [])
+
+    def test_commit_blocks_cancel(self):
+        committed, release = threading.Event(), threading.Event()
+        delivered = []
+
+        def write(task):
+            task.commit()
+            committed.set()
+            release.wait(5)
+            return "written"
+
+        task = self.runner.submit(write, with_task=True, on_done=delivered.append)
+        self.assertTrue(committed.wait(5))
+        self.assertFalse(task.cancellable)
+        self.assertFalse(task.cancel())
+        self.assertEqual(self.runner.cancel_all(), 0)
+        release.set()
+        self.scheduler.pump(self.runner)
+        self.assertEqual(delivered, ["written"])
+
+    def test_running_process_task_not_cancelled(self):
+        task = self.runner.submit_cpu(time.sleep, 0.5)
+        deadline = time.monotonic() + 30
+        while not task.future.running() and not task.future.done() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(task.cancel())
+        self.assertFalse(task.cancelled)
+        self.scheduler.pump(self.runner, timeout=60)
+
+    def test_shutdown_finishes_writes(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = HistoryStore(os.path.join(directory.name, "history.db"))
+        self.addCleanup(store.close)
+        release = threading.Event()
+        reads = []
+        # Единственный поток занят: запись в историю и чтение ещё стоят в очереди к моменту shutdown
+        self.runner.submit(release.wait, 5, label="busy")
+        append = self.runner.submit(store.append, {"cpc_clicks": "10"}, "CPC: 2.00", writes=True)
+        read = self.runner.submit(reads.append, "read", label="read")
+        threading.Timer(0.1, release.set).start()
+        self.runner.shutdown(wait=True)
+        self.assertTrue(append.future.done() and not append.cancelled)
+        self.assertEqual([record.results for record in store.query()], ["CPC: 2.00"])
+        self.assertTrue(read.cancelled)
+        self.assertEqual(reads, [])
+
+    def test_progress_and_cooperative_cancel(self):
+        started = threading.Event()
+        errors = []
+
+        def work(task, steps):
+            for step in range(steps):
+                task.report(step + 1, steps)
+                started.set()
+                task.check()
+                time.sleep(0.01)
+            return steps
+
+        task = self.runner.submit(work, 1000, with_task=True, on_done=self.fail, on_error=errors.append)
+        self.assertTrue(started.wait(5))
+        self.assertEqual(task.progress[1], 1000)
+        task.cancel()
+        self.scheduler.pump(self.runner)
+        self.assertIsInstance(task.future.exception(), TaskCancelled)
+        self.assertEqual(errors, [])
+
+    def test_process_pool(self):
+        delivered = []
+        task = self.runner.submit_cpu(square, 7, label="cpu", on_done=delivered.append)
+        self.assertTrue(task.cpu)
+        self.scheduler.pump(self.runner, timeout=60)
+        self.assertEqual(delivered, [49])
+
+
+if __name__ == "__main__":
+    unittest.main()
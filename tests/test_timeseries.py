@@ -0,0 +1,30 @@
+# tests/test_timeseries.py
+import unittest
+import numpy as np
+from src.core.timeseries import rolling_metrics, rolling_sums
+
+
+class TestRollingMetrics(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        size = 400
+        series = rng.choice(["a", "b", "c"], size)
+        days = np.datetime64("2024-12-20") + rng.integers(0, 60, size).astype("timedelta64[D]")
+        clicks = rng.integers(0, 50, size).astype(float)
+        sums = rolling_sums(series, days, {"clicks": clicks}, windows=[7])[7]
+        for i in range(0, size, 17):
+            in_window = (series == series[i]) & (days <= days[i]) & (days > days[i] - np.timedelta64(7, "D"))
+            self.assertAlmostEqual(sums["clicks"][i], clicks[in_window].sum())
+
+    def test_gaps_and_full_window(self):
+        dates = ["2025-01-01", "2025-01-02", "2025-01-09", "2025-01-10"]
+        columns = {"ctr_impressions": [100, 100, 100, 300], "ctr_clicks": [10, 30, 1, np.nan]}
+        result = rolling_metrics(["x"] * 4, dates, columns, windows=[7], metrics=["ctr"])
+        # 2025-01-09: окно 03.01–09.01 содержит только одну строку
+        self.assertEqual(np.round(result["ctr_7d"], 2).tolist(), [10.0, 20.0, 1.0, 1.0])
+        full = rolling_metrics(["x"] * 4, dates, columns, windows=[7], metrics=["ctr"], require_full_window=True)
+        self.assertEqual(full["ctr_7d"].mask.tolist(), [True, True, False, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
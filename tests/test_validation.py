@@ -0,0 +1,64 @@
+# tests/test_validation.py
+import unittest
+from src.core.formulas import METRICS
+from src.core.validation import ValidationModel, is_valid_value
+
+
+class TestValidation(unittest.TestCase):
+    def setUp(self):
+        self.model = ValidationModel({"cpc": ("cpc_total_cost", "cpc_clicks"), "cpa": ("cpa_total_cost", "cpa_actions")})
+
+    def test_is_valid_value(self):
+        for value in ("1", "0.5", "12.25", "100"):
+            self.assertTrue(is_valid_value(value), value)
+        for value in ("", "0", "0.0", "0.00", "1.", "01", "1.234", "-1", "abc", ".5"):
+            self.assertFalse(is_valid_value(value), value)
+
+    def test_incremental_updates(self):
+        change = self.model.update("cpc_total_cost", "100")
+        self.assertEqual(change.formulas, (("cpc", 1),))
+        self.assertTrue(change.valid)
+        self.assertFalse(change.complete_changed)
+        # Новое значение с той же валидностью не меняет индикаторы
+        self.assertIsNone(self.model.update("cpc_total_cost", "150"))
+        self.assertEqual(self.model.value("cpc_total_cost"), "150")
+
+        change = self.model.update("cpc_clicks", "50")
+        self.assertTrue(change.complete_changed)
+        self.assertTrue(self.model.any_complete)
+        self.assertEqual(self.model.complete_formulas(), ["cpc"])
+
+        change = self.model.update("cpc_clicks", "5.")
+        self.assertFalse(change.valid)
+        self.assertEqual(change.formulas, (("cpc", 1),))
+        self.assertTrue(change.complete_changed)
+        self.assertFalse(self.model.any_complete)
+        self.assertEqual(self.model.invalid_fields(), ["cpc_clicks"])
+
+    def test_shared_field(self):
+        model = ValidationModel({"a": ("x", "y"), "b": ("y",)})
+        change = model.update("y", "2")
+        self.assertEqual(change.formulas, (("a", 1), ("b", 1)))
+        self.assertTrue(change.complete_changed)
+
+    def test_reset_matches_updates(self):
+        values = {"cpc_total_cost": "100", "cpc_clicks": "0", "cpa_total_cost": "1", "cpa_actions": "2"}
+        incremental = ValidationModel(self.model.fields)
+        for field, value in values.items():
+            incremental.update(field, value)
+        self.model.reset(values)
+        for formula_id in self.model.fields:
+            self.assertEqual(self.model.filled(formula_id), incremental.filled(formula_id))
+        self.assertEqual(self.model.complete_formulas(), ["cpa"])
+        self.assertEqual(incremental.complete_formulas(), ["cpa"])
+
+    def test_full_catalog(self):
+        model = ValidationModel({metric_id: spec.inputs for metric_id, spec in METRICS.items()})
+        for field in METRICS["roas"].inputs:
+            model.update(field, "10")
+        self.assertTrue(model.is_complete("roas"))
+        self.assertEqual(model.complete_formulas(), ["roas"])
+
+
+if __name__ == "__main__":
+    unittest.main()